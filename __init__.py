@@ -30,6 +30,9 @@ if not NO_BPY:
                                     MDLImport_OT_operator,
                                     DMXImporter_OT_operator,
                                     RigImport_OT_operator,
+                                    VTFImport_OT_operator,
+                                    VMTImport_OT_operator,
+                                    SkyboxImport_OT_operator,
                                     )
     from .source2_operators import (VMATImport_OT_operator,
                                     VTEXImport_OT_operator,
@@ -71,13 +74,12 @@ if not NO_BPY:
                             icon_value=crowbar_icon.icon_id)
             layout.operator(BSPImport_OT_operator.bl_idname, text="Source map (.bsp)",
                             icon_value=bsp_icon.icon_id)
-            if is_vtflib_supported():
-                layout.operator(VTFImport_OT_operator.bl_idname, text="Source texture (.vtf)",
-                                icon_value=vtf_icon.icon_id)
-                layout.operator(SkyboxImport_OT_operator.bl_idname, text="Source Skybox (.vmt)",
-                                icon_value=vtf_icon.icon_id)
-                layout.operator(VMTImport_OT_operator.bl_idname, text="Source material (.vmt)",
-                                icon_value=vmt_icon.icon_id)
+            layout.operator(VTFImport_OT_operator.bl_idname, text="Source texture (.vtf)",
+                            icon_value=vtf_icon.icon_id)
+            layout.operator(SkyboxImport_OT_operator.bl_idname, text="Source Skybox (.vmt)",
+                            icon_value=vtf_icon.icon_id)
+            layout.operator(VMTImport_OT_operator.bl_idname, text="Source material (.vmt)",
+                            icon_value=vmt_icon.icon_id)
             layout.operator(DMXImporter_OT_operator.bl_idname, text="[!!!WIP!!!] SFM session (.dmx) [!!!WIP!!!]")
             layout.operator(RigImport_OT_operator.bl_idname, text="SFM ik-rig script (.py)")
             layout.separator()
@@ -156,6 +158,9 @@ if not NO_BPY:
         BSPImport_OT_operator,
         DMXImporter_OT_operator,
         RigImport_OT_operator,
+        VTFImport_OT_operator,
+        VMTImport_OT_operator,
+        SkyboxImport_OT_operator,
 
         # Source2 stuff
         DMXCameraImport_OT_operator,
@@ -179,16 +184,12 @@ if not NO_BPY:
     )
 
     if is_vtflib_supported():
-        from .source1_operators import (VTFExport_OT_operator,
-                                        VTFImport_OT_operator,
-                                        VMTImport_OT_operator,
-                                        SkyboxImport_OT_operator,
-                                        )
+        from .source1_operators import VTFExport_OT_operator
 
-        classes = tuple([*classes, VTFExport_OT_operator, VTFImport_OT_operator,
-                         VMTImport_OT_operator, SkyboxImport_OT_operator])
+        classes = tuple([*classes, VTFExport_OT_operator])
 
     register_, unregister_ = bpy.utils.register_classes_factory(classes)
+    vtf_lib_loaded = False
 
 
     def register():
@@ -197,17 +198,27 @@ if not NO_BPY:
         register_nodes()
         bpy.types.TOPBAR_MT_file_import.append(menu_import)
 
+        global vtf_lib_loaded
         if is_vtflib_supported():
-            from .source1.vtf.VTFWrapper.VTFLib import VTFLib
-            from .source1_operators import export
-            VTFLib()
-            bpy.types.IMAGE_MT_image.append(export)
+            try:
+                from .source1.vtf.VTFWrapper.VTFLib import VTFLib
+                VTFLib()
+            except (OSError, NotImplementedError) as ex:
+                # VTF import still works through built-in decoder, only export needs VTFLib
+                from .bpy_utilities.logger import BPYLoggingManager
+                BPYLoggingManager().get_logger('SourceIO').warn(f'Failed to load VTFLib: "{ex}", VTF export disabled')
+            else:
+                from .source1_operators import export
+                bpy.types.IMAGE_MT_image.append(export)
+                vtf_lib_loaded = True
 
 
     def unregister():
         bpy.types.TOPBAR_MT_file_import.remove(menu_import)
 
-        if is_vtflib_supported():
+        global vtf_lib_loaded
+        if vtf_lib_loaded:
+            vtf_lib_loaded = False
             from .source1_operators import export
             bpy.types.IMAGE_MT_image.remove(export)
             from .source1.vtf.VTFWrapper.VTFLib import VTFLib
@@ -0,0 +1,29 @@
+"""Headless import of the addon as SourceIO package and timing helper for the benchmark scripts."""
+import importlib.util
+import os
+import sys
+import time
+from pathlib import Path
+
+
+def load_sourceio():
+    os.environ['NO_BPY'] = '1'
+    if 'SourceIO' not in sys.modules:
+        root = Path(__file__).resolve().parent.parent
+        spec = importlib.util.spec_from_file_location('SourceIO', root / '__init__.py',
+                                                      submodule_search_locations=[str(root)])
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['SourceIO'] = module
+        spec.loader.exec_module(module)
+    return sys.modules['SourceIO']
+
+
+def best_time(func, repeat=3):
+    """Best wall time of repeat calls and result of the last one."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
@@ -0,0 +1,58 @@
+"""Compare entity lump parsing: regex based parse_entities and KVParser it replaced.
+
+Usage: python benchmarks/entity_lump_benchmark.py [--entities N]
+"""
+import argparse
+import random
+
+from _sourceio import best_time, load_sourceio
+
+load_sourceio()
+from SourceIO.source1.bsp.lumps.entity_lump import parse_entities  # noqa: E402
+from SourceIO.utilities.keyvalues import KVParser  # noqa: E402
+
+
+def kv_parser_entities(data):
+    parser = KVParser('EntityLump', data)
+    entities = []
+    entity = parser.parse_value()
+    while entity is not None:
+        entities.append(entity)
+        entity = parser.parse_value()
+    return entities
+
+
+def build_entity_lump(count):
+    """Entity text shaped like real maps: props, lights, brush entities with outputs."""
+    rng = random.Random(1)
+    blocks = []
+    for entity_id in range(count):
+        origin = ' '.join(f'{rng.uniform(-8192, 8192):.2f}' for _ in range(3))
+        pairs = [('classname', rng.choice(['prop_static', 'light', 'func_brush', 'info_target', 'trigger_once'])),
+                 ('origin', origin),
+                 ('angles', f'0 {rng.randrange(360)} 0'),
+                 ('targetname', f'entity_{entity_id}'),
+                 ('model', f'models/props/prop_{rng.randrange(500)}.mdl')]
+        for output_id in range(rng.randrange(4)):
+            pairs.append(('OnTrigger', f'entity_{rng.randrange(count)},Kill,,{output_id}.5,-1'))
+        lines = [f'"{key}" "{value}"' for key, value in pairs]
+        lines.append(f'"spawnflags" {rng.randrange(256)}')
+        blocks.append('{\n' + '\n'.join(lines) + '\n}')
+    return '\n'.join(blocks) + '\n\x00'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--entities', type=int, default=30000, help='number of generated entities')
+    args = parser.parse_args()
+
+    data = build_entity_lump(args.entities)
+    kv_time, kv_entities = best_time(lambda: kv_parser_entities(data), repeat=1)
+    regex_time, entities = best_time(lambda: parse_entities(data))
+    assert entities == kv_entities
+    print(f'{"entities":<10}{"size":>10}{"KVParser":>12}{"regex":>10}')
+    print(f'{len(entities):<10}{len(data):>10}{kv_time:>11.3f}s{regex_time:>9.3f}s')
+
+
+if __name__ == '__main__':
+    main()
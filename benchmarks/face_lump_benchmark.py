@@ -0,0 +1,93 @@
+"""Time reading a large face lump from a file-backed ByteIO: record loops with and without cached size, read_array.
+
+Usage: python benchmarks/face_lump_benchmark.py [--faces N]
+"""
+import argparse
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from _sourceio import best_time, load_sourceio
+
+load_sourceio()
+from SourceIO.source1.bsp.datatypes.face import Face  # noqa: E402
+from SourceIO.utilities.byte_io_mdl import ByteIO  # noqa: E402
+
+# Same layout as Face.dtype, read field by field like removed Face.parse did
+FACE_FMT = '<H2Bi4h4bifiiiiiHHI'
+
+
+def build_faces(count):
+    rng = np.random.default_rng(1)
+    faces = np.zeros(count, Face.dtype)
+    faces['first_edge'] = rng.integers(0, 1 << 20, count)
+    faces['edge_count'] = rng.integers(3, 12, count)
+    faces['tex_info_id'] = rng.integers(0, 2000, count)
+    faces['disp_info_id'] = np.where(rng.random(count) < 0.1, rng.integers(0, 1000, count), -1)
+    faces['area'] = rng.random(count) * 1000
+    return faces
+
+
+def open_reader(path, cache_size):
+    reader = ByteIO(path)
+    if not cache_size:
+        # Behave like writable streams, seeking to the end on every size() call
+        reader._read_only = False
+    return reader
+
+
+def record_loop(path, cache_size):
+    reader = open_reader(path, cache_size)
+    rows = []
+    while reader:
+        rows.append(reader.read_fmt(FACE_FMT))
+    reader.close()
+    return rows
+
+
+def face_loop(path, cache_size):
+    reader = open_reader(path, cache_size)
+    faces = []
+    while reader:
+        faces.append(Face(None, None).parse(reader))
+    reader.close()
+    return faces
+
+
+def array_read(path):
+    reader = ByteIO(path)
+    faces = reader.read_array(Face.dtype)
+    reader.close()
+    return faces
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--faces', type=int, default=100000, help='number of faces in generated lump')
+    args = parser.parse_args()
+
+    faces = build_faces(args.faces)
+    assert struct.calcsize(FACE_FMT) == Face.dtype.itemsize
+    fd, path = tempfile.mkstemp(suffix='.lmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(faces.tobytes())
+
+        print(f'{args.faces} faces, {faces.nbytes} bytes')
+        for name, func in (('record loop, size per call', lambda: record_loop(path, False)),
+                           ('record loop, cached size', lambda: record_loop(path, True)),
+                           ('Face.parse, size per call', lambda: face_loop(path, False)),
+                           ('Face.parse, cached size', lambda: face_loop(path, True)),
+                           ('read_array', lambda: array_read(path))):
+            timing, result = best_time(func)
+            assert len(result) == args.faces
+            print(f'{name:<30}{timing:>9.3f}s')
+        assert array_read(path).tobytes() == faces.tobytes()
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""Time binary KV3 reading of generated v1, v2 and legacy v3 files with large typed arrays.
+
+Usage: python benchmarks/kv3_benchmark.py [--count N] [--baseline path/to/old/binary_keyvalue.py]
+
+Baseline module is loaded in place of source2/utils/binary_keyvalue.py to compare timings and results,
+e.g. after "git show <rev>:source2/utils/binary_keyvalue.py > old_binary_keyvalue.py".
+"""
+import argparse
+import struct
+import types
+
+import numpy as np
+
+from _sourceio import best_time, load_sourceio
+
+load_sourceio()
+import SourceIO.source2.blocks  # noqa: E402,F401  resolves import cycle of binary_keyvalue
+from SourceIO.source2.utils import binary_keyvalue  # noqa: E402
+from SourceIO.utilities.byte_io_mdl import ByteIO  # noqa: E402
+
+BinaryKeyValue = binary_keyvalue.BinaryKeyValue
+KVType = binary_keyvalue.KVType
+
+
+class TypedArray:
+    def __init__(self, sub_type: KVType, items):
+        self.sub_type = sub_type
+        self.items = list(items)
+
+
+class KV3Writer:
+    """Writes value streams of KV3, legacy v3 keeps types and all values inline in one stream."""
+
+    def __init__(self, inline):
+        self.inline = inline
+        self.strings = []
+        self.bytes = bytearray()
+        self.ints = bytearray()
+        self.doubles = bytearray()
+        self.types = bytearray()
+        if inline:
+            self.ints = self.doubles = self.types = self.bytes
+
+    def string_id(self, string):
+        if string not in self.strings:
+            self.strings.append(string)
+        return self.strings.index(string)
+
+    def write_type(self, data_type):
+        self.types.append(data_type)
+
+    def write_value(self, value):
+        if isinstance(value, TypedArray):
+            self.write_type(KVType.ARRAY_TYPED)
+            self.ints += struct.pack('<I', len(value.items))
+            self.write_type(value.sub_type)
+            for item in value.items:
+                self.write_raw(value.sub_type, item)
+        elif isinstance(value, dict):
+            self.write_type(KVType.OBJECT)
+            self.ints += struct.pack('<I', len(value))
+            for key, item in value.items():
+                self.ints += struct.pack('<I', self.string_id(key))
+                self.write_value(item)
+        elif isinstance(value, list):
+            self.write_type(KVType.ARRAY)
+            self.ints += struct.pack('<I', len(value))
+            for item in value:
+                self.write_value(item)
+        elif isinstance(value, bool):
+            self.write_type(KVType.BOOLEAN)
+            self.bytes.append(int(value))
+        elif isinstance(value, int):
+            sub_type = KVType.INT32 if -2 ** 31 <= value < 2 ** 31 else KVType.INT64
+            self.write_type(sub_type)
+            self.write_raw(sub_type, value)
+        elif isinstance(value, float):
+            self.write_type(KVType.DOUBLE)
+            self.write_raw(KVType.DOUBLE, value)
+        elif isinstance(value, str):
+            self.write_type(KVType.STRING)
+            self.write_raw(KVType.STRING, value)
+        elif value is None:
+            self.write_type(KVType.NULL)
+        else:
+            raise TypeError(f'Unsupported value {value!r}')
+
+    def write_raw(self, sub_type, value):
+        if sub_type == KVType.DOUBLE:
+            self.doubles += struct.pack('<d', value)
+        elif sub_type == KVType.INT64:
+            self.doubles += struct.pack('<q', value)
+        elif sub_type == KVType.UINT64:
+            self.doubles += struct.pack('<Q', value)
+        elif sub_type == KVType.INT32:
+            self.ints += struct.pack('<i', value)
+        elif sub_type == KVType.UINT32:
+            self.ints += struct.pack('<I', value)
+        elif sub_type == KVType.STRING:
+            self.ints += struct.pack('<i', self.string_id(value))
+        elif sub_type not in (KVType.DOUBLE_ZERO, KVType.DOUBLE_ONE, KVType.BOOLEAN_TRUE, KVType.BOOLEAN_FALSE):
+            raise TypeError(f'Unsupported typed array of {sub_type!r}')
+
+    def strings_data(self):
+        return b''.join(string.encode('ascii') + b'\x00' for string in self.strings)
+
+    def split_buffer(self):
+        """Byte, int and double streams of v1/v2 files, string count is the first int."""
+        buffer = bytearray(self.bytes)
+        buffer += b'\x00' * (-len(buffer) % 4)
+        buffer += struct.pack('<I', len(self.strings)) + self.ints
+        buffer += b'\x00' * (-len(buffer) % 8)
+        buffer += self.doubles
+        return buffer, len(self.ints) // 4 + 1, len(self.doubles) // 8
+
+
+def build_kv3_v1(root):
+    writer = KV3Writer(inline=False)
+    writer.write_value(root)
+    buffer, int_count, double_count = writer.split_buffer()
+    buffer += writer.strings_data() + writer.types + struct.pack('<I', 0xFFEEDD00)
+    return (bytes(BinaryKeyValue.VKV3_SIG) + bytes(BinaryKeyValue.KV3_FORMAT_GENERIC) +
+            struct.pack('<5I', 0, len(writer.bytes), int_count, double_count, len(buffer)) + buffer)
+
+
+def build_kv3_v2(root):
+    writer = KV3Writer(inline=False)
+    writer.write_value(root)
+    buffer, int_count, double_count = writer.split_buffer()
+    strings_and_types = writer.strings_data() + writer.types
+    buffer += strings_and_types + struct.pack('<I', 0xFFEEDD00)
+    return (bytes(BinaryKeyValue.VKV3_v2_SIG) + bytes(BinaryKeyValue.KV3_FORMAT_GENERIC) +
+            struct.pack('<I2H3I', 0, 0, 0, len(writer.bytes), int_count, double_count) +
+            struct.pack('<I2H', len(strings_and_types), 0, 0) +
+            struct.pack('<4I', len(buffer), len(buffer), 0, 0) + buffer)
+
+
+def build_kv3_v3(root):
+    writer = KV3Writer(inline=True)
+    writer.write_value(root)
+    buffer = struct.pack('<I', len(writer.strings)) + writer.strings_data() + writer.bytes
+    return (bytes(BinaryKeyValue.KV3_SIG) + bytes(BinaryKeyValue.KV3_ENCODING_BINARY_UNCOMPRESSED) +
+            bytes(BinaryKeyValue.KV3_FORMAT_GENERIC) + buffer)
+
+
+def build_root(count, with_uint32=True):
+    rng = np.random.default_rng(1)
+    root = {
+        'name': 'benchmark', 'flag': True, 'nothing': None, 'scale': 1.5, 'big': 2 ** 40,
+        'mixed': [1, 'a', 2.5, [3, 4], {'inner': False}],
+        'doubles': TypedArray(KVType.DOUBLE, rng.random(count).tolist()),
+        'int64': TypedArray(KVType.INT64, rng.integers(-2 ** 40, 2 ** 40, count).tolist()),
+        'uint64': TypedArray(KVType.UINT64, rng.integers(0, 2 ** 62, count).tolist()),
+        'int32': TypedArray(KVType.INT32, rng.integers(-2 ** 31, 2 ** 31, count).tolist()),
+        'uint32': TypedArray(KVType.UINT32, rng.integers(0, 2 ** 32, count).tolist()),
+        'ones': TypedArray(KVType.DOUBLE_ONE, [None] * 5),
+        'strings': TypedArray(KVType.STRING, ['x', 'y', 'x']),
+        'nodes': [{'id': i, 'origin': TypedArray(KVType.DOUBLE, [float(i), 2.0, 3.0])} for i in range(count // 10)],
+    }
+    if not with_uint32:
+        del root['uint32']
+    return root
+
+
+def expected_value(value):
+    if isinstance(value, TypedArray):
+        if value.sub_type == KVType.DOUBLE:
+            return np.array(value.items, np.float64)
+        if value.sub_type == KVType.DOUBLE_ONE:
+            return np.ones(len(value.items), np.float64)
+        return value.items
+    if isinstance(value, dict):
+        return {key: expected_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [expected_value(item) for item in value]
+    return value
+
+
+def same(a, b):
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return type(a) is type(b) and np.array_equal(a, b)
+    if isinstance(a, dict):
+        return type(b) is dict and a.keys() == b.keys() and all(same(a[key], b[key]) for key in a)
+    if isinstance(a, list):
+        return type(b) is list and len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+    return type(a) is type(b) and a == b
+
+
+def load_baseline(path):
+    module = types.ModuleType('SourceIO.source2.utils.baseline_binary_keyvalue')
+    module.__package__ = 'SourceIO.source2.utils'
+    with open(path) as file:
+        exec(compile(file.read(), path, 'exec'), module.__dict__)
+    return module
+
+
+def read_kv3(module, data):
+    kv = module.BinaryKeyValue()
+    kv.read(ByteIO(data))
+    return kv.kv
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=20000, help='number of items in every typed array')
+    parser.add_argument('--baseline', help='older binary_keyvalue.py to compare with')
+    args = parser.parse_args()
+
+    modules = [('current', binary_keyvalue)]
+    if args.baseline:
+        modules.append(('baseline', load_baseline(args.baseline)))
+        print('UINT32 arrays are left out, older readers do not support them')
+    root = build_root(args.count, with_uint32=not args.baseline)
+    expected = expected_value(root)
+
+    print(f'{"format":<8}{"size":>10}' + ''.join(f'{name:>12}' for name, _ in modules))
+    for name, builder in (('v1', build_kv3_v1), ('v2', build_kv3_v2), ('v3', build_kv3_v3)):
+        data = builder(root)
+        timings = []
+        for module_name, module in modules:
+            timing, kv = best_time(lambda: read_kv3(module, data))
+            if not same(expected, kv):
+                print(f'{name}: {module_name} result differs from generated data')
+            timings.append(timing)
+        print(f'{name:<8}{len(data):>10}' + ''.join(f'{timing:>11.3f}s' for timing in timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Compare LZ4 block decoding: removed source2/utils/lz4.py, pure python fallback and liblz4.
+
+Blocks are compressed with liblz4, so the script needs it installed.
+Usage: python benchmarks/lz4_benchmark.py
+"""
+import random
+from io import BytesIO
+
+from _sourceio import best_time, load_sourceio
+
+load_sourceio()
+from SourceIO.utilities.lz4_wrapper import LZ4Wrapper, decompress_python  # noqa: E402
+
+
+class CorruptError(Exception):
+    pass
+
+
+def old_uncompress(src):
+    """Decoder of removed source2/utils/lz4.py, output is extended one byte at a time for every match."""
+    src = BytesIO(src)
+    dst = bytearray()
+    min_match_len = 4
+
+    def get_length(src, length):
+        if length != 0x0f:
+            return length
+        while True:
+            read_buf = src.read(1)
+            if len(read_buf) != 1:
+                raise CorruptError("EOF at length read")
+            len_part = read_buf[0]
+            length += len_part
+            if len_part != 0xff:
+                break
+        return length
+
+    while True:
+        read_buf = src.read(1)
+        if len(read_buf) == 0:
+            raise CorruptError("EOF at reading literal-len")
+        token = read_buf[0]
+
+        literal_len = get_length(src, (token >> 4) & 0x0f)
+        read_buf = src.read(literal_len)
+        if len(read_buf) != literal_len:
+            raise CorruptError("not literal data")
+        dst.extend(read_buf)
+
+        read_buf = src.read(2)
+        if len(read_buf) == 0:
+            if token & 0x0f != 0:
+                raise CorruptError("EOF, but match-len > 0: %u" % (token % 0x0f,))
+            break
+        if len(read_buf) != 2:
+            raise CorruptError("premature EOF")
+
+        offset = read_buf[0] | (read_buf[1] << 8)
+        if offset == 0:
+            raise CorruptError("offset can't be 0")
+
+        match_len = get_length(src, token & 0x0f) + min_match_len
+        for _ in range(match_len):
+            dst.append(dst[-offset])
+    return dst
+
+
+def random_bytes(rng, count):
+    return rng.getrandbits(8 * count).to_bytes(count, 'little')
+
+
+def long_runs(size):
+    rng = random.Random(1)
+    data = bytearray()
+    while len(data) < size:
+        data += bytes([rng.randrange(256)]) * rng.randrange(64, 4096)
+    return bytes(data[:size])
+
+
+def mixed_runs(size):
+    rng = random.Random(2)
+    data = bytearray()
+    while len(data) < size:
+        if rng.random() < 0.5:
+            data += random_bytes(rng, rng.randrange(4, 64))
+        else:
+            data += bytes([rng.randrange(4)]) * rng.randrange(4, 256)
+    return bytes(data[:size])
+
+
+def short_matches(size):
+    rng = random.Random(3)
+    words = [random_bytes(rng, rng.randrange(4, 12)) for _ in range(512)]
+    data = bytearray()
+    while len(data) < size:
+        data += rng.choice(words)
+    return bytes(data[:size])
+
+
+def main():
+    lz4 = LZ4Wrapper()
+    if not lz4.is_native:
+        raise SystemExit('liblz4 is required to compress benchmark data')
+    cases = [('long runs', long_runs(2 * 1024 * 1024)),
+             ('mixed runs', mixed_runs(4 * 1024 * 1024)),
+             ('short matches', short_matches(5 * 512 * 1024))]
+    print(f'{"data":<16}{"size":>10}{"old python":>12}{"python":>10}{"liblz4":>10}')
+    for name, data in cases:
+        compressed = lz4.compress_fast(data)
+        old_time, old_data = best_time(lambda: old_uncompress(compressed))
+        python_time, python_data = best_time(lambda: decompress_python(compressed, len(data)))
+        native_time, native_data = best_time(lambda: lz4.decompress_safe(compressed, len(data)))
+        assert old_data == python_data == native_data == data
+        print(f'{name:<16}{len(data):>10}{old_time:>11.3f}s{python_time:>9.3f}s{native_time:>9.4f}s')
+
+
+if __name__ == '__main__':
+    main()
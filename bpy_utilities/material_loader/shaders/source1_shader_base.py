@@ -5,12 +5,7 @@ import numpy as np
 from ....content_providers.content_manager import ContentManager
 from ..shader_base import ShaderBase
 
-from ....source1.vtf import is_vtflib_supported
-
-if is_vtflib_supported():
-    from ....source1.vtf.import_vtf import import_texture
-else:
-    from ....source1.vtf import import_texture
+from ....source1.vtf import import_texture
 
 
 class Source1ShaderBase(ShaderBase):
@@ -1,5 +1,10 @@
-import bpy
 import random
+from typing import Dict, List
+
+import bpy
+import numpy as np
+
+from ..utilities.math_utilities import group_vertex_weights
 
 
 def get_material(mat_name, model_ob):
@@ -42,3 +47,17 @@ def append_blend(filepath, type_name, link=False):
         setattr(data_to, type_name, [asset for asset in getattr(data_from, type_name)])
     for o in getattr(data_to, type_name) :
         o.use_fake_user = True
+
+
+def add_vertex_weights(vertex_groups: Dict[str, bpy.types.VertexGroup], bone_names: List[str],
+                       bone_ids: np.ndarray, weights: np.ndarray):
+    for bone_id, weight, vertex_ids in group_vertex_weights(bone_ids, weights):
+        vertex_groups[bone_names[bone_id]].add(vertex_ids.tolist(), weight, 'REPLACE')
+
+
+def set_keyframes(curve: bpy.types.FCurve, values: np.ndarray):
+    """Key values on consecutive frames starting from 0."""
+    curve.keyframe_points.add(values.shape[0])
+    frames = np.arange(values.shape[0], dtype=np.float32)
+    curve.keyframe_points.foreach_set('co', np.stack([frames, values], axis=1).astype(np.float32).ravel())
+    curve.update()
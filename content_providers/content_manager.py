@@ -1,7 +1,8 @@
 from pathlib import Path
-from typing import Union, Dict, List, TypeVar
+from typing import Union, Dict, List, TypeVar, Tuple, Any, Optional, Set
 from collections import Counter
 
+from .content_provider_base import ContentProviderBase
 from .hfs_sub_manager import HFS2ContentProvider, HFS1ContentProvider
 from ..bpy_utilities.logger import BPYLoggingManager
 from .non_source_sub_manager import NonSourceContentProvider
@@ -24,6 +25,12 @@ class ContentManager(metaclass=SingletonMeta):
         self.content_providers: Dict[str, AnyContentProvider] = {}
         self._titanfall_mode = False
         self._steam_id = -1
+        self._file_index: Optional[Dict[str, Tuple[str, Any]]] = None
+        self._indexed_providers: Dict[str, AnyContentProvider] = {}
+        self._provider_listings: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._priorities: Dict[str, int] = {}
+        self._unindexed_providers: List[Tuple[int, str]] = []
+        self._missing_files: Set[str] = set()
         self._register_supported_detectors()
 
     def _register_supported_detectors(self):
@@ -181,6 +188,79 @@ class ContentManager(metaclass=SingletonMeta):
         for content_provider in self.content_providers.values():
             yield from content_provider.glob(pattern)
 
+    def build_file_index(self):
+        """Rebuild path -> (provider name, locator) index of all providers from scratch."""
+        self._file_index = {}
+        self._indexed_providers = {}
+        self._provider_listings = {}
+        self._update_file_index()
+        logger.debug(f'Indexed {len(self._file_index)} files, '
+                     f'{len(self._unindexed_providers)} providers left unindexed')
+
+    def _update_file_index(self):
+        """Bring index in line with content_providers, only added, replaced or removed providers are (re)listed.
+
+        First provider to claim a path wins, so search path priority is kept.
+        Providers without index_files support are remembered and probed in priority order on lookup.
+        """
+        file_index = self._file_index
+        listings = self._provider_listings
+        old_providers = self._indexed_providers
+        new_providers = dict(self.content_providers)
+        kept_names = [name for name, provider in new_providers.items() if old_providers.get(name, None) is provider]
+        kept_name_set = set(kept_names)
+        if kept_names != [name for name in old_providers if name in kept_name_set]:
+            # Kept providers changed their order, priorities of all paths may change
+            self.build_file_index()
+            return
+        priorities = {name: priority for priority, name in enumerate(new_providers)}
+
+        for name in old_providers:
+            if name in kept_name_set:
+                continue
+            for file_name in listings.pop(name, None) or ():
+                if file_name in file_index and file_index[file_name][0] == name:
+                    del file_index[file_name]
+                    # Path falls back to the next kept provider that has it
+                    for other_name in kept_names:
+                        other_listing = listings[other_name]
+                        if other_listing is not None and file_name in other_listing:
+                            file_index[file_name] = other_name, other_listing[file_name]
+                            break
+
+        for name, provider in new_providers.items():
+            if name in kept_name_set:
+                continue
+            indexed_files = provider.index_files()
+            if indexed_files is None:
+                listings[name] = None
+                continue
+            listing = listings[name] = dict(indexed_files)
+            priority = priorities[name]
+            for file_name, locator in listing.items():
+                indexed_file = file_index.get(file_name, None)
+                if indexed_file is None or priorities[indexed_file[0]] > priority:
+                    file_index[file_name] = name, locator
+
+        self._indexed_providers = new_providers
+        self._priorities = priorities
+        self._unindexed_providers = [(priority, name) for name, priority in priorities.items()
+                                     if listings[name] is None]
+        self._missing_files.clear()
+
+    def invalidate_file_index(self):
+        self._file_index = None
+        self._missing_files.clear()
+
+    def _get_file_index(self):
+        # Providers may be added directly to content_providers, so compare with the indexed ones on every lookup
+        if self._file_index is None:
+            self.build_file_index()
+        elif self._indexed_providers.keys() != self.content_providers.keys() or any(
+                self._indexed_providers[name] is not provider for name, provider in self.content_providers.items()):
+            self._update_file_index()
+        return self._file_index
+
     def find_file(self, filepath: Union[str, Path], additional_dir=None, extension=None, *, silent=False):
 
         new_filepath = Path(str(filepath).strip('/\\').rstrip('/\\'))
@@ -190,12 +270,29 @@ class ContentManager(metaclass=SingletonMeta):
             new_filepath = new_filepath.with_suffix(extension)
         if not silent:
             logger.info(f'Requesting {new_filepath} file')
-        for mod, submanager in self.content_providers.items():
-            file = submanager.find_file(new_filepath)
+        file_index = self._get_file_index()
+        normalized_path = new_filepath.as_posix().replace('\\', '/')
+        # Unindexed providers probe case-sensitive filesystems, so misses keep original case
+        if normalized_path in self._missing_files:
+            return None
+        indexed_file = file_index.get(normalized_path.lower(), None)
+        indexed_priority = self._priorities[indexed_file[0]] if indexed_file is not None else len(self._priorities)
+        for priority, mod in self._unindexed_providers:
+            if priority > indexed_priority:
+                break
+            file = self.content_providers[mod].find_file(new_filepath)
+            if file is not None:
+                if not silent:
+                    logger.debug(f'Found in {mod}!')
+                return file
+        if indexed_file is not None:
+            mod, locator = indexed_file
+            file = self.content_providers[mod].open_indexed_file(locator)
             if file is not None:
                 if not silent:
                     logger.debug(f'Found in {mod}!')
                 return file
+        self._missing_files.add(normalized_path)
         return None
 
     def find_path(self, filepath: str, additional_dir=None, extension=None, *, silent=False):
@@ -244,8 +341,19 @@ class ContentManager(metaclass=SingletonMeta):
         for cp in self.content_providers.values():
             cp.flush_cache()
 
+    @staticmethod
+    def set_cache_budget(max_bytes: int):
+        ContentProviderBase.file_cache.set_budget(max_bytes)
+
+    @staticmethod
+    def get_cache_stats():
+        return ContentProviderBase.file_cache.stats()
+
     def clean(self):
+        # Cache is shared by all providers and keyed by them, drop entries so providers can be freed
+        self.flush_cache()
         self.content_providers.clear()
+        self.invalidate_file_index()
         self._steam_id = -1
 
     @property
@@ -1,11 +1,14 @@
-from collections import deque
+import os
 from io import BytesIO
 from pathlib import Path
-from typing import Union, Dict, Type
+from typing import Union, Dict, Type, Iterable, Tuple, Any, Optional
+
+from .file_cache import FileCache
+from ..utilities.byte_io_mdl import ByteIO, MemoryByteIO
 
 
 class ContentProviderBase:
-    __cache = deque([], maxlen=16)
+    file_cache = FileCache()
 
     def __init__(self, filepath: Path):
         self.filepath = filepath
@@ -19,19 +22,39 @@ class ContentProviderBase:
     def glob(self, pattern: str):
         raise NotImplementedError('Implement me!')
 
-    def cache_file(self, filename, file: BytesIO):
-        if (filename, file) not in self.__cache:
-            self.__cache.append((filename, file))
-        return file
+    def index_files(self) -> Optional[Iterable[Tuple[str, Any]]]:
+        """Yield (lowercase posix path, locator) pairs for every file provider can serve.
+
+        Providers that can't enumerate their content return None and are probed with find_file instead.
+        """
+        return None
+
+    def open_indexed_file(self, locator: Any):
+        raise NotImplementedError('Implement me!')
+
+    @staticmethod
+    def _cache_key(filename):
+        return str(filename).replace('\\', '/').lower()
 
-    def get_from_cache(self, filename):
-        for name, file in self.__cache:
-            if name == filename:
-                file.seek(0)
+    def cache_file(self, filename, file: Optional[Union[BytesIO, ByteIO]]):
+        """Cache in-memory file, returned reader and later cache hits have the same type as the provider's one."""
+        if isinstance(file, MemoryByteIO):
+            data = file.getbuffer().tobytes()
+        else:
+            # ByteIO keeps its buffer in .file
+            buffer = getattr(file, 'file', file)
+            if not isinstance(buffer, BytesIO):
                 return file
+            data = buffer.getvalue()
+        reader_type = ByteIO if isinstance(file, ByteIO) else BytesIO
+        self.file_cache.put(self, self._cache_key(filename), data, reader_type)
+        return reader_type(data)
+
+    def get_from_cache(self, filename) -> Optional[Union[BytesIO, ByteIO]]:
+        return self.file_cache.get(self, self._cache_key(filename))
 
     def flush_cache(self):
-        self.__cache.clear()
+        self.file_cache.flush(self)
 
     @property
     def steam_id(self):
@@ -76,6 +99,22 @@ class ContentProviderBase:
     def _glob_generic(self, pattern: str):
         yield from self.root.rglob(pattern)
 
+    def _index_files_generic(self):
+        root = str(self.root)
+        for dir_path, _, file_names in os.walk(root):
+            rel_dir = os.path.relpath(dir_path, root).replace('\\', '/').lower()
+            for file_name in file_names:
+                if rel_dir == '.':
+                    yield file_name.lower(), os.path.join(dir_path, file_name)
+                else:
+                    yield f'{rel_dir}/{file_name.lower()}', os.path.join(dir_path, file_name)
+
+    @staticmethod
+    def _open_indexed_file_generic(locator: str):
+        if os.path.exists(locator):
+            return open(locator, 'rb')
+        return None
+
 
 class ContentDetectorBase:
 
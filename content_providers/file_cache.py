@@ -0,0 +1,75 @@
+from collections import OrderedDict
+from io import BytesIO
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class FileCache:
+    """LRU cache of file contents limited by total size in bytes.
+
+    Contents are stored as immutable bytes, every hit returns new reader over them,
+    so readers of the same file never share a cursor.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Tuple[Any, Hashable], Tuple[bytes, Callable]]' = OrderedDict()
+        self._lock = Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, owner: Any, filename: Hashable):
+        key = owner, filename
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        data, reader_type = entry
+        return reader_type(data)
+
+    def put(self, owner: Any, filename: Hashable, data: bytes, reader_type: Callable = BytesIO):
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        key = owner, filename
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self.current_bytes -= len(old_entry[0])
+            self._entries[key] = data, reader_type
+            self.current_bytes += size
+            self._shrink(self.max_bytes)
+
+    def _shrink(self, max_bytes: int):
+        while self.current_bytes > max_bytes and self._entries:
+            _, (data, _) = self._entries.popitem(last=False)
+            self.current_bytes -= len(data)
+            self.evictions += 1
+
+    def set_budget(self, max_bytes: int):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._shrink(max_bytes)
+
+    def flush(self, owner: Any = None):
+        with self._lock:
+            if owner is None:
+                self._entries.clear()
+                self.current_bytes = 0
+                return
+            for key in [key for key in self._entries if key[0] is owner]:
+                self.current_bytes -= len(self._entries.pop(key)[0])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries),
+                    'bytes': self.current_bytes,
+                    'max_bytes': self.max_bytes,
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions}
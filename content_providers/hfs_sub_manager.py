@@ -28,6 +28,15 @@ class HFS2ContentProvider(ContentProviderBase):
         if self.hfs_archive.has_file(filepath):
             return filepath
 
+    def index_files(self):
+        return ((file_name, file_name) for file_name in self.hfs_archive.files.keys())
+
+    def open_indexed_file(self, locator: str):
+        cached_file = self.get_from_cache(locator)
+        if cached_file:
+            return cached_file
+        return self.cache_file(locator, self.hfs_archive.get_file(locator))
+
     def glob(self, pattern: str):
         for file_name in self.hfs_archive.files.keys():
             if glob.fnmatch.fnmatch(file_name, pattern):
@@ -56,6 +65,15 @@ class HFS1ContentProvider(ContentProviderBase):
         if self.hfs_archive.has_file(filepath):
             return filepath
 
+    def index_files(self):
+        return ((file_name, file_name) for file_name in self.hfs_archive.entries.keys())
+
+    def open_indexed_file(self, locator: str):
+        cached_file = self.get_from_cache(locator)
+        if cached_file:
+            return cached_file
+        return self.cache_file(locator, self.hfs_archive.get_file(locator))
+
     def glob(self, pattern: str):
         for file_name in self.hfs_archive.entries.keys():
             if glob.fnmatch.fnmatch(file_name, pattern):
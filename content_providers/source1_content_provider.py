@@ -78,3 +78,9 @@ class GameinfoContentProvider(ContentProviderBase):
 
     def glob(self, pattern: str):
         yield from self._glob_generic(pattern)
+
+    def index_files(self):
+        return self._index_files_generic()
+
+    def open_indexed_file(self, locator: str):
+        return self._open_indexed_file_generic(locator)
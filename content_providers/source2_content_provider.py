@@ -81,6 +81,12 @@ class GameinfoContentProvider(ContentProviderBase):
     def glob(self, pattern: str):
         yield from self._glob_generic(pattern)
 
+    def index_files(self):
+        return self._index_files_generic()
+
+    def open_indexed_file(self, locator: str):
+        return self._open_indexed_file_generic(locator)
+
     def find_file(self, filepath: Union[str, Path]):
         filepath = Path(str(filepath).strip("\\/"))
         new_filepath = self.modname_dir / filepath
@@ -9,7 +9,7 @@ class VPKContentProvider(ContentProviderBase):
     def __init__(self, filepath: Path, override_steamid=0):
         super().__init__(filepath)
         self._override_steamid = override_steamid
-        self.vpk_archive = open_vpk(filepath)
+        self.vpk_archive = open_vpk(filepath, use_index=True)
         self.vpk_archive.read()
 
     def glob(self, pattern: str):
@@ -29,6 +29,16 @@ class VPKContentProvider(ContentProviderBase):
             file = self.vpk_archive.read_file(entry)
             return self.cache_file(filepath, file)
 
+    def index_files(self):
+        return ((file_name, file_name) for file_name in self.vpk_archive.entries)
+
+    def open_indexed_file(self, locator: str):
+        cached_file = self.get_from_cache(locator)
+        if cached_file:
+            return cached_file
+        file = self.vpk_archive.read_file(self.vpk_archive.entries[locator])
+        return self.cache_file(locator, file)
+
     def find_path(self, filepath: Union[str, Path]):
         entry = self.vpk_archive.find_file(full_path=filepath)
         if entry:
@@ -7,13 +7,15 @@ from .structs.bone import StudioBone
 from .structs.studioheader import StudioHeader
 from .structs.bodypart import StudioBodypart
 from .structs.texture import StudioTexture
-from ...source_shared.base import Base
+from ...source_shared.base import Base, with_storage
 from ...utilities.byte_io_mdl import ByteIO
 
 
 class Mdl(Base):
 
+    @with_storage
     def __init__(self, filepath):
+        self.begin_storage()
         self.store_value("MDL", self)
         self.reader = ByteIO(filepath)
         self.header = StudioHeader()
@@ -21,6 +23,7 @@ class Mdl(Base):
         self.bodyparts: List[StudioBodypart] = []
         self.textures: List[StudioTexture] = []
 
+    @with_storage
     def read(self):
         self.header.read(self.reader)
 
@@ -9,13 +9,15 @@ from .structs.sequence import StudioSequence
 from .structs.studioheader import StudioHeader
 from .structs.bodypart import StudioBodypart
 from .structs.texture import StudioTexture
-from ...source_shared.base import Base
+from ...source_shared.base import Base, with_storage
 from ...utilities.byte_io_mdl import ByteIO
 
 
 class Mdl(Base):
 
+    @with_storage
     def __init__(self, filepath):
+        self.begin_storage()
         self.store_value("MDL", self)
         self.reader = ByteIO(filepath)
         self.header = StudioHeader()
@@ -25,6 +27,7 @@ class Mdl(Base):
         self.textures: List[StudioTexture] = []
         self.animations: List[StudioAnimation] = []
 
+    @with_storage
     def read(self):
         header = self.header
         reader = self.reader
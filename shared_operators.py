@@ -10,7 +10,6 @@ from .source1.mdl.model_loader import import_model_from_files
 from .source1.mdl.v49.import_mdl import import_materials
 
 from .source1.mdl.v49.import_mdl import put_into_collections as s1_put_into_collections
-from .source1.vtf import is_vtflib_supported
 from .source2.resouce_types.model import put_into_collections as s2_put_into_collections
 
 from .source2.resouce_types.model import ValveCompiledModel
@@ -144,9 +143,8 @@ class LoadEntity_OT_operator(bpy.types.Operator):
 
                     for mesh_obj in model_container.objects:
                         mesh_obj['prop_path'] = custom_prop_data['prop_path']
-                    if is_vtflib_supported():
-                        if container is None:
-                            import_materials(model_container.mdl, unique_material_names=unique_material_names)
+                    if container is None:
+                        import_materials(model_container.mdl, unique_material_names=unique_material_names)
                     skin = custom_prop_data.get('skin', None)
                     if skin:
                         for model in model_container.objects:
@@ -1,6 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from typing import Dict, Type
+from typing import Dict, Type, Tuple, Iterable, Optional
 
 from .lump import *
 from .lumps.displacement_lump import DispVert
@@ -46,11 +47,14 @@ class BSPFile:
     def __init__(self, filepath: str):
         self.filepath = Path(filepath)
         self.logger = log_manager.get_logger(self.filepath.name)
-        self.reader = ByteIO(self.filepath)
+        self.reader = ByteIO.map_file(self.filepath)
         self.version = 0
         self.lumps_info: List[LumpInfo] = []
         self.lumps: Dict[str, Lump] = {}
         self.revision = 0
+        self._lump_classes: Dict[str, Tuple[Type[Lump], LumpTag]] = {}
+        self._lump_classes_revision = -1
+        self.decompressed_lumps: Dict[int, ByteIO] = {}
         self.content_manager = ContentManager()
         content_provider = self.content_manager.get_content_provider_from_path(self.filepath)
         self.steam_app_id = content_provider.steam_id
@@ -66,46 +70,80 @@ class BSPFile:
             lump.parse(reader, is_l4d2)
             self.lumps_info.append(lump)
         self.revision = reader.read_int32()
+        self._lump_classes_revision = -1
 
         # self.parse_lumps()
 
+    def _is_lump_tag_applicable(self, tag: LumpTag):
+        if tag.bsp_version is not None and tag.bsp_version > self.version:
+            return False
+        if tag.steam_id is not None and tag.steam_id != self.steam_app_id:
+            return False
+        if tag.lump_version is not None and tag.lump_version != self.lumps_info[tag.lump_id].version:
+            return False
+        return True
+
+    def _rank_lump_tag(self, tag: LumpTag):
+        rank = 0
+        if tag.steam_id is not None and tag.steam_id == self.steam_app_id:
+            rank += 1
+        if tag.lump_version is not None and tag.lump_version == self.lumps_info[tag.lump_id].version:
+            rank += 1
+        return rank
+
+    def get_lump_classes(self) -> Dict[str, Tuple[Type[Lump], LumpTag]]:
+        """Return lump name -> (lump class, tag) that get_lump would use for this file."""
+        if self._lump_classes_revision != LumpRegistry.revision:
+            lump_classes = {}
+            for lump_name, candidates in LumpRegistry.by_name.items():
+                best_matches = {}
+                for lump_class, tag in candidates:
+                    if tag.lump_id >= len(self.lumps_info) or not self._is_lump_tag_applicable(tag):
+                        continue
+                    best_matches[self._rank_lump_tag(tag)] = (lump_class, tag)
+                if best_matches:
+                    lump_classes[lump_name] = best_matches[max(best_matches.keys())]
+            self._lump_classes = lump_classes
+            self._lump_classes_revision = LumpRegistry.revision
+        return self._lump_classes
+
     def get_lump(self, lump_name):
 
         if lump_name in self.lumps:
             return self.lumps[lump_name]
         else:
-            matches: List[Tuple[Type[Lump], LumpTag]] = []
-            for sub in Lump.all_subclasses():
-                sub: Type[Lump]
-                for dep in sub.tags:
-                    if dep.lump_name == lump_name:
-                        if dep.bsp_version is not None and dep.bsp_version > self.version:
-                            continue
-                        if dep.steam_id is not None and dep.steam_id != self.steam_app_id:
-                            continue
-                        if dep.lump_version is not None and dep.lump_version != self.lumps_info[dep.lump_id].version:
-                            continue
-                        matches.append((sub, dep))
-            best_matches = {}
-            for match_sub, match_dep in matches:
-                lump = self.lumps_info[match_dep.lump_id]
-                rank = 0
-                if match_dep.bsp_version is not None and match_dep.bsp_version > self.version:
-                    rank += 1
-                if match_dep.steam_id is not None and match_dep.steam_id == self.steam_app_id:
-                    rank += 1
-                if match_dep.lump_version is not None and match_dep.lump_version == lump.version:
-                    rank += 1
-                best_matches[rank] = (match_sub, match_dep)
-            if not best_matches:
+            match = self.get_lump_classes().get(lump_name, None)
+            if match is None:
                 return
-            best_match_id = max(best_matches.keys())
-            sub, dep = best_matches[best_match_id]
+            sub, dep = match
 
             parsed_lump = self.parse_lump(sub, dep.lump_id, dep.lump_name)
             self.lumps[lump_name] = parsed_lump
             return parsed_lump
 
+    def preload_lumps(self, lump_names: Iterable[str], workers: Optional[int] = None):
+        """Decompress requested LZMA lumps in thread pool and parse them into lump cache.
+
+        lzma releases GIL while decompressing, so lumps are unpacked in parallel,
+        parsing still happens on calling thread.
+        """
+        lump_names = list(lump_names)
+        lump_classes = self.get_lump_classes()
+        compressed_lumps = {}
+        for lump_name in lump_names:
+            if lump_name in self.lumps or lump_name not in lump_classes:
+                continue
+            lump_id = lump_classes[lump_name][1].lump_id
+            lump_info = self.lumps_info[lump_id]
+            if lump_info.compressed and lump_info.size and lump_id not in self.decompressed_lumps:
+                compressed_lumps[lump_id] = self.reader.subview(lump_info.offset, lump_info.size)
+        if compressed_lumps:
+            with ThreadPoolExecutor(workers) as executor:
+                decompressed = executor.map(Lump.decompress_lump, compressed_lumps.values())
+                self.decompressed_lumps.update(zip(compressed_lumps.keys(), decompressed))
+        for lump_name in lump_names:
+            self.get_lump(lump_name)
+
     def parse_lump(self, lump_class: Type[Lump], lump_id, lump_name):
         if self.lumps_info[lump_id].size != 0:
             lump = self.lumps_info[lump_id]
@@ -131,3 +169,4 @@ class RespawnBSPFile(BSPFile):
             lump = LumpInfo(lump_id)
             lump.parse(reader, False)
             self.lumps_info.append(lump)
+        self._lump_classes_revision = -1
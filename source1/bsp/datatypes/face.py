@@ -1,9 +1,31 @@
+import numpy as np
+
 from .primitive import Primitive
 
 from ....utilities.byte_io_mdl import ByteIO
 
 
 class Face(Primitive):
+    dtype = np.dtype([
+        ('plane_index', np.uint16),
+        ('side', np.uint8),
+        ('on_node', np.uint8),
+        ('first_edge', np.int32),
+        ('edge_count', np.int16),
+        ('tex_info_id', np.int16),
+        ('disp_info_id', np.int16),
+        ('surface_fog_volume_id', np.int16),
+        ('styles', np.int8, (4,)),
+        ('light_offset', np.int32),
+        ('area', np.float32),
+        ('lightmap_texture_mins_in_luxels', np.int32, (2,)),
+        ('lightmap_texture_size_in_luxels', np.int32, (2,)),
+        ('orig_face', np.int32),
+        ('prim_count', np.uint16),
+        ('first_prim_id', np.uint16),
+        ('smoothing_groups', np.uint32),
+    ])
+
     def __init__(self, lump, bsp):
         super().__init__(lump, bsp)
         self.plane_index = 0
@@ -25,24 +47,13 @@ class Face(Primitive):
         self.smoothing_groups = 0
 
     def parse(self, reader: ByteIO):
-        # TODO: Replace with single reader.read_fmt call
-        self.plane_index = reader.read_uint16()
-        self.side = reader.read_uint8()
-        self.on_node = reader.read_uint8()
-        self.first_edge = reader.read_int32()
-        self.edge_count = reader.read_int16()
-        self.tex_info_id = reader.read_int16()
-        self.disp_info_id = reader.read_int16()
-        self.surface_fog_volume_id = reader.read_int16()
-        self.styles = [reader.read_int8() for _ in range(4)]
-        self.light_offset = reader.read_int32()
-        self.area = reader.read_float()
-        self.lightmap_texture_mins_in_luxels = [reader.read_int32() for _ in range(2)]
-        self.lightmap_texture_size_in_luxels = [reader.read_int32() for _ in range(2)]
-        self.orig_face = reader.read_int32()
-        self.prim_count = reader.read_uint16()
-        self.first_prim_id = reader.read_uint16()
-        self.smoothing_groups = reader.read_uint32()
+        return self.from_row(reader.read_array(self.dtype, 1)[0].item())
+
+    def from_row(self, row):
+        self.__dict__.update(zip(self.dtype.names, row))
+        self.styles = self.styles.tolist()
+        self.lightmap_texture_mins_in_luxels = self.lightmap_texture_mins_in_luxels.tolist()
+        self.lightmap_texture_size_in_luxels = self.lightmap_texture_size_in_luxels.tolist()
         return self
 
     @property
@@ -67,49 +78,47 @@ class Face(Primitive):
 
 
 class VFace1(Face):
-    def parse(self, reader: ByteIO):
-        # TODO: Replace with single reader.read_fmt call
-        self.plane_index = reader.read_uint32()
-        self.side = reader.read_uint8()
-        self.on_node = reader.read_uint8()
-        unk = reader.read_uint16()
-        self.first_edge = reader.read_int32()
-        self.edge_count = reader.read_int32()
-        self.tex_info_id = reader.read_int32()
-        self.disp_info_id = reader.read_int32()
-        self.surface_fog_volume_id = reader.read_int32()
-        self.styles = [reader.read_int8() for _ in range(4)]
-        self.light_offset = reader.read_int32()
-        self.area = reader.read_float()
-        self.lightmap_texture_mins_in_luxels = [reader.read_int32() for _ in range(2)]
-        self.lightmap_texture_size_in_luxels = [reader.read_int32() for _ in range(2)]
-        self.orig_face = reader.read_int32()
-        self.prim_count = reader.read_uint32()
-        self.first_prim_id = reader.read_uint32()
-        self.smoothing_groups = reader.read_uint32()
-        return self
+    dtype = np.dtype([
+        ('plane_index', np.uint32),
+        ('side', np.uint8),
+        ('on_node', np.uint8),
+        ('unk', np.uint16),
+        ('first_edge', np.int32),
+        ('edge_count', np.int32),
+        ('tex_info_id', np.int32),
+        ('disp_info_id', np.int32),
+        ('surface_fog_volume_id', np.int32),
+        ('styles', np.int8, (4,)),
+        ('light_offset', np.int32),
+        ('area', np.float32),
+        ('lightmap_texture_mins_in_luxels', np.int32, (2,)),
+        ('lightmap_texture_size_in_luxels', np.int32, (2,)),
+        ('orig_face', np.int32),
+        ('prim_count', np.uint32),
+        ('first_prim_id', np.uint32),
+        ('smoothing_groups', np.uint32),
+    ])
 
 
 class VFace2(VFace1):
-    def parse(self, reader: ByteIO):
-        # TODO: Replace with single reader.read_fmt call
-        self.plane_index = reader.read_uint32()
-        self.side = reader.read_uint8()
-        self.on_node = reader.read_uint8()
-        unk = reader.read_uint16()
-        self.first_edge = reader.read_int32()
-        self.edge_count = reader.read_int32()
-        self.tex_info_id = reader.read_int32()
-        self.disp_info_id = reader.read_int32()
-        self.surface_fog_volume_id = reader.read_int32()
-        self.styles = [reader.read_int8() for _ in range(4)]
-        unk2 = reader.read_int32()
-        self.light_offset = reader.read_int32()
-        self.area = reader.read_float()
-        self.lightmap_texture_mins_in_luxels = [reader.read_int32() for _ in range(2)]
-        self.lightmap_texture_size_in_luxels = [reader.read_int32() for _ in range(2)]
-        self.orig_face = reader.read_int32()
-        self.prim_count = reader.read_uint32()
-        self.first_prim_id = reader.read_uint32()
-        self.smoothing_groups = reader.read_uint32()
-        return self
+    dtype = np.dtype([
+        ('plane_index', np.uint32),
+        ('side', np.uint8),
+        ('on_node', np.uint8),
+        ('unk', np.uint16),
+        ('first_edge', np.int32),
+        ('edge_count', np.int32),
+        ('tex_info_id', np.int32),
+        ('disp_info_id', np.int32),
+        ('surface_fog_volume_id', np.int32),
+        ('styles', np.int8, (4,)),
+        ('unk2', np.int32),
+        ('light_offset', np.int32),
+        ('area', np.float32),
+        ('lightmap_texture_mins_in_luxels', np.int32, (2,)),
+        ('lightmap_texture_size_in_luxels', np.int32, (2,)),
+        ('orig_face', np.int32),
+        ('prim_count', np.uint32),
+        ('first_prim_id', np.uint32),
+        ('smoothing_groups', np.uint32),
+    ])
@@ -1,5 +1,7 @@
 from enum import IntFlag
-from typing import List
+from typing import List, Optional
+
+import numpy as np
 
 from .....bpy_utilities.logger import BPYLoggingManager
 from .....source_shared.app_id import SteamAppId
@@ -23,6 +25,102 @@ class StaticPropFlag(IntFlag):
     NO_PER_TEXEL_LIGHTING = 0x100
 
 
+_V4_FIELDS = [
+    ('origin', np.float32, (3,)),
+    ('rotation', np.float32, (3,)),
+    ('prop_type', np.uint16),
+    ('first_leaf', np.uint16),
+    ('leaf_count', np.uint16),
+    ('solid', np.uint8),
+    ('flags', np.uint8),
+    ('skin', np.int32),
+    ('fade_min_dist', np.float32),
+    ('fade_max_dist', np.float32),
+    ('lighting_origin', np.float32, (3,)),
+]
+_V5_FIELDS = _V4_FIELDS + [('forced_fade_scale', np.float32)]
+_V6_FIELDS = _V5_FIELDS + [('min_dx_level', np.uint16), ('max_dx_level', np.uint16)]
+_V7_L4D_FIELDS = _V6_FIELDS + [('diffuse_modulation', np.uint8, (4,))]
+_V8_FIELDS = _V5_FIELDS + [('min_cpu_level', np.uint8), ('max_cpu_level', np.uint8),
+                           ('min_gpu_level', np.uint8), ('max_gpu_level', np.uint8),
+                           ('diffuse_modulation', np.uint8, (4,))]
+_V9_FIELDS = _V8_FIELDS + [('disable_x360', np.uint32)]
+# Since v10 flags are stored as uint32 after dx levels, old byte is left unused
+_V10_FIELDS = ([('unused_flags', np.uint8) if field[0] == 'flags' else field for field in _V6_FIELDS] +
+               [('flags', np.uint32), ('lightmap_resolution', np.uint16, (2,))])
+_V10_CSGO_FIELDS = _V9_FIELDS + [('unk', np.uint32)]
+_V11_LITE_FIELDS = _V10_FIELDS + [('diffuse_modulation', np.uint8, (4,))]
+_V11_FIELDS = _V11_LITE_FIELDS + [('flags_ex', np.int32)]
+_V11_CSGO_FIELDS = _V10_CSGO_FIELDS + [('uniform_scale', np.float32)]
+_V12_FIELDS = [
+    ('origin', np.float32, (3,)),
+    ('rotation', np.float32, (3,)),
+    ('prop_type', np.int16),
+    ('unk', np.uint8, (6,)),
+    ('skin', np.int32),
+    ('unk2', np.uint8, (48,)),
+]
+_UNUSED_FIELDS = {'unused_flags', 'unk', 'unk2'}
+
+
+def get_static_prop_fields(version: int, size: int, app_id: int):
+    if app_id == SteamAppId.LEFT_4_DEAD and version == 7 and size == 68:
+        # Old Left 4 Dead maps use v7 and incompatible with newer v7 from Source 2013
+        return _V7_L4D_FIELDS
+
+    if app_id == SteamAppId.TEAM_FORTRESS_2 and version == 7 and size == 72:
+        # Old Team Fortress 2 maps use v7 which became v10 in Source 2013
+        return _V10_FIELDS
+
+    if app_id == SteamAppId.COUNTER_STRIKE_GO and version in (10, 11):
+        # Some Counter-Strike: GO use v10 which is not compatible with Source 2013, now use v11
+        return _V10_CSGO_FIELDS if version == 10 else _V11_CSGO_FIELDS
+
+    if app_id == SteamAppId.BLACK_MESA and version in (10, 11):
+        # Black Mesa uses different structures
+        if version == 10 and size == 72:
+            return _V10_FIELDS
+        elif version == 11:
+            if size == 76:
+                return _V11_LITE_FIELDS
+            elif size == 80:
+                return _V11_FIELDS
+
+    if version == 4:
+        return _V4_FIELDS
+    if version == 5:
+        return _V5_FIELDS
+    if version == 6:
+        return _V5_FIELDS if app_id == SteamAppId.VINDICTUS else _V6_FIELDS
+    if version == 7 and app_id == SteamAppId.VINDICTUS:
+        return _V6_FIELDS
+    if version == 8:
+        return _V8_FIELDS
+    if version == 9:
+        return _V9_FIELDS
+    if version == 10:
+        return _V10_FIELDS
+    if version == 11:
+        return _V11_FIELDS
+    if version == 12:
+        return _V12_FIELDS
+    return None
+
+
+def get_static_prop_dtype(version: int, size: int, app_id: int) -> Optional[np.dtype]:
+    """Structured dtype of one static prop record, padded to record size found in the lump."""
+    fields = get_static_prop_fields(version, size, app_id)
+    if fields is None:
+        return None
+    dtype = np.dtype(fields)
+    if size <= dtype.itemsize:
+        return dtype
+    return np.dtype({'names': dtype.names,
+                     'formats': [dtype.fields[name][0] for name in dtype.names],
+                     'offsets': [dtype.fields[name][1] for name in dtype.names],
+                     'itemsize': size})
+
+
 class StaticProp:
 
     def __init__(self):
@@ -60,172 +158,15 @@ class StaticProp:
         # Vindictus specific
         self.scaling = [1.0, 1.0, 1.0]
 
-    def parse(self, reader: ByteIO, version: int, size: int, app_id: int):
-        if app_id == SteamAppId.LEFT_4_DEAD and version == 7 and size == 68:
-            # Old Left 4 Dead maps use v7 and incompatible with newer v7 from Source 2013
-            self._parse_v7_l4d(reader)
-            return
-
-        if app_id == SteamAppId.TEAM_FORTRESS_2 and version == 7 and size == 72:
-            # Old Team Fortress 2 maps use v7 which became v10 in Source 2013
-            self._parse_v10(reader)
-            return
-
-        if app_id == SteamAppId.COUNTER_STRIKE_GO and version in (10, 11):
-            # Some Counter-Strike: GO use v10 which is not compatible with Source 2013, now use v11
-            if version == 10:
-                self._parse_v10_csgo(reader)
-            else:
-                self._parse_v11_csgo(reader)
-            return
-
-        if app_id == SteamAppId.BLACK_MESA and version in (10, 11):
-            # Black Mesa uses different structures
-            if version == 10 and size == 72:
-                self._parse_v10(reader)
-                return
-            elif version == 11:
-                if size == 76:
-                    self._parse_v11_lite(reader)
-                    return
-                elif size == 80:
-                    self._parse_v11(reader)
-                    return
-
-        if version == 4:
-            self._parse_v4(reader)
-            return
-
-        if version == 5:
-            self._parse_v5(reader)
-            return
-
-        if version == 6:
-            if app_id == SteamAppId.VINDICTUS:
-                self._parse_v6_vin(reader)
-                return
-            else:
-                self._parse_v6(reader)
-                return
-
-        if version == 7:
-            if app_id == SteamAppId.VINDICTUS:
-                self._parse_v7_vin(reader)
-                return
-
-            if app_id == SteamAppId.LEFT_4_DEAD and size == 68:
-                # Old Left 4 Dead maps use v7 and incompatible with newer v7 from Source 2013
-                self._parse_v7_l4d(reader)
-                return
-
-            if app_id == SteamAppId.TEAM_FORTRESS_2 and size == 72:
-                # Old Team Fortress 2 maps use v7 which became v10 in Source 2013
-                self._parse_v10(reader)
-                return
-
-        if version == 8:
-            self._parse_v8(reader)
-            return
-
-        if version == 9:
-            self._parse_v9(reader)
-            return
-
-        if version == 10:
-            if app_id == SteamAppId.COUNTER_STRIKE_GO:
-                self._parse_v10_csgo(reader)
-                return
-
-            self._parse_v10(reader)
-            return
-
-        if version == 11:
-            if app_id == SteamAppId.COUNTER_STRIKE_GO:
-                self._parse_v11_csgo(reader)
-                return
-
-            if app_id == SteamAppId.BLACK_MESA:
-                if size == 76:
-                    self._parse_v11_lite(reader)
-                    return
-                elif size == 80:
-                    self._parse_v11(reader)
-                    return
-
-            self._parse_v11(reader)
-            return
-
-        if version == 12:
-            self._parse_v12(reader)
-            return
-
-        logger.error(f'Cannot find handler for static prop of version {version} (size: {size}, app_id: {app_id})')
-        reader.skip(size)
-
-    def _parse_v4(self, reader: ByteIO):
-        self.origin = reader.read_fmt('3f')
-        self.rotation = reader.read_fmt('3f')
-        self.prop_type, self.first_leaf, self.leaf_count = reader.read_fmt('3H')
-        self.solid, self.flags = reader.read_fmt('2B')
-        self.skin = reader.read_int32()
-        self.fade_min_dist, self.fade_max_dist = reader.read_fmt('2f')
-        self.lighting_origin = reader.read_fmt('3f')
-
-    def _parse_v5(self, reader: ByteIO):
-        self._parse_v4(reader)
-        self.forced_fade_scale = reader.read_float()
-
-    def _parse_v6_vin(self, reader: ByteIO):
-        self._parse_v5(reader)
-
-    def _parse_v6(self, reader: ByteIO):
-        self._parse_v5(reader)
-        self.min_dx_level, self.max_dx_level = reader.read_fmt('2H')
-
-    def _parse_v7_l4d(self, reader: ByteIO):
-        self._parse_v6(reader)
-        self.diffuse_modulation = reader.read_fmt('4B')
-
-    def _parse_v7_vin(self, reader: ByteIO):
-        self._parse_v6(reader)
-
-    def _parse_v8(self, reader: ByteIO):
-        self._parse_v5(reader)
-        self.min_cpu_level, self.max_cpu_level, self.min_gpu_level, self.max_gpu_level = reader.read_fmt('4B')
-        self.diffuse_modulation = reader.read_fmt('4B')
-
-    def _parse_v9(self, reader: ByteIO):
-        self._parse_v8(reader)
-        self.disable_x360 = reader.read_fmt('I')
-
-    def _parse_v10(self, reader: ByteIO):
-        self._parse_v6(reader)
-        self.flags = StaticPropFlag(reader.read_uint32())
-        self.lightmap_resolution = reader.read_fmt('2H')
-
-    def _parse_v10_csgo(self, reader: ByteIO):
-        self._parse_v9(reader)
-        reader.skip(4)
-
-    def _parse_v11_lite(self, reader: ByteIO):
-        self._parse_v10(reader)
-        self.diffuse_modulation = reader.read_fmt('4B')
-
-    def _parse_v11(self, reader: ByteIO):
-        self._parse_v11_lite(reader)
-        self.flags_ex = reader.read_int32()
-
-    def _parse_v11_csgo(self, reader: ByteIO):
-        self._parse_v10_csgo(reader)
-        self.uniform_scale = reader.read_float()
-
-    def _parse_v12(self, reader: ByteIO):
-        self.origin = reader.read_fmt('3f')
-        self.rotation = reader.read_fmt('3f')
-        self.prop_type = reader.read_int16()
-        reader.skip(4 + 2)
-        self.skin = reader.read_int32()
-        reader.skip(12 * 4)
+    def from_row(self, row: np.void, scaling):
+        for name in row.dtype.names:
+            if name in _UNUSED_FIELDS:
+                continue
+            value = row[name]
+            setattr(self, name, value.tolist() if isinstance(value, np.ndarray) else value.item())
+        self.flags = StaticPropFlag(self.flags)
+        self.scaling = scaling.tolist()
+        return self
 
 
 class StaticPropLump:
@@ -234,14 +175,15 @@ class StaticPropLump:
         self._glump_info: GameLumpHeader = glump_info
         self.model_names: List[str] = []
         self.leafs: List[int] = []
-        self.static_props: List[StaticProp] = []
+        self.props: np.ndarray = np.zeros(0, np.dtype(_V4_FIELDS))
+        self.scales: np.ndarray = np.ones((0, 3), np.float32)
+        self._static_props: Optional[List[StaticProp]] = None
 
     def parse(self, reader: ByteIO):
         content_manager = ContentManager()
         for _ in range(reader.read_int32()):
             self.model_names.append(reader.read_ascii_string(128))
-        for _ in range(reader.read_int32()):
-            self.leafs.append(reader.read_uint16())
+        self.leafs = reader.read_array(np.uint16, reader.read_int32()).tolist()
         if self._glump_info.version == 12:
             unk1 = reader.read_int32()
             unk2 = reader.read_int32()
@@ -255,10 +197,48 @@ class StaticPropLump:
         if prop_count == 0:
             return
         prop_size = reader.remaining() // prop_count
-        for i in range(prop_count):
-            prop = StaticProp()
-            prop.parse(reader, self._glump_info.version, prop_size, content_manager.steam_id)
-            self.static_props.append(prop)
+        version = self._glump_info.version
+        dtype = get_static_prop_dtype(version, prop_size, content_manager.steam_id)
+        if dtype is None:
+            logger.error(f'Cannot find handler for static prop of version {version} '
+                         f'(size: {prop_size}, app_id: {content_manager.steam_id})')
+            return
+        if dtype.itemsize > prop_size:
+            logger.error(f'Static prop of version {version} is {dtype.itemsize} bytes, but lump has only {prop_size}')
+            return
+        self.props = reader.read_array(dtype, prop_count)
+        self.scales = np.ones((prop_count, 3), np.float32)
         if prop_scaling:
             for prop_id, scale in prop_scaling.items():
-                self.static_props[prop_id].scaling[:] = scale
+                self.scales[prop_id] = scale
+
+    def _get_column(self, name: str, default=0):
+        if name in self.props.dtype.names:
+            return self.props[name]
+        return np.full(self.props.shape[0], default, np.float32)
+
+    @property
+    def origins(self) -> np.ndarray:
+        return self.props['origin']
+
+    @property
+    def rotations(self) -> np.ndarray:
+        return self.props['rotation']
+
+    @property
+    def model_ids(self) -> np.ndarray:
+        return self.props['prop_type']
+
+    @property
+    def skins(self) -> np.ndarray:
+        return self.props['skin']
+
+    @property
+    def fade_distances(self) -> np.ndarray:
+        return np.stack([self._get_column('fade_min_dist'), self._get_column('fade_max_dist')], axis=1)
+
+    @property
+    def static_props(self) -> List[StaticProp]:
+        if self._static_props is None:
+            self._static_props = [StaticProp().from_row(row, scale) for row, scale in zip(self.props, self.scales)]
+        return self._static_props
@@ -0,0 +1,170 @@
+from typing import Dict, Hashable, Iterable, List, Optional
+
+import numpy as np
+
+from .bsp_file import BSPFile
+
+# Layers filled for displacements without multiblend data when merged with ones that have it
+VERTEX_COLOR_DEFAULTS = {
+    'multiblend': (0.0, 0.0, 0.0, 0.0),
+    'alphablend': (0.0, 0.0, 0.0, 0.0),
+    'multiblend_color0': (0.0, 0.0, 0.0, 1.0),
+    'multiblend_color1': (0.0, 0.0, 0.0, 1.0),
+    'multiblend_color2': (0.0, 0.0, 0.0, 1.0),
+    'multiblend_color3': (0.0, 0.0, 0.0, 1.0),
+}
+
+
+class DisplacementMesh:
+    """Plain numpy geometry of one or more displacements sharing same texture data."""
+
+    def __init__(self, name: str, tex_data_id: int, vertices: np.ndarray, indices: np.ndarray, uv: np.ndarray,
+                 vertex_colors: Dict[str, np.ndarray]):
+        self.name = name
+        self.tex_data_id = tex_data_id
+        self.vertices = vertices
+        self.indices = indices
+        self.uv = uv
+        self.vertex_colors = vertex_colors
+
+
+def _get_triangle_template(num_edge_vertices: int) -> np.ndarray:
+    rows, columns = np.meshgrid(np.arange(num_edge_vertices - 1), np.arange(num_edge_vertices - 1), indexing='ij')
+    index = (rows * num_edge_vertices + columns).ravel()
+    odd = (index & 1).astype(bool)[:, None]
+    next_row = index + num_edge_vertices
+    odd_triangles = np.stack([index, index + 1, next_row, index + 1, next_row + 1, next_row], axis=1)
+    even_triangles = np.stack([index, next_row + 1, next_row, index, index + 1, next_row + 1], axis=1)
+    return np.where(odd, odd_triangles, even_triangles).reshape((-1, 3)).astype(np.uint32)
+
+
+def _get_corner_vertices(bsp: BSPFile, map_faces: np.ndarray, scale: float) -> np.ndarray:
+    face_data = bsp.get_lump('LUMP_FACES').face_data[map_faces]
+    surf_edges = bsp.get_lump('LUMP_SURFEDGES').surf_edges
+    edges = bsp.get_lump('LUMP_EDGES').edges
+    vertices = bsp.get_lump('LUMP_VERTICES').vertices
+
+    used_surf_edges = surf_edges[face_data['first_edge'][:, None].astype(np.int64) + np.arange(4)]
+    reverse = (used_surf_edges <= 0).astype(np.uint8)
+    face_vertex_ids = edges[np.abs(used_surf_edges), reverse]
+    return vertices[face_vertex_ids] * scale
+
+
+def build_displacements(bsp: BSPFile, scale: float = 1.0) -> List[DisplacementMesh]:
+    disp_info_lump = bsp.get_lump('LUMP_DISPINFO')
+    if not disp_info_lump or not disp_info_lump.infos:
+        return []
+    disp_verts_lump = bsp.get_lump('LUMP_DISP_VERTS')
+    disp_multiblend = bsp.get_lump('LUMP_DISP_MULTIBLEND')
+    texture_infos = bsp.get_lump('LUMP_TEXINFO').texture_info
+    texture_datas = bsp.get_lump('LUMP_TEXDATA').texture_data
+    tex_info_ids = bsp.get_lump('LUMP_FACES').face_data['tex_info_id']
+
+    infos = disp_info_lump.infos
+    map_faces = np.array([info.map_face for info in infos], np.int64)
+    powers = np.array([info.power for info in infos], np.int64)
+    vert_starts = np.array([info.disp_vert_start for info in infos], np.int64)
+    start_positions = np.array([info.start_position for info in infos], np.float32).reshape((-1, 3))
+    has_multiblend = np.array([info.has_multiblend for info in infos], bool)
+
+    tex_info_ids = tex_info_ids[map_faces]
+    texture_vectors = np.array([texture_infos[tex_info_id].texture_vectors for tex_info_id in tex_info_ids.tolist()],
+                               np.float32).reshape((-1, 2, 4))
+    tex_data_ids = np.array([texture_infos[tex_info_id].texture_data_id for tex_info_id in tex_info_ids.tolist()],
+                            np.int64)
+    view_sizes = np.array([(texture_datas[tex_data_id].view_width, texture_datas[tex_data_id].view_height)
+                           for tex_data_id in tex_data_ids.tolist()], np.float32).reshape((-1, 2))
+
+    vertex_counts = ((1 << powers) + 1) ** 2
+    # Multiblend records are stored back to back only for displacements that have them
+    multiblend_offsets = np.cumsum(np.where(has_multiblend, vertex_counts, 0)) - vertex_counts * has_multiblend
+
+    # Start corner is the one matching start position, fall back to the lowest one
+    corners = _get_corner_vertices(bsp, map_faces, scale)
+    corner_matches = np.all(np.isclose(corners, start_positions[:, None, :] * scale, 0.5e-2), axis=2)
+    fallback_corners = np.argmin(np.sum(corners - start_positions[:, None, :], axis=2), axis=1)
+    min_indices = np.where(corner_matches.any(axis=1), np.argmax(corner_matches, axis=1), fallback_corners)
+    corner_order = (min_indices[:, None] + np.arange(4)) & 3
+    corners = np.take_along_axis(corners, corner_order[:, :, None], axis=1)
+
+    disp_positions = disp_verts_lump.transformed_vertices
+    disp_alpha = disp_verts_lump.vertices['alpha']
+
+    meshes: List[Optional[DisplacementMesh]] = [None] * len(infos)
+    for power in np.unique(powers).tolist():
+        group = np.nonzero(powers == power)[0]
+        num_edge_vertices = (1 << power) + 1
+        vertex_count = num_edge_vertices ** 2
+        steps = np.arange(num_edge_vertices, dtype=np.float32) / (num_edge_vertices - 1)
+
+        group_corners = corners[group][:, None]
+        left_ends = group_corners[..., 0, :] + (group_corners[..., 1, :] - group_corners[..., 0, :]) * steps[:, None]
+        right_ends = group_corners[..., 3, :] + (group_corners[..., 2, :] - group_corners[..., 3, :]) * steps[:, None]
+        grid = left_ends[:, :, None] + (right_ends - left_ends)[:, :, None] * steps[:, None]
+        grid = grid.reshape((group.shape[0], vertex_count, 3)).astype(np.float32)
+
+        vertex_ids = vert_starts[group][:, None] + np.arange(vertex_count)
+        positions = grid + disp_positions[vertex_ids] * scale
+
+        group_vectors = texture_vectors[group]
+        group_view_sizes = view_sizes[group] * scale
+        uv = np.empty((group.shape[0], vertex_count, 2), np.float32)
+        uv[:, :, 0] = ((np.einsum('nvi,ni->nv', grid, group_vectors[:, 0, :3]) +
+                        group_vectors[:, 0, 3:] * scale) / group_view_sizes[:, :1])
+        uv[:, :, 1] = 1 - ((np.einsum('nvi,ni->nv', grid, group_vectors[:, 1, :3]) +
+                            group_vectors[:, 1, 3:] * scale) / group_view_sizes[:, 1:])
+
+        alpha = np.ones((group.shape[0], vertex_count, 4), np.float32)
+        alpha[:, :, :3] = disp_alpha[vertex_ids]
+
+        triangles = _get_triangle_template(num_edge_vertices)
+        for n, disp_id in enumerate(group.tolist()):
+            vertex_colors = {'vertex_alpha': alpha[n]}
+            if disp_multiblend and has_multiblend[disp_id]:
+                multiblend_offset = multiblend_offsets[disp_id]
+                vertex_colors.update(_get_multiblend_colors(
+                    disp_multiblend.blends[multiblend_offset:multiblend_offset + vertex_count]))
+            meshes[disp_id] = DisplacementMesh(f'disp_{map_faces[disp_id]}', int(tex_data_ids[disp_id]),
+                                               positions[n], triangles, uv[n], vertex_colors)
+    return meshes
+
+
+def _get_multiblend_colors(multiblend_layers: np.ndarray) -> Dict[str, np.ndarray]:
+    vertex_colors = {}
+    multiblend = multiblend_layers['multiblend'].copy()
+    # Red and alpha channels are swapped
+    multiblend[:, [0, 3]] = multiblend[:, [3, 0]]
+    vertex_colors['multiblend'] = multiblend
+    vertex_colors['alphablend'] = multiblend_layers['alphablend']
+    multiblend_colors = multiblend_layers['multiblend_colors']
+    for layer_id in range(4):
+        color = np.ones((multiblend_layers.shape[0], 4), np.float32)
+        color[:, :3] = multiblend_colors[:, layer_id, :]
+        vertex_colors[f'multiblend_color{layer_id}'] = color
+    return vertex_colors
+
+
+def merge_displacements(meshes: Iterable[DisplacementMesh], name: str) -> DisplacementMesh:
+    meshes = list(meshes)
+    vertex_offsets = np.cumsum([0] + [mesh.vertices.shape[0] for mesh in meshes[:-1]])
+    layer_names = {layer_name for mesh in meshes for layer_name in mesh.vertex_colors}
+    vertex_colors = {}
+    for layer_name in sorted(layer_names):
+        default = VERTEX_COLOR_DEFAULTS.get(layer_name, (0.0, 0.0, 0.0, 1.0))
+        vertex_colors[layer_name] = np.concatenate(
+            [mesh.vertex_colors.get(layer_name, np.broadcast_to(np.array(default, np.float32),
+                                                                 (mesh.vertices.shape[0], 4)))
+             for mesh in meshes])
+    return DisplacementMesh(name, meshes[0].tex_data_id,
+                            np.concatenate([mesh.vertices for mesh in meshes]),
+                            np.concatenate([mesh.indices + offset for mesh, offset in zip(meshes, vertex_offsets)]),
+                            np.concatenate([mesh.uv for mesh in meshes]),
+                            vertex_colors)
+
+
+def merge_displacements_by(meshes: Iterable[DisplacementMesh], key) -> Dict[Hashable, DisplacementMesh]:
+    """Merge displacements into one mesh per key(mesh), usually per material."""
+    groups: Dict[Hashable, List[DisplacementMesh]] = {}
+    for mesh in meshes:
+        groups.setdefault(key(mesh), []).append(mesh)
+    return {group_key: merge_displacements(group, str(group_key)) for group_key, group in groups.items()}
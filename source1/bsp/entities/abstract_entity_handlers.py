@@ -22,38 +22,27 @@ from ....bpy_utilities.utils import get_material, get_or_create_collection
 from ....content_providers.content_manager import ContentManager
 from ....utilities.math_utilities import HAMMER_UNIT_TO_METERS
 
-from ...vtf import is_vtflib_supported
-
-if is_vtflib_supported():
-    from ...vtf.import_vtf import import_texture
-else:
-    from ...vtf import import_texture
+from ...vtf import import_texture
 
 strip_patch_coordinates = re.compile(r"_-?\d+_-?\d+_-?\d+.*$")
 log_manager = BPYLoggingManager()
 
 
-def gather_vertex_ids(model: Model, faces: List[Face], surf_edges: np.ndarray, edges: np.ndarray):
-    vertex_offset = 0
-    material_ids = []
-    vertex_count = 0
-    for map_face in faces[model.first_face:model.first_face + model.face_count]:
-        vertex_count += map_face.edge_count
-    vertex_ids = np.zeros(vertex_count, dtype=np.uint16)
-    for map_face in faces[model.first_face:model.first_face + model.face_count]:
-        if map_face.disp_info_id != -1:
-            continue
-        first_edge = map_face.first_edge
-        edge_count = map_face.edge_count
-        material_ids.append(map_face.tex_info_id)
-
-        used_surf_edges = surf_edges[first_edge:first_edge + edge_count]
-        reverse = np.subtract(1, (used_surf_edges > 0).astype(np.uint8))
-        used_edges = edges[np.abs(used_surf_edges)]
-        tmp = np.arange(len(used_edges))
-        face_vertex_ids = used_edges[tmp, reverse]
-        vertex_ids[vertex_offset:vertex_offset + edge_count] = face_vertex_ids
-        vertex_offset += edge_count
+def gather_vertex_ids(model: Model, faces: np.ndarray, surf_edges: np.ndarray, edges: np.ndarray):
+    model_faces = faces[model.first_face:model.first_face + model.face_count]
+    vertex_ids = np.zeros(model_faces['edge_count'].sum(), dtype=np.uint16)
+
+    brush_faces = model_faces[model_faces['disp_info_id'] == -1]
+    material_ids = brush_faces['tex_info_id'].tolist()
+    edge_counts = brush_faces['edge_count'].astype(np.int64)
+    brush_vertex_count = edge_counts.sum()
+    # Surf edge id of every face corner: face first_edge plus corner index inside the face
+    face_starts = np.cumsum(edge_counts) - edge_counts
+    corner_ids = np.arange(brush_vertex_count) - np.repeat(face_starts - brush_faces['first_edge'], edge_counts)
+
+    used_surf_edges = surf_edges[corner_ids]
+    reverse = np.subtract(1, (used_surf_edges > 0).astype(np.uint8))
+    vertex_ids[:brush_vertex_count] = edges[np.abs(used_surf_edges), reverse]
 
     return vertex_ids, material_ids
 
@@ -129,7 +118,7 @@ class AbstractEntityHandler:
         bsp_surf_edges: np.ndarray = self._bsp.get_lump('LUMP_SURFEDGES').surf_edges
         bsp_vertices: np.ndarray = self._bsp.get_lump('LUMP_VERTICES').vertices
         bsp_edges: np.ndarray = self._bsp.get_lump('LUMP_EDGES').edges
-        bsp_faces: List[Face] = self._bsp.get_lump('LUMP_FACES').faces
+        bsp_faces: np.ndarray = self._bsp.get_lump('LUMP_FACES').face_data
         bsp_textures_info: List[TextureInfo] = self._bsp.get_lump('LUMP_TEXINFO').texture_info
         bsp_textures_data: List[TextureData] = self._bsp.get_lump('LUMP_TEXDATA').texture_data
 
@@ -150,16 +139,18 @@ class AbstractEntityHandler:
         uvs_per_face = []
         # luvs_per_face = []
 
-        for map_face in bsp_faces[model.first_face:model.first_face + model.face_count]:
-            if map_face.disp_info_id != -1:
+        model_faces = bsp_faces[model.first_face:model.first_face + model.face_count]
+        for first_edge, edge_count, tex_info_id, disp_info_id in zip(model_faces['first_edge'].tolist(),
+                                                                      model_faces['edge_count'].tolist(),
+                                                                      model_faces['tex_info_id'].tolist(),
+                                                                      model_faces['disp_info_id'].tolist()):
+            if disp_info_id != -1:
                 continue
             uvs = {}
             # luvs = {}
             face = []
-            first_edge = map_face.first_edge
-            edge_count = map_face.edge_count
 
-            texture_info = bsp_textures_info[map_face.tex_info_id]
+            texture_info = bsp_textures_info[tex_info_id]
             texture_data = bsp_textures_data[texture_info.texture_data_id]
             tv1, tv2 = texture_info.texture_vectors
             # lv1, lv2 = texture_info.lightmap_vectors
@@ -8,6 +8,8 @@ from mathutils import Vector, Quaternion, Matrix
 import numpy as np
 
 from .bsp_file import open_bsp
+from .displacement_builder import DisplacementMesh, build_displacements, merge_displacements_by
+from .spatial_index import TriangleBVH, get_brush_entity_origins
 from .datatypes.gamelumps.static_prop_lump import StaticPropLump
 
 from .entities.base_entity_handler import BaseEntityHandler
@@ -21,7 +23,6 @@ from .entities.tf2_entity_handler import TF2EntityHandler
 from .entities.titanfall_entity_handler import TitanfallEntityHandler
 from .entities.vindictus_entity_handler import VindictusEntityHandler
 
-from .lumps.displacement_lump import DispVert, DispInfoLump, DispMultiblend
 from .lumps.edge_lump import EdgeLump
 from .lumps.entity_lump import EntityLump
 from .lumps.overlay_lump import OverlayLump
@@ -43,7 +44,7 @@ from ...content_providers.content_manager import ContentManager
 from ...source_shared.app_id import SteamAppId
 from ...source_shared.model_container import Source1ModelContainer
 from ...utilities.keyvalues import KVParser
-from ...utilities.math_utilities import convert_rotation_source1_to_blender
+from ...utilities.math_utilities import convert_rotation_source1_to_blender, convert_rotations_source1_to_blender
 
 strip_patch_coordinates = re.compile(r"_-?\d+_-?\d+_-?\d+.*$")
 log_manager = BPYLoggingManager()
@@ -91,6 +92,7 @@ class BSP:
         self.face_lump: Optional[FaceLump] = self.map_file.get_lump('LUMP_FACES')
         self.texture_info_lump: Optional[TextureInfoLump] = self.map_file.get_lump('LUMP_TEXINFO')
         self.texture_data_lump: Optional[TextureDataLump] = self.map_file.get_lump('LUMP_TEXDATA')
+        self._surface_index: Optional[TriangleBVH] = None
 
         content_manager = ContentManager()
 
@@ -118,8 +120,10 @@ class BSP:
         else:
             self.entity_handler = BaseEntityHandler(self.map_file, self.main_collection, self.scale)
 
-        self.logger.debug('Adding map pack file to content manager')
-        content_manager.content_providers[Path(self.filepath).stem] = self.map_file.get_lump('LUMP_PAK')
+        pak_lump: Optional[PakLump] = self.map_file.get_lump('LUMP_PAK')
+        if pak_lump:
+            self.logger.debug('Adding map pack file to content manager')
+            content_manager.content_providers[Path(self.filepath).stem] = pak_lump
 
     def get_string(self, string_id):
         strings_lump: Optional[StringsLump] = self.map_file.get_lump('LUMP_TEXDATA_STRING_TABLE')
@@ -151,22 +155,29 @@ class BSP:
             static_prop_lump: StaticPropLump = gamelump.game_lumps.get('sprp', None)
             if static_prop_lump:
                 parent_collection = get_or_create_collection('static_props', self.main_collection)
-                for n, prop in enumerate(static_prop_lump.static_props):
-                    model_name = static_prop_lump.model_names[prop.prop_type]
-                    location = np.multiply(prop.origin, self.scale)
-                    rotation = convert_rotation_source1_to_blender(prop.rotation)
-                    self.create_empty(f'static_prop_{n}', location, rotation, prop.scaling, parent_collection,
+                model_names = static_prop_lump.model_names
+                origins = static_prop_lump.origins.astype(np.float64)
+                rotations = static_prop_lump.rotations.astype(np.float64)
+                scales = static_prop_lump.scales.astype(np.float64)
+                skins = static_prop_lump.skins
+                locations = (origins * self.scale).tolist()
+                blender_rotations = convert_rotations_source1_to_blender(rotations).tolist()
+                skins = np.where(skins != 0, skins - 1, 0).tolist()
+                for n, (model_id, origin, rotation, scale, location, blender_rotation, skin) in enumerate(
+                        zip(static_prop_lump.model_ids.tolist(), origins.tolist(), rotations.tolist(), scales.tolist(),
+                            locations, blender_rotations, skins)):
+                    self.create_empty(f'static_prop_{n}', location, blender_rotation, scale, parent_collection,
                                       custom_data={'parent_path': str(self.filepath.parent),
-                                                   'prop_path': model_name,
+                                                   'prop_path': model_names[model_id],
                                                    'scale': self.scale,
                                                    'type': 'static_props',
-                                                   'skin': str(prop.skin - 1 if prop.skin != 0 else 0),
+                                                   'skin': str(skin),
                                                    'entity': {
                                                        'type': 'static_prop',
-                                                       'origin': '{} {} {}'.format(*prop.origin),
-                                                       'angles': '{} {} {}'.format(*prop.rotation),
-                                                       'scale': '{} {} {}'.format(*prop.scaling),
-                                                       'skin': str(prop.skin - 1 if prop.skin != 0 else 0),
+                                                       'origin': '{} {} {}'.format(*origin),
+                                                       'angles': '{} {} {}'.format(*rotation),
+                                                       'scale': '{} {} {}'.format(*scale),
+                                                       'skin': str(skin),
                                                    }
                                                    })
 
@@ -196,153 +207,43 @@ class BSP:
             else:
                 self.logger.error(f'Failed to find {material_name} material')
 
-    def load_disp(self):
-        disp_info_lump: Optional[DispInfoLump] = self.map_file.get_lump('LUMP_DISPINFO')
-        if not disp_info_lump or not disp_info_lump.infos:
+    def load_disp(self, merge_by_material=False):
+        displacements = build_displacements(self.map_file, self.scale)
+        if not displacements:
             return
+        texture_datas = self.texture_data_lump.texture_data
 
-        disp_multiblend: Optional[DispMultiblend] = self.map_file.get_lump('LUMP_DISP_MULTIBLEND')
-
-        disp_verts_lump: Optional[DispVert] = self.map_file.get_lump('LUMP_DISP_VERTS')
-        surf_edges = self.surf_edge_lump.surf_edges
-        vertices = self.vertex_lump.vertices
-        edges = self.edge_lump.edges
+        def get_material_name(displacement: DisplacementMesh):
+            material_name = self.get_string(texture_datas[displacement.tex_data_id].name_id)
+            return strip_patch_coordinates.sub("", material_name)[-63:]
 
-        disp_verts = disp_verts_lump.transformed_vertices
+        if merge_by_material:
+            displacements = list(merge_displacements_by(displacements, get_material_name).values())
 
         parent_collection = get_or_create_collection('displacements', self.main_collection)
-        info_count = len(disp_info_lump.infos)
-        multiblend_offset = 0
-        for n, disp_info in enumerate(disp_info_lump.infos):
-            self.logger.info(f'Processing {n + 1}/{info_count} displacement face')
-            final_vertex_colors = {}
-            src_face = disp_info.source_face
-
-            texture_info = src_face.tex_info
-            texture_data = texture_info.tex_data
-            tv1, tv2 = texture_info.texture_vectors
-
-            first_edge = src_face.first_edge
-            edge_count = src_face.edge_count
-
-            used_surf_edges = surf_edges[first_edge:first_edge + edge_count]
-            reverse = np.subtract(1, (used_surf_edges > 0).astype(np.uint8))
-            used_edges = edges[np.abs(used_surf_edges)]
-            tmp = np.arange(used_edges.shape[0])
-            face_vertex_ids = used_edges[tmp, reverse]
-            face_vertices = vertices[face_vertex_ids] * self.scale
-
-            min_index = np.where(
-                np.sum(
-                    np.isclose(face_vertices,
-                               disp_info.start_position * self.scale,
-                               0.5e-2),
-                    axis=1
-                ) == 3)
-            if min_index[0].shape[0] == 0:
-                lowest = 999.e16
-                for i, value in enumerate(np.sum(face_vertices - disp_info.start_position, axis=1)):
-                    if value < lowest:
-                        min_index = i
-                        lowest = value
-            else:
-                min_index = min_index[0][0]
-
-            left_edge = face_vertices[(1 + min_index) & 3] - face_vertices[min_index & 3]
-            right_edge = face_vertices[(2 + min_index) & 3] - face_vertices[(3 + min_index) & 3]
-
-            num_edge_vertices = (1 << disp_info.power) + 1
-            subdivide_scale = 1.0 / (num_edge_vertices - 1)
-            left_edge_step = left_edge * subdivide_scale
-            right_edge_step = right_edge * subdivide_scale
-
-            subdiv_vert_count = num_edge_vertices ** 2
-
-            disp_vertices = np.zeros((subdiv_vert_count, 3), dtype=np.float32)
-            disp_uv = np.zeros((subdiv_vert_count, 2), dtype=np.float32)
-            disp_indices = np.arange(0, subdiv_vert_count, dtype=np.uint32) + disp_info.disp_vert_start
-            for i in range(num_edge_vertices):
-                left_end = left_edge_step * i
-                left_end += face_vertices[min_index & 3]
-
-                right_end = right_edge_step * i
-                right_end += face_vertices[(3 + min_index) & 3]
-
-                left_right_seg = right_end - left_end
-                left_right_step = left_right_seg * subdivide_scale
-
-                for j in range(num_edge_vertices):
-                    disp_vertices[(i * num_edge_vertices + j)] = left_end + (left_right_step * j)
-            disp_uv[:, 0] = (np.dot(disp_vertices, tv1[:3]) + tv1[3] * self.scale) / (
-                    texture_data.view_width * self.scale)
-            disp_uv[:, 1] = 1 - ((np.dot(disp_vertices, tv2[:3]) + tv2[3] * self.scale) / (
-                    texture_data.view_height * self.scale))
-
-            disp_vertices_alpha = disp_verts_lump.vertices['alpha'][disp_indices]
-            final_vertex_colors['vertex_alpha'] = np.concatenate(
-                (np.hstack([disp_vertices_alpha, disp_vertices_alpha, disp_vertices_alpha]),
-                 np.ones((disp_vertices_alpha.shape[0], 1))), axis=1)
-
-            if disp_multiblend and disp_info.has_multiblend:
-                multiblend_layers = disp_multiblend.blends[multiblend_offset:multiblend_offset + subdiv_vert_count]
-                final_vertex_colors['multiblend'] = multiblend_layers['multiblend'].copy()
-                red = final_vertex_colors['multiblend'][:, 0].copy()
-                alpha = final_vertex_colors['multiblend'][:, 3].copy()
-
-                final_vertex_colors['multiblend'][:, 3] = red
-                final_vertex_colors['multiblend'][:, 0] = alpha
-
-                final_vertex_colors['alphablend'] = multiblend_layers['alphablend']
-                miltiblend_color_layer = multiblend_layers['multiblend_colors']
-                shape_ = multiblend_layers.shape[0]
-                final_vertex_colors['multiblend_color0'] = np.concatenate((miltiblend_color_layer[:, 0, :],
-                                                                           np.ones((shape_, 1))),
-                                                                          axis=1)
-                final_vertex_colors['multiblend_color1'] = np.concatenate((miltiblend_color_layer[:, 1, :],
-                                                                           np.ones((shape_, 1))),
-                                                                          axis=1)
-                final_vertex_colors['multiblend_color2'] = np.concatenate((miltiblend_color_layer[:, 2, :],
-                                                                           np.ones((shape_, 1))),
-                                                                          axis=1)
-                final_vertex_colors['multiblend_color3'] = np.concatenate((miltiblend_color_layer[:, 3, :],
-                                                                           np.ones((shape_, 1))),
-                                                                          axis=1)
-                multiblend_offset += subdiv_vert_count
-
-            face_indices = []
-            for i in range(num_edge_vertices - 1):
-                for j in range(num_edge_vertices - 1):
-                    index = i * num_edge_vertices + j
-                    if index & 1:
-                        face_indices.append((index, index + 1, index + num_edge_vertices))
-                        face_indices.append((index + 1, index + num_edge_vertices + 1, index + num_edge_vertices))
-                    else:
-                        face_indices.append((index, index + num_edge_vertices + 1, index + num_edge_vertices))
-                        face_indices.append((index, index + 1, index + num_edge_vertices + 1,))
-
-            mesh_obj = bpy.data.objects.new(f"{self.filepath.stem}_disp_{disp_info.map_face}",
-                                            bpy.data.meshes.new(
-                                                f"{self.filepath.stem}_disp_{disp_info.map_face}_MESH"))
+        info_count = len(displacements)
+        for n, displacement in enumerate(displacements):
+            self.logger.info(f'Processing {n + 1}/{info_count} displacement mesh')
+            mesh_obj = bpy.data.objects.new(f"{self.filepath.stem}_{displacement.name}",
+                                            bpy.data.meshes.new(f"{self.filepath.stem}_{displacement.name}_MESH"))
             mesh_data = mesh_obj.data
             if parent_collection is not None:
                 parent_collection.objects.link(mesh_obj)
             else:
                 self.main_collection.objects.link(mesh_obj)
-            mesh_data.from_pydata(disp_vertices + disp_verts[disp_indices] * self.scale, [], face_indices)
+            mesh_data.from_pydata(displacement.vertices, [], displacement.indices.tolist())
 
             uv_data = mesh_data.uv_layers.new().data
             vertex_indices = np.zeros((len(mesh_data.loops, )), dtype=np.uint32)
             mesh_data.loops.foreach_get('vertex_index', vertex_indices)
-            uv_data.foreach_set('uv', disp_uv[vertex_indices].flatten())
+            uv_data.foreach_set('uv', displacement.uv[vertex_indices].flatten())
 
-            for name, vertex_color_layer in final_vertex_colors.items():
+            for name, vertex_color_layer in displacement.vertex_colors.items():
                 vertex_colors = mesh_data.vertex_colors.get(name, False) or mesh_data.vertex_colors.new(name=name)
                 vertex_colors_data = vertex_colors.data
                 vertex_colors_data.foreach_set('color', vertex_color_layer[vertex_indices].flatten())
 
-            material_name = self.get_string(texture_data.name_id)
-            material_name = strip_patch_coordinates.sub("", material_name)[-63:]
-            get_material(material_name, mesh_obj)
+            get_material(get_material_name(displacement), mesh_obj)
 
     def load_overlays(self):
         info_overlay_lump: Optional[OverlayLump] = self.map_file.get_lump('LUMP_OVERLAYS')
@@ -352,6 +253,12 @@ class BSP:
             parent_collection = get_or_create_collection('info_overlays', self.main_collection)
             overlays = info_overlay_lump.overlays
             ov_count = len(overlays)
+            overlay_origins = np.array([overlay.origin for overlay in overlays], np.float64).reshape((-1, 3))
+            overlay_origins *= self.scale
+            _, _, closest_points, surface_normals = self.get_surface_index().find_nearest(overlay_origins)
+            # Overlay faces the side of the surface its origin is at
+            back_facing = np.sum((overlay_origins - closest_points) * surface_normals, axis=1) < 0
+            surface_normals[back_facing] *= -1
             for n, overlay in enumerate(overlays):
                 print(f'Loading overlays {n + 1}/{ov_count}')
                 # placement_faces = [faces_lump.faces[face_id] for face_id in overlay.ofaces[:overlay.face_count]]
@@ -398,6 +305,8 @@ class BSP:
                 get_material(material_name, mesh_obj)
 
                 this_norm = list(overlay.basis_normal)
+                if not any(this_norm):
+                    this_norm = surface_normals[n].tolist()
 
                 this_rot = Vector(this_norm).to_track_quat('-Y', 'Z')
                 mesh_obj.rotation_mode = 'QUATERNION'
@@ -418,68 +327,49 @@ class BSP:
                     applymx = Matrix.Translation(mesh_obj.location) @ Quaternion().to_matrix().to_4x4() @ scale_mx
                     mesh_obj.matrix_world = applymx
 
-                self._rotate_infodecals()
+            self._rotate_infodecals()
+
+    def get_surface_index(self) -> TriangleBVH:
+        if self._surface_index is None:
+            # Decals and overlays can be placed on world geometry and brush entities
+            model_origins = get_brush_entity_origins(self.map_file)
+            self._surface_index = TriangleBVH.from_bsp(self.map_file, (0, *model_origins), self.scale, model_origins)
+        return self._surface_index
 
     def _rotate_infodecals(self):
         provider = ContentManager().get_content_provider_from_path(self.filepath)
-        if 'infodecal' in bpy.data.collections:
-            for obj in bpy.data.collections['infodecal'].all_objects:
-                world_obj = bpy.data.objects['world_geometry']
-                func_distnace = float("inf")
-                func_name = ''
-                for func in bpy.data.objects:
-                    if func.type == 'MESH' and func != world_obj and func != obj and func.data.polygons:
-                        calc_distance = Vector(obj.location - func.location).length
-                        if calc_distance <= func_distnace:
-                            func_distnace = calc_distance
-                            func_name = func.name
-
-                directions = [[1, 0, 0], [0, 1, 0], [0, 0, 1], [-1, 0, 0], [0, -1, 0], [0, 0, -1]]
-                rays_hits = []
-                if func_name in bpy.data.objects:
-                    func_obj = bpy.data.objects[func_name]
-                    for dir_f in directions:
-                        try:
-                            rayF = func.ray_cast(obj.location, (dir_f[0], dir_f[1], dir_f[2]))
-                            if rayF[0]:
-                                element = [rayF[0], rayF[1], rayF[2], rayF[3]]
-                                rays_hits.append(element)
-                        except:
-                            pass
-
-                for dir_w in directions:
-                    rayW = world_obj.ray_cast(obj.location, (dir_w[0], dir_w[1], dir_w[2]))
-                    if rayW[0]:
-                        element = [rayW[0], rayW[1], rayW[2], rayW[3]]
-                        rays_hits.append(element)
-
-                length_list = {}
-                for ray in rays_hits:
-                    length = Vector(obj.location - ray[1]).length
-                    length_list.update({length: ray[2]})
-
-                find_min_len = min(length_list.items(), key=lambda x: x[0])
-                that_normal = find_min_len[1]
-
-                for pos in range(0, 2):
-                    for i in range(0, 3):
-                        obj.location[i] = obj.location[i] + (0.1 * self.scale * pos * that_normal[i])
-
-                that_normal = Vector(that_normal).to_track_quat('-Y', 'Z')
-                obj.rotation_mode = 'QUATERNION'
-                obj.rotation_quaternion = that_normal
-
-                if provider.steam_id in [1840, 440]:
-                    mesh_mx = obj.rotation_quaternion.to_matrix().to_4x4()
-                    obj.data.transform(mesh_mx)
-
-                    scale_obj = list(obj.scale)
-                    scale_mx = Matrix()
-                    for i in range(3):
-                        scale_mx[i][i] = scale_obj[i]
-
-                    applymx = Matrix.Translation(obj.location) @ Quaternion().to_matrix().to_4x4() @ scale_mx
-                    obj.matrix_world = applymx
+        if 'infodecal' not in bpy.data.collections:
+            return
+        decals = list(bpy.data.collections['infodecal'].all_objects)
+        if not decals:
+            return
+        locations = np.array([obj.location for obj in decals], np.float64).reshape((-1, 3))
+        _, triangle_ids, closest_points, normals = self.get_surface_index().find_nearest(locations)
+        # Decal faces the side of the surface it was placed at
+        back_facing = np.sum((locations - closest_points) * normals, axis=1) < 0
+        normals[back_facing] *= -1
+
+        for obj, triangle_id, that_normal in zip(decals, triangle_ids.tolist(), normals.tolist()):
+            if triangle_id == -1:
+                continue
+            for i in range(0, 3):
+                obj.location[i] = obj.location[i] + (0.1 * self.scale * that_normal[i])
+
+            that_normal = Vector(that_normal).to_track_quat('-Y', 'Z')
+            obj.rotation_mode = 'QUATERNION'
+            obj.rotation_quaternion = that_normal
+
+            if provider.steam_id in [1840, 440]:
+                mesh_mx = obj.rotation_quaternion.to_matrix().to_4x4()
+                obj.data.transform(mesh_mx)
+
+                scale_obj = list(obj.scale)
+                scale_mx = Matrix()
+                for i in range(3):
+                    scale_mx[i][i] = scale_obj[i]
+
+                applymx = Matrix.Translation(obj.location) @ Quaternion().to_matrix().to_4x4() @ scale_mx
+                obj.matrix_world = applymx
 
     def load_detail_props(self):
         content_manager = ContentManager()
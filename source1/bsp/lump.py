@@ -1,5 +1,6 @@
 import lzma
-from typing import List
+from collections import defaultdict
+from typing import List, Dict, Tuple, Type
 
 from ...content_providers.content_manager import ContentManager
 from ...utilities.byte_io_mdl import ByteIO
@@ -15,11 +16,27 @@ class LumpTag:
         self.steam_id = steam_id
 
 
+class LumpRegistry:
+    """All tagged lump classes, filled by lump_tag when lump modules are imported."""
+    by_name: Dict[str, List[Tuple[Type['Lump'], LumpTag]]] = defaultdict(list)
+    by_id: Dict[int, List[Tuple[Type['Lump'], LumpTag]]] = defaultdict(list)
+    # Bumped on every registration, so per-file tables know when they are outdated
+    revision = 0
+
+    @classmethod
+    def register(cls, klass: Type['Lump'], tag: LumpTag):
+        cls.by_name[tag.lump_name].append((klass, tag))
+        cls.by_id[tag.lump_id].append((klass, tag))
+        cls.revision += 1
+
+
 def lump_tag(lump_id, lump_name, lump_version=None, bsp_version=None, steam_id=None):
     def loader(klass) -> object:
         if not klass.tags:
             klass.tags = []
-        klass.tags.append(LumpTag(lump_id, lump_name, lump_version, bsp_version, steam_id))
+        tag = LumpTag(lump_id, lump_name, lump_version, bsp_version, steam_id)
+        klass.tags.append(tag)
+        LumpRegistry.register(klass, tag)
         return klass
 
     return loader
@@ -75,11 +92,14 @@ class Lump:
                 return
 
         reader = self._bsp.reader
-        reader.seek(self._lump.offset)
 
         if not self._lump.compressed:
-            self.reader = ByteIO(reader.read(self._lump.size))
+            self.reader = reader.subview(self._lump.offset, self._lump.size)
+        elif lump_id in self._bsp.decompressed_lumps:
+            # Already unpacked by BSPFile.preload_lumps
+            self.reader = self._bsp.decompressed_lumps.pop(lump_id)
         else:
+            reader.seek(self._lump.offset)
             self.reader = Lump.decompress_lump(reader)
 
     def parse(self):
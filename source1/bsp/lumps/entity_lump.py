@@ -1,8 +1,34 @@
+import re
+from collections import OrderedDict
 from io import StringIO
 from pathlib import Path
+from typing import List
 
 from .. import Lump, lump_tag
-from ....utilities.keyvalues import KVParser
+
+_entity_block = re.compile(r'{((?:[^{}"]|"[^"]*")*)}')
+_entity_pair = re.compile(r'"([^"]*)"\s*(?:"([^"]*)"|([^\s"{}]+))')
+
+
+def parse_entities(data: str) -> List[OrderedDict]:
+    """Fast parser for entity lump text, produces same entities as KVParser for { "key" "value" } blocks.
+
+    Unquoted values ("key" 1) are read as single tokens.
+    """
+    entities = []
+    for block in _entity_block.findall(data):
+        pairs = [(key.lower(), value or bare_value) for key, value, bare_value in _entity_pair.findall(block)]
+        entity = OrderedDict(pairs)
+        if len(entity) != len(pairs):
+            # Duplicate keys are collected into lists, like KVParser does
+            entity = OrderedDict()
+            for key, value in pairs:
+                entity.setdefault(key, []).append(value)
+            for key, values in entity.items():
+                if len(values) == 1:
+                    entity[key] = values[0]
+        entities.append(entity)
+    return entities
 
 
 @lump_tag(0, 'LUMP_ENTITIES')
@@ -12,11 +38,7 @@ class EntityLump(Lump):
         self.entities = []
 
     def parse(self):
-        parser = KVParser('EntityLump', self.reader.read(-1).decode('latin'))
-        entity = parser.parse_value()
-        while entity is not None:
-            self.entities.append(entity)
-            entity = parser.parse_value()
+        self.entities = parse_entities(self.reader.read(-1).decode('latin'))
         return self
 
 
@@ -35,10 +57,6 @@ class EntityPartitionsLump(Lump):
                 with ent_path.open('r') as f:
                     magic = f.read(11).strip()
                     assert magic == 'ENTITIES01', 'Invalid ent file'
-                    parser = KVParser('EntityLump', f.read(-1))
-                    entity = parser.parse_value()
-                    while entity is not None:
-                        self.entities.append(entity)
-                        entity = parser.parse_value()
+                    self.entities.extend(parse_entities(f.read(-1)))
 
         return self
@@ -1,20 +1,41 @@
-from typing import List
+from collections.abc import Sequence
+from typing import List, Type, Union
+
+import numpy as np
 
 from ....source_shared.app_id import SteamAppId
 from .. import Lump, lump_tag
 from ..datatypes.face import Face, VFace1, VFace2
 
 
+class FaceList(Sequence):
+    """Sequence of Face objects built on demand from structured face array."""
+
+    def __init__(self, lump: Lump, face_class: Type[Face], face_data: np.ndarray):
+        self._lump = lump
+        self._face_class = face_class
+        self.face_data = face_data
+
+    def __len__(self):
+        return self.face_data.shape[0]
+
+    def __getitem__(self, index) -> Union[Face, List[Face]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        # noinspection PyProtectedMember
+        return self._face_class(self._lump, self._lump._bsp).from_row(self.face_data[index].item())
+
+
 @lump_tag(7, 'LUMP_FACES')
 class FaceLump(Lump):
     def __init__(self, bsp, lump_id):
         super().__init__(bsp, lump_id)
-        self.faces: List[Face] = []
+        self.face_data = np.array([], Face.dtype)
+        self.faces: Union[FaceList, List[Face]] = []
 
     def parse(self):
-        reader = self.reader
-        while reader:
-            self.faces.append(Face(self, self._bsp).parse(reader))
+        self.face_data = self.reader.read_array(Face.dtype)
+        self.faces = FaceList(self, Face, self.face_data)
         return self
 
 
@@ -22,12 +43,12 @@ class FaceLump(Lump):
 class OriginalFaceLump(Lump):
     def __init__(self, bsp, lump_id):
         super().__init__(bsp, lump_id)
-        self.faces: List[Face] = []
+        self.face_data = np.array([], Face.dtype)
+        self.faces: Union[FaceList, List[Face]] = []
 
     def parse(self):
-        reader = self.reader
-        while reader:
-            self.faces.append(Face(self, self._bsp).parse(reader))
+        self.face_data = self.reader.read_array(Face.dtype)
+        self.faces = FaceList(self, Face, self.face_data)
         return self
 
 
@@ -35,12 +56,12 @@ class OriginalFaceLump(Lump):
 class VFaceLump1(Lump):
     def __init__(self, bsp, lump_id):
         super().__init__(bsp, lump_id)
-        self.faces: List[Face] = []
+        self.face_data = np.array([], Face.dtype)
+        self.faces: Union[FaceList, List[Face]] = []
 
     def parse(self):
-        reader = self.reader
-        while reader:
-            self.faces.append(VFace1(self, self._bsp).parse(reader))
+        self.face_data = self.reader.read_array(VFace1.dtype)
+        self.faces = FaceList(self, VFace1, self.face_data)
         return self
 
 
@@ -48,12 +69,12 @@ class VFaceLump1(Lump):
 class VFaceLump2(Lump):
     def __init__(self, bsp, lump_id):
         super().__init__(bsp, lump_id)
-        self.faces: List[Face] = []
+        self.face_data = np.array([], Face.dtype)
+        self.faces: Union[FaceList, List[Face]] = []
 
     def parse(self):
-        reader = self.reader
-        while reader:
-            self.faces.append(VFace2(self, self._bsp).parse(reader))
+        self.face_data = self.reader.read_array(VFace2.dtype)
+        self.faces = FaceList(self, VFace2, self.face_data)
         return self
 
 
@@ -61,12 +82,12 @@ class VFaceLump2(Lump):
 class VOriginalFaceLump(Lump):
     def __init__(self, bsp, lump_id):
         super().__init__(bsp, lump_id)
-        self.faces: List[Face] = []
+        self.face_data = np.array([], Face.dtype)
+        self.faces: Union[FaceList, List[Face]] = []
 
     def parse(self):
-        reader = self.reader
-        while reader:
-            self.faces.append(VFace1(self, self._bsp).parse(reader))
+        self.face_data = self.reader.read_array(VFace1.dtype)
+        self.faces = FaceList(self, VFace1, self.face_data)
         return self
 
 
@@ -74,10 +95,10 @@ class VOriginalFaceLump(Lump):
 class VOriginalFaceLump(Lump):
     def __init__(self, bsp, lump_id):
         super().__init__(bsp, lump_id)
-        self.faces: List[Face] = []
+        self.face_data = np.array([], Face.dtype)
+        self.faces: Union[FaceList, List[Face]] = []
 
     def parse(self):
-        reader = self.reader
-        while reader:
-            self.faces.append(VFace2(self, self._bsp).parse(reader))
+        self.face_data = self.reader.read_array(VFace2.dtype)
+        self.faces = FaceList(self, VFace2, self.face_data)
         return self
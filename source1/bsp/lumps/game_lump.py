@@ -39,7 +39,7 @@ class GameLump(Lump):
                     buffer = reader.read(compressed_size)
                     game_lump_reader = Lump.decompress_lump(ByteIO(buffer))
                 else:
-                    game_lump_reader = ByteIO(reader.read(lump.size))
+                    game_lump_reader = reader.subview(relative_offset, lump.size)
 
                 pass  # TODO
             if lump.id == 'sprp':
@@ -85,7 +85,7 @@ class VGameLump(Lump):
                     buffer = reader.read(compressed_size)
                     game_lump_reader = Lump.decompress_lump(ByteIO(buffer))
                 else:
-                    game_lump_reader = ByteIO(reader.read(lump.size))
+                    game_lump_reader = reader.subview(relative_offset, lump.size)
 
                 pass  # TODO
             if lump.id == 'sprp':
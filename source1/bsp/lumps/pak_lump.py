@@ -46,6 +46,15 @@ class PakLump(Lump, ContentProviderBase):
             return self.cache_file(new_filepath, BytesIO(self.zip_file.open(new_filepath, 'r').read()))
         return None
 
+    def index_files(self):
+        return self._filename_cache.items()
+
+    def open_indexed_file(self, locator: str):
+        cached_file = self.get_from_cache(locator)
+        if cached_file:
+            return cached_file
+        return self.cache_file(locator, BytesIO(self.zip_file.open(locator, 'r').read()))
+
     @property
     def steam_id(self):
         return -1
@@ -0,0 +1,295 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .bsp_file import BSPFile
+
+
+def _concat_ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, start + count) for every start/count pair."""
+    counts = counts.astype(np.int64)
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(starts.astype(np.int64) - offsets, counts) + np.arange(counts.sum())
+
+
+def _dot(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.einsum('ij,ij->i', a, b)
+
+
+def get_brush_triangles(bsp: BSPFile, model_ids: Iterable[int] = (0,)) -> Tuple[np.ndarray, np.ndarray]:
+    """Fan triangulate non-displacement faces of brush models, returns vertex ids (N, 3) and face ids (N,)."""
+    models = bsp.get_lump('LUMP_MODELS').models
+    face_data = bsp.get_lump('LUMP_FACES').face_data
+    surf_edges = bsp.get_lump('LUMP_SURFEDGES').surf_edges
+    edges = bsp.get_lump('LUMP_EDGES').edges
+
+    model_ids = list(model_ids)
+    face_ids = _concat_ranges(np.array([models[model_id].first_face for model_id in model_ids], np.int64),
+                              np.array([models[model_id].face_count for model_id in model_ids], np.int64))
+    faces = face_data[face_ids]
+    used_faces = (faces['disp_info_id'] == -1) & (faces['edge_count'] >= 3)
+    face_ids = face_ids[used_faces]
+    faces = faces[used_faces]
+
+    edge_counts = faces['edge_count'].astype(np.int64)
+    used_surf_edges = surf_edges[_concat_ranges(faces['first_edge'], edge_counts)]
+    vertex_ids = edges[np.abs(used_surf_edges), (used_surf_edges <= 0).astype(np.uint8)]
+
+    triangle_counts = edge_counts - 2
+    first_vertices = np.repeat(np.cumsum(edge_counts) - edge_counts, triangle_counts)
+    fan_offsets = _concat_ranges(np.ones_like(triangle_counts), triangle_counts)
+    triangles = np.stack([vertex_ids[first_vertices],
+                          vertex_ids[first_vertices + fan_offsets],
+                          vertex_ids[first_vertices + fan_offsets + 1]], axis=1)
+    return triangles, np.repeat(face_ids, triangle_counts)
+
+
+def get_brush_entity_origins(bsp: BSPFile) -> Dict[int, Tuple[float, float, float]]:
+    """Brush model ids of entities ("model" "*N") with entity origins, trigger volumes are left out."""
+    entity_lump = bsp.get_lump('LUMP_ENTITIES')
+    if not entity_lump:
+        return {}
+    model_count = len(bsp.get_lump('LUMP_MODELS').models)
+    origins = {}
+    for entity in entity_lump.entities:
+        model = entity.get('model')
+        if not isinstance(model, str) or not model.startswith('*') or entity.get('classname', '').startswith('trigger_'):
+            continue
+        model_id = int(model[1:])
+        if 0 < model_id < model_count:
+            origin = entity.get('origin', '0 0 0')
+            origins[model_id] = tuple(float(value) for value in origin.split()) if isinstance(origin, str) else (0, 0, 0)
+    return origins
+
+
+def _intersect_triangles(origins, directions, v0, v1, v2):
+    edge1 = v1 - v0
+    edge2 = v2 - v0
+    p = np.cross(directions, edge2)
+    det = _dot(edge1, p)
+    valid = np.abs(det) > 1e-12
+    inv_det = np.divide(1.0, det, out=np.zeros_like(det), where=valid)
+    s = origins - v0
+    u = _dot(s, p) * inv_det
+    q = np.cross(s, edge1)
+    v = _dot(directions, q) * inv_det
+    t = _dot(edge2, q) * inv_det
+    hit = valid & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0)
+    return np.where(hit, t, np.inf)
+
+
+def _closest_points_on_triangles(points, a, b, c):
+    ab = b - a
+    ac = c - a
+    ap = points - a
+    bp = points - b
+    cp = points - c
+    d1, d2 = _dot(ab, ap), _dot(ac, ap)
+    d3, d4 = _dot(ab, bp), _dot(ac, bp)
+    d5, d6 = _dot(ab, cp), _dot(ac, cp)
+    vc = d1 * d4 - d3 * d2
+    vb = d5 * d2 - d1 * d6
+    va = d3 * d6 - d5 * d4
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denom = va + vb + vc
+        result = a + ab * (vb / denom)[:, None] + ac * (vc / denom)[:, None]
+        # Voronoi regions from lowest to highest priority, later ones win
+        regions = [
+            ((va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0),
+             b + (c - b) * ((d4 - d3) / ((d4 - d3) + (d5 - d6)))[:, None]),
+            ((vb <= 0) & (d2 >= 0) & (d6 <= 0), a + ac * (d2 / (d2 - d6))[:, None]),
+            ((d6 >= 0) & (d5 <= d6), c),
+            ((vc <= 0) & (d1 >= 0) & (d3 <= 0), a + ab * (d1 / (d1 - d3))[:, None]),
+            ((d3 >= 0) & (d4 <= d3), b),
+            ((d1 <= 0) & (d2 <= 0), a),
+        ]
+    for mask, region_points in regions:
+        result = np.where(mask[:, None], region_points, result)
+    # Degenerate triangles
+    return np.where(np.isfinite(result), result, a)
+
+
+class TriangleBVH:
+    """Bounding volume hierarchy over triangles, answers ray and nearest surface queries for many points at once."""
+    leaf_size = 8
+
+    def __init__(self, triangles: np.ndarray, face_ids: Optional[np.ndarray] = None):
+        self.triangles = np.asarray(triangles, np.float64).reshape((-1, 3, 3))
+        self.face_ids = face_ids
+        edge1 = self.triangles[:, 1] - self.triangles[:, 0]
+        edge2 = self.triangles[:, 2] - self.triangles[:, 0]
+        normals = np.cross(edge1, edge2)
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        self.normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+        self._build()
+
+    @classmethod
+    def from_bsp(cls, bsp: BSPFile, model_ids: Iterable[int] = (0,), scale: float = 1.0,
+                 model_origins: Optional[Dict[int, Tuple[float, float, float]]] = None):
+        """Index of brush model faces, triangles of models in model_origins are moved to their entity origin."""
+        triangles, face_ids = get_brush_triangles(bsp, model_ids)
+        points = bsp.get_lump('LUMP_VERTICES').vertices[triangles].astype(np.float64)
+        if model_origins:
+            models = bsp.get_lump('LUMP_MODELS').models
+            for model_id, origin in model_origins.items():
+                model = models[model_id]
+                in_model = (face_ids >= model.first_face) & (face_ids < model.first_face + model.face_count)
+                points[in_model] += origin
+        return cls(points * scale, face_ids)
+
+    def _build(self):
+        triangle_count = self.triangles.shape[0]
+        triangle_min = self.triangles.min(axis=1)
+        triangle_max = self.triangles.max(axis=1)
+        centroids = self.triangles.mean(axis=1)
+        self.order = order = np.arange(triangle_count)
+
+        node_start = np.zeros(1, np.int64)
+        node_count = np.full(1, triangle_count, np.int64)
+        node_children = np.full(1, -1, np.int64)
+        node_min = np.zeros((1, 3))
+        node_max = np.zeros((1, 3))
+        level = np.zeros(1 if triangle_count else 0, np.int64)
+        while level.size:
+            counts = node_count[level]
+            offsets = np.cumsum(counts) - counts
+            positions = _concat_ranges(node_start[level], counts)
+            level_triangles = order[positions]
+            node_min[level] = np.minimum.reduceat(triangle_min[level_triangles], offsets)
+            node_max[level] = np.maximum.reduceat(triangle_max[level_triangles], offsets)
+
+            to_split = counts > self.leaf_size
+            if not to_split.any():
+                break
+            segments = np.repeat(np.arange(level.shape[0]), counts)
+            centroid_min = np.minimum.reduceat(centroids[level_triangles], offsets)
+            centroid_max = np.maximum.reduceat(centroids[level_triangles], offsets)
+            axes = np.argmax(centroid_max - centroid_min, axis=1)
+            # Median split along longest axis, sorting every node of this level at once
+            sort = np.lexsort((centroids[level_triangles, axes[segments]], segments))
+            order[positions] = level_triangles[sort]
+
+            split_nodes = level[to_split]
+            starts = node_start[split_nodes]
+            counts = counts[to_split]
+            halves = counts // 2
+            first_child = node_start.shape[0]
+            node_children[split_nodes] = first_child + np.arange(split_nodes.shape[0]) * 2
+            node_start = np.concatenate([node_start, np.stack([starts, starts + halves], axis=1).ravel()])
+            node_count = np.concatenate([node_count, np.stack([halves, counts - halves], axis=1).ravel()])
+            node_children = np.concatenate([node_children, np.full(halves.shape[0] * 2, -1, np.int64)])
+            node_min = np.concatenate([node_min, np.zeros((halves.shape[0] * 2, 3))])
+            node_max = np.concatenate([node_max, np.zeros((halves.shape[0] * 2, 3))])
+            level = np.arange(first_child, node_start.shape[0])
+
+        self.node_start = node_start
+        self.node_count = node_count
+        # Left child id, right child is next to it, -1 for leaves
+        self.node_children = node_children
+        self.node_min = node_min
+        self.node_max = node_max
+
+    def _expand_leaves(self, query_ids, node_ids):
+        counts = self.node_count[node_ids]
+        return np.repeat(query_ids, counts), self.order[_concat_ranges(self.node_start[node_ids], counts)]
+
+    def _expand_children(self, query_ids, node_ids):
+        left = self.node_children[node_ids]
+        return np.concatenate([query_ids, query_ids]), np.concatenate([left, left + 1])
+
+    def _get_normals(self, triangle_ids: np.ndarray) -> np.ndarray:
+        normals = np.zeros((triangle_ids.shape[0], 3))
+        hit = triangle_ids != -1
+        normals[hit] = self.normals[triangle_ids[hit]]
+        return normals
+
+    @staticmethod
+    def _update_best(best_values, best_triangles, query_ids, values, triangle_ids):
+        better = values < best_values[query_ids]
+        query_ids, values, triangle_ids = query_ids[better], values[better], triangle_ids[better]
+        np.minimum.at(best_values, query_ids, values)
+        winners = values == best_values[query_ids]
+        best_triangles[query_ids[winners]] = triangle_ids[winners]
+
+    def ray_cast(self, origins: np.ndarray, directions: np.ndarray, max_distance: float = np.inf):
+        """Returns distances, triangle ids (-1 for misses), hit points and triangle normals per ray."""
+        origins = np.asarray(origins, np.float64).reshape((-1, 3))
+        directions = np.asarray(directions, np.float64).reshape((-1, 3))
+        directions = directions / np.linalg.norm(directions, axis=1, keepdims=True)
+        best_distances = np.full(origins.shape[0], max_distance, np.float64)
+        best_triangles = np.full(origins.shape[0], -1, np.int64)
+        with np.errstate(divide='ignore'):
+            inv_directions = 1 / directions
+
+        ray_ids = np.arange(origins.shape[0] if self.triangles.shape[0] else 0)
+        node_ids = np.zeros_like(ray_ids)
+        while ray_ids.size:
+            ray_origins = origins[ray_ids]
+            ray_inv_directions = inv_directions[ray_ids]
+            with np.errstate(invalid='ignore'):
+                t0 = (self.node_min[node_ids] - ray_origins) * ray_inv_directions
+                t1 = (self.node_max[node_ids] - ray_origins) * ray_inv_directions
+            t_near = np.maximum(np.fmin(t0, t1).max(axis=1), 0)
+            t_far = np.fmax(t0, t1).min(axis=1)
+            overlaps = (t_near <= t_far) & (t_near <= best_distances[ray_ids])
+            ray_ids, node_ids = ray_ids[overlaps], node_ids[overlaps]
+
+            is_leaf = self.node_children[node_ids] == -1
+            pair_rays, pair_triangles = self._expand_leaves(ray_ids[is_leaf], node_ids[is_leaf])
+            triangles = self.triangles[pair_triangles]
+            distances = _intersect_triangles(origins[pair_rays], directions[pair_rays],
+                                             triangles[:, 0], triangles[:, 1], triangles[:, 2])
+            self._update_best(best_distances, best_triangles, pair_rays, distances, pair_triangles)
+            ray_ids, node_ids = self._expand_children(ray_ids[~is_leaf], node_ids[~is_leaf])
+
+        hit = best_triangles != -1
+        best_distances[~hit] = np.inf
+        hit_points = origins + directions * np.where(hit, best_distances, 0)[:, None]
+        return best_distances, best_triangles, hit_points, self._get_normals(best_triangles)
+
+    def _box_distances(self, points: np.ndarray, node_ids: np.ndarray) -> np.ndarray:
+        box_offsets = np.maximum(np.maximum(self.node_min[node_ids] - points, points - self.node_max[node_ids]), 0)
+        return _dot(box_offsets, box_offsets)
+
+    def _update_nearest(self, points, best_distances, best_triangles, point_ids, leaf_ids):
+        pair_points, pair_triangles = self._expand_leaves(point_ids, leaf_ids)
+        triangles = self.triangles[pair_triangles]
+        closest = _closest_points_on_triangles(points[pair_points], triangles[:, 0], triangles[:, 1], triangles[:, 2])
+        offsets = points[pair_points] - closest
+        self._update_best(best_distances, best_triangles, pair_points, _dot(offsets, offsets), pair_triangles)
+
+    def find_nearest(self, points: np.ndarray, max_distance: float = np.inf):
+        """Returns distances, triangle ids (-1 if nothing within max_distance), closest points and triangle normals."""
+        points = np.asarray(points, np.float64).reshape((-1, 3))
+        best_distances = np.full(points.shape[0], max_distance * max_distance, np.float64)
+        best_triangles = np.full(points.shape[0], -1, np.int64)
+
+        point_ids = np.arange(points.shape[0] if self.triangles.shape[0] else 0)
+        # Greedy descent to closest leaf gives tight initial bound, so traversal below prunes most of the tree
+        node_ids = np.zeros_like(point_ids)
+        is_leaf = self.node_children[node_ids] == -1
+        while not is_leaf.all():
+            left = self.node_children[node_ids[~is_leaf]]
+            query_points = points[point_ids[~is_leaf]]
+            closer_right = self._box_distances(query_points, left + 1) < self._box_distances(query_points, left)
+            node_ids[~is_leaf] = left + closer_right
+            is_leaf = self.node_children[node_ids] == -1
+        self._update_nearest(points, best_distances, best_triangles, point_ids, node_ids)
+
+        node_ids = np.zeros_like(point_ids)
+        while point_ids.size:
+            overlaps = self._box_distances(points[point_ids], node_ids) <= best_distances[point_ids]
+            point_ids, node_ids = point_ids[overlaps], node_ids[overlaps]
+
+            is_leaf = self.node_children[node_ids] == -1
+            self._update_nearest(points, best_distances, best_triangles, point_ids[is_leaf], node_ids[is_leaf])
+            point_ids, node_ids = self._expand_children(point_ids[~is_leaf], node_ids[~is_leaf])
+
+        hit = best_triangles != -1
+        closest_points = points.copy()
+        triangles = self.triangles[best_triangles[hit]]
+        closest_points[hit] = _closest_points_on_triangles(points[hit],
+                                                           triangles[:, 0], triangles[:, 1], triangles[:, 2])
+        distances = np.where(hit, np.sqrt(best_distances), np.inf)
+        return distances, best_triangles, closest_points, self._get_normals(best_triangles)
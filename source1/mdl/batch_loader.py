@@ -0,0 +1,157 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from .structs.header import StudioHDRFlags
+from .mesh_merge import merge_meshes
+from .v44.mdl_file import Mdl as MdlV44
+from .v49.mdl_file import Mdl as MdlV49
+from ..vtx import open_vtx
+from ..vvd import Vvd
+from ...bpy_utilities.logger import BPYLoggingManager
+from ...content_providers.content_manager import ContentManager
+from ...utilities.byte_io_mdl import ByteIO
+from ...utilities.path_utilities import find_vtx_cm
+
+log_manager = BPYLoggingManager()
+logger = log_manager.get_logger('Source1::BatchModelLoader')
+
+
+class MeshPayload:
+    """Geometry of one body part model, triangles are already in Blender winding order."""
+
+    def __init__(self, name: str, body_part: str, vertices: np.ndarray, normals: np.ndarray, uv: np.ndarray,
+                 indices: np.ndarray, material_ids: np.ndarray, bone_ids: np.ndarray, weights: np.ndarray):
+        self.name = name
+        self.body_part = body_part
+        self.vertices = vertices
+        self.normals = normals
+        self.uv = uv
+        self.indices = indices
+        self.material_ids = material_ids
+        self.bone_ids = bone_ids
+        self.weights = weights
+
+
+class ModelPayload:
+    """Picklable result of parsing MDL+VVD+VTX without touching Blender."""
+
+    def __init__(self, name: str, header_name: str, static_prop: bool):
+        self.name = name
+        self.header_name = header_name
+        self.static_prop = static_prop
+        self.materials: List[str] = []
+        self.material_paths: List[str] = []
+        self.skin_groups: List[List[str]] = []
+        self.bone_names: List[str] = []
+        self.meshes: List[MeshPayload] = []
+
+
+def parse_model(name: str, mdl_file, vvd_file, vtx_file, scale: float = 1.0) -> Optional[ModelPayload]:
+    """Parse single model into ModelPayload, returns None for unsupported versions."""
+    mdl_reader = ByteIO(mdl_file)
+    magic, version = mdl_reader.read_fmt('4sI')
+    mdl_reader.seek(0)
+    if magic != b'IDST':
+        logger.error(f'Unknown Mdl magic "{magic}" in {name}, expected "IDST"')
+        return None
+    if version == 44:
+        mdl = MdlV44(mdl_reader)
+    elif 45 <= version <= 51:
+        mdl = MdlV49(mdl_reader)
+    else:
+        # Older models have no VVD, they go through regular importer
+        logger.warn(f'Batch parsing of Mdl v{version} is not supported, skipping {name}')
+        return None
+    mdl.read()
+    vvd = Vvd(vvd_file)
+    vvd.read()
+    vtx = open_vtx(vtx_file)
+    if vtx is None:
+        logger.error(f'Unsupported Vtx version in {name}')
+        return None
+    vtx.read()
+
+    payload = ModelPayload(name, mdl.header.name, mdl.header.flags & StudioHDRFlags.STATIC_PROP != 0)
+    payload.materials = [material.name for material in mdl.materials]
+    payload.material_paths = list(mdl.materials_paths)
+    payload.skin_groups = [list(skin_group) for skin_group in mdl.skin_groups]
+    payload.bone_names = [bone.name for bone in mdl.bones]
+
+    all_vertices = vvd.lod_data[0]
+    for vtx_body_part, body_part in zip(vtx.body_parts, mdl.body_parts):
+        for vtx_model, model in zip(vtx_body_part.models, body_part.models):
+            if model.vertex_count == 0:
+                continue
+            vertex_ids, indices, material_ids = merge_meshes(model, vtx_model.model_lods[0])
+            if not indices.size:
+                continue
+            vertices = all_vertices[model.vertex_offset:model.vertex_offset + model.vertex_count][vertex_ids]
+            uv = vertices['uv'].copy()
+            uv[:, 1] = 1 - uv[:, 1]
+            payload.meshes.append(MeshPayload(f'{body_part.name}_{model.name}', body_part.name,
+                                              vertices['vertex'] * scale, vertices['normal'].copy(), uv,
+                                              np.flip(indices).reshape((-1, 3)), material_ids[::-1].copy(),
+                                              vertices['bone_id'].copy(), vertices['weight'].copy()))
+    return payload
+
+
+def _init_worker(content_snapshot: Dict[str, str]):
+    ContentManager().deserialize(content_snapshot)
+
+
+def _parse_model_from_content(model_path: str, scale: float) -> Optional[ModelPayload]:
+    content_manager = ContentManager()
+    path = Path(model_path)
+    mdl_file = content_manager.find_file(path)
+    vvd_file = content_manager.find_file(path.with_suffix('.vvd'))
+    vtx_file = find_vtx_cm(path, content_manager)
+    if mdl_file is None or vvd_file is None or vtx_file is None:
+        logger.warn(f'Model {model_path} or its VVD/VTX was not found!')
+        return None
+    try:
+        return parse_model(model_path, mdl_file, vvd_file, vtx_file, scale)
+    except Exception as ex:
+        logger.error(f'Failed to parse {model_path}: {ex}')
+        return None
+
+
+@contextmanager
+def _no_bpy_environment():
+    # Workers import the addon package again, it must skip registering Blender classes there
+    old_value = os.environ.get('NO_BPY', None)
+    os.environ['NO_BPY'] = '1'
+    try:
+        yield
+    finally:
+        if old_value is None:
+            del os.environ['NO_BPY']
+        else:
+            os.environ['NO_BPY'] = old_value
+
+
+def parse_models(model_paths: Iterable[Union[str, Path]], content_snapshot: Optional[Dict[str, str]] = None,
+                 scale: float = 1.0, workers: Optional[int] = None) -> Dict[str, Optional[ModelPayload]]:
+    """Parse many models in worker processes, content_snapshot comes from ContentManager.serialize().
+
+    Result maps every unique path to its payload or None if model could not be parsed.
+    """
+    unique_paths = list(dict.fromkeys(str(path) for path in model_paths))
+    if not unique_paths:
+        return {}
+    if content_snapshot is None:
+        content_snapshot = ContentManager().serialize()
+    if workers is None:
+        workers = min(len(unique_paths), os.cpu_count() or 1)
+    if workers <= 1:
+        return {path: _parse_model_from_content(path, scale) for path in unique_paths}
+
+    with _no_bpy_environment():
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(content_snapshot,)) as executor:
+            # Worker processes are started on first submit, environment must be set until then
+            futures = [executor.submit(_parse_model_from_content, path, scale) for path in unique_paths]
+    return {path: future.result() for path, future in zip(unique_paths, futures)}
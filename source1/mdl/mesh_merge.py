@@ -0,0 +1,40 @@
+from typing import Tuple
+
+import numpy as np
+
+from .structs.model import ModelV49
+from ..vtx.v7.structs.mesh import Mesh as VtxMesh
+from ..vtx.v7.structs.model import ModelLod as VtxModel
+
+
+def merge_strip_groups(vtx_mesh: VtxMesh) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Indices and original vertex ids of all strip groups of mesh, indices are offset to follow each other."""
+    indices = []
+    vertices = []
+    vertex_offset = 0
+    for strip_group in vtx_mesh.strip_groups:
+        # Vtx v6 strip groups name their index buffer "indices"
+        strip_indices = strip_group.indexes if hasattr(strip_group, 'indexes') else strip_group.indices
+        indices.append(strip_indices.astype(np.uint32) + vertex_offset)
+        vertices.append(strip_group.vertexes['original_mesh_vertex_index'].reshape(-1))
+        vertex_offset += sum(strip.vertex_count for strip in strip_group.strips)
+    return np.concatenate(indices), np.concatenate(vertices), vertex_offset
+
+
+def merge_meshes(model: ModelV49, vtx_model: VtxModel) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Model vertex ids, triangle indices into them and material id per triangle of all meshes of Vtx model LOD."""
+    vertex_ids = []
+    indices = []
+    material_ids = []
+    index_offset = 0
+    for vtx_mesh, mesh in zip(vtx_model.meshes, model.meshes):
+        if not vtx_mesh.strip_groups:
+            continue
+        mesh_indices, mesh_vertices, offset = merge_strip_groups(vtx_mesh)
+        indices.append(mesh_indices + index_offset)
+        vertex_ids.append(mesh_vertices.astype(np.uint32) + mesh.vertex_index_start)
+        material_ids.append(np.full(mesh_indices.shape[0] // 3, mesh.material_index, np.uint32))
+        index_offset += offset
+    if not indices:
+        return np.zeros(0, np.uint32), np.zeros(0, np.uint32), np.zeros(0, np.uint32)
+    return np.concatenate(vertex_ids), np.concatenate(indices), np.concatenate(material_ids)
@@ -2,7 +2,10 @@ from enum import IntFlag
 
 from typing import List
 
+import numpy as np
+
 from ....utilities.byte_io_mdl import ByteIO
+from ....utilities.math_utilities import quats_to_eulers
 from ....source_shared.base import Base
 from .compressed_vectors import Quat48, Quat64
 
@@ -37,17 +40,36 @@ class AnimBoneFlags(IntFlag):
     RawRot2 = 0x20
 
 
+def decode_rle_shorts(reader: ByteIO, count: int) -> np.ndarray:
+    """Expand run-length encoded animation values into int32 array of count frames.
+
+    Every run stores number of raw values and number of frames it covers, frames past
+    raw values repeat the last one. Frames not covered by stream are left zero.
+    """
+    values = np.zeros(count, np.int32)
+    total_count = 0
+    while total_count < count:
+        raw_count, encoded_count = reader.read_fmt('2B')
+        raw_values = np.frombuffer(reader.read(2 * raw_count), np.int16)
+        run_count = min(encoded_count, count - total_count)
+        if run_count == 0:
+            # Empty run can not make progress, treat it as end of the stream
+            break
+        values[total_count:total_count + run_count] = raw_values[np.minimum(np.arange(run_count), raw_count - 1)]
+        total_count += run_count
+    return values
+
+
 class AnimBone:
 
     def __init__(self, bone_id, flags, frame_count):
         self.bone_id = bone_id
         self.flags = flags
         self.frame_count = frame_count
-        self.quat = []
-        self.pos = []
-        self.quat_anim = []
-        self.vec_rot_anim = []
-        self.pos_anim = []
+        self.quat = np.zeros(0, np.float64)
+        self.pos = np.zeros(0, np.float32)
+        self.vec_rot_anim = np.zeros((0, 3), np.int32)
+        self.pos_anim = np.zeros((0, 3), np.int32)
 
     @property
     def is_delta(self):
@@ -59,7 +81,7 @@ class AnimBone:
 
     @property
     def is_raw_rot(self):
-        return self.flags & AnimBoneFlags.RawRot
+        return self.flags & (AnimBoneFlags.RawRot | AnimBoneFlags.RawRot2)
 
     @property
     def is_anim_pos(self):
@@ -69,41 +91,32 @@ class AnimBone:
     def is_anim_rot(self):
         return self.flags & AnimBoneFlags.AnimRot
 
+    def _read_anim_values(self, reader: ByteIO):
+        entry = reader.tell()
+        offsets = reader.read_fmt('3h')
+        frames = np.zeros((self.frame_count, 3), np.int32)
+        with reader.save_current_pos():
+            for i, offset in enumerate(offsets):
+                if offset == 0:
+                    continue
+                reader.seek(entry + offset)
+                values = decode_rle_shorts(reader, self.frame_count)
+                frames[:, i] = values
+                if self.is_delta:
+                    frames[1:, i] += values[:-1]
+        return frames
+
     def read(self, reader: ByteIO):
-        if self.is_raw_rot:
-            self.quat = Quat48.read(reader)
+        if self.flags & AnimBoneFlags.RawRot:
+            self.quat = Quat48.read_array(reader, 1)[0]
+        if self.flags & AnimBoneFlags.RawRot2:
+            self.quat = Quat64.read_array(reader, 1)[0]
         if self.is_raw_pos:
-            self.pos = reader.read_fmt('3e')
+            self.pos = np.frombuffer(reader.read(6), np.float16).astype(np.float32)
         if self.is_anim_rot:
-            entry = reader.tell()
-            offsets = reader.read_fmt('3h')
-            with reader.save_current_pos():
-                rot_frames = [[0, 0, 0] for _ in range(self.frame_count)]
-                for i, offset in enumerate(offsets):
-                    if offset == 0:
-                        continue
-                    reader.seek(entry + offset)
-                    values = reader.read_rle_shorts(self.frame_count)
-                    for f, value in enumerate(values):
-                        rot_frames[f][i] += value
-                        if f > 0 and self.is_delta:
-                            rot_frames[f][i] += values[f - 1]
-            self.vec_rot_anim.extend(rot_frames)
+            self.vec_rot_anim = self._read_anim_values(reader)
         if self.is_anim_pos:
-            entry = reader.tell()
-            offsets = reader.read_fmt('3h')
-            with reader.save_current_pos():
-                pos_frames = [[0, 0, 0] for _ in range(self.frame_count)]
-                for i, offset in enumerate(offsets):
-                    if offset == 0:
-                        continue
-                    reader.seek(entry + offset)
-                    values = reader.read_rle_shorts(self.frame_count)
-                    for f, value in enumerate(values):
-                        pos_frames[f][i] += value
-                        if f > 0 and self.is_delta:
-                            pos_frames[f][i] += values[f - 1]
-            self.pos_anim.extend(pos_frames)
+            self.pos_anim = self._read_anim_values(reader)
 
 
 class AnimDesc(Base):
@@ -190,6 +203,41 @@ class AnimDesc(Base):
             bone.read(reader)
             self.anim_bones.append(bone)
 
+    def stack_bone_tracks(self, bones):
+        """Stack tracks of animated bones into (frames, bones, 3) positions and XYZ euler rotations.
+
+        Tracks are multiplied by position and rotation scales of the bones. Number of keyed frames
+        of every bone is returned alongside, 0 when bone is not animated and 1 for raw values.
+        """
+        frame_count = max(self.frame_count, 1)
+        positions = np.zeros((frame_count, len(bones), 3), np.float64)
+        rotations = np.zeros((frame_count, len(bones), 3), np.float64)
+        position_key_counts = np.zeros(len(bones), np.int32)
+        rotation_key_counts = np.zeros(len(bones), np.int32)
+        for anim_bone in self.anim_bones:
+            if anim_bone.bone_id == -1:
+                continue
+            bone = bones[anim_bone.bone_id]
+
+            if anim_bone.is_raw_pos:
+                position_track = anim_bone.pos[None, :]
+            elif anim_bone.is_anim_pos:
+                position_track = anim_bone.pos_anim
+            else:
+                position_track = np.zeros((0, 3))
+            positions[:len(position_track), anim_bone.bone_id] = position_track * bone.position_scale
+            position_key_counts[anim_bone.bone_id] = len(position_track)
+
+            if anim_bone.is_raw_rot:
+                rotation_track = quats_to_eulers(anim_bone.quat[None, :])
+            elif anim_bone.is_anim_rot:
+                rotation_track = anim_bone.vec_rot_anim
+            else:
+                rotation_track = np.zeros((0, 3))
+            rotations[:len(rotation_track), anim_bone.bone_id] = rotation_track * bone.rotation_scale
+            rotation_key_counts[anim_bone.bone_id] = len(rotation_track)
+        return positions, position_key_counts, rotations, rotation_key_counts
+
     def read_movements(self):
         if self.movement_count > 0:
             raise Exception('Movements are not yet supported.')
@@ -1,5 +1,7 @@
 import math
 
+import numpy as np
+
 from ....utilities.byte_io_mdl import ByteIO
 
 
@@ -8,6 +10,10 @@ class Quat:
     def read(reader: ByteIO):
         raise NotImplementedError('Override me')
 
+    @staticmethod
+    def read_array(reader: ByteIO, count: int) -> np.ndarray:
+        raise NotImplementedError('Override me')
+
 
 class Quat64(Quat):
     @staticmethod
@@ -18,11 +24,28 @@ class Quat64(Quat):
         y = ((raw_value >> 21 & 0x1FFFFF) - 1048576) / 1048576.5
         z = ((raw_value >> 42 & 0x1FFFFF) - 1048576) / 1048576.5
         w = math.sqrt(1 - x * x - y * y - z * z)
-        w_neg = raw_value >> 61 & 0x1
+        w_neg = raw_value >> 63 & 0x1
         if w_neg:
             w *= -1
         return x, y, z, w
 
+    @staticmethod
+    def decode(raw_values: np.ndarray) -> np.ndarray:
+        """Decode array of packed uint64 values into (n, 4) xyzw quaternions."""
+        raw_values = np.asarray(raw_values, np.uint64)
+        quats = np.empty(raw_values.shape + (4,), np.float64)
+        for i, shift in enumerate((0, 21, 42)):
+            component = (raw_values >> np.uint64(shift)) & np.uint64(0x1FFFFF)
+            quats[..., i] = (component.astype(np.float64) - 1048576) / 1048576.5
+        quats[..., 3] = np.sqrt(np.maximum(1 - np.sum(quats[..., :3] ** 2, axis=-1), 0))
+        w_neg = ((raw_values >> np.uint64(63)) & np.uint64(1)).astype(bool)
+        quats[..., 3][w_neg] *= -1
+        return quats
+
+    @staticmethod
+    def read_array(reader: ByteIO, count: int) -> np.ndarray:
+        return Quat64.decode(np.frombuffer(reader.read(8 * count), np.uint64))
+
 
 class Quat48(Quat):
     @staticmethod
@@ -36,3 +59,20 @@ class Quat48(Quat):
         if w_neg:
             w *= -1
         return x, y, z, w
+
+    @staticmethod
+    def decode(raw_values: np.ndarray) -> np.ndarray:
+        """Decode (n, 3) uint16 array into (n, 4) xyzw quaternions."""
+        raw_values = np.asarray(raw_values, np.uint16)
+        quats = np.empty(raw_values.shape[:-1] + (4,), np.float64)
+        quats[..., 0] = (raw_values[..., 0].astype(np.float64) - 32768) / 32768
+        quats[..., 1] = (raw_values[..., 1].astype(np.float64) - 32768) / 32768
+        quats[..., 2] = ((raw_values[..., 2] & 0x7FFF).astype(np.float64) - 16384) / 16384
+        quats[..., 3] = np.sqrt(np.maximum(1 - np.sum(quats[..., :3] ** 2, axis=-1), 0))
+        w_neg = (raw_values[..., 2] >> 15).astype(bool)
+        quats[..., 3][w_neg] *= -1
+        return quats
+
+    @staticmethod
+    def read_array(reader: ByteIO, count: int) -> np.ndarray:
+        return Quat48.decode(np.frombuffer(reader.read(6 * count), np.uint16).reshape((-1, 3)))
@@ -5,7 +5,7 @@ from typing import List
 import numpy as np
 
 from ....utilities.byte_io_mdl import ByteIO
-from ....source_shared.base import Base
+from ....source_shared.base import Base, with_storage
 
 from .flex_expressions import *
 from ..structs.header import MdlHeaderV36
@@ -26,7 +26,9 @@ class _AnimBlocks:
 
 class Mdl(Base):
 
+    @with_storage
     def __init__(self, filepath):
+        self.begin_storage()
         self.store_value("MDL", self)
         self.reader = ByteIO(filepath)
         self.header = MdlHeaderV36()
@@ -75,6 +77,7 @@ class Mdl(Base):
             buffer[2] = new_checksum
         print(orig_checksum, new_checksum)
 
+    @with_storage
     def read(self):
         reader = self.reader
         header = self.header
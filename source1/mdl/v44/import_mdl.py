@@ -1,25 +1,23 @@
-import math
 from pathlib import Path
 from typing import BinaryIO, Iterable, Sized, Union, Optional
 
 import bpy
 import numpy as np
-from mathutils import Vector, Matrix, Euler, Quaternion
+from mathutils import Vector, Matrix, Euler
 
 from .flex_expressions import *
 from .mdl_file import Mdl
 from ..structs.header import StudioHDRFlags
-from ..structs.model import ModelV49
+from ..mesh_merge import merge_meshes
 from .vertex_animation_cache import VertexAnimationCache
-from ...vtx.v7.structs.mesh import Mesh as VtxMesh
-from ...vtx.v7.structs.model import ModelLod as VtxModel
 from ...vtx.v7.vtx import Vtx
 from ...vvd import Vvd
 from ...vvc import Vvc
 from ....bpy_utilities.logger import BPYLoggingManager
 from ....bpy_utilities.material_loader.material_loader import Source1MaterialLoader
 from ....bpy_utilities.material_loader.shaders.source1_shader_base import Source1ShaderBase
-from ....bpy_utilities.utils import get_material, get_new_unique_collection
+from ....bpy_utilities.utils import get_material, get_new_unique_collection, add_vertex_weights, set_keyframes
+from ....utilities.math_utilities import eulers_to_matrices, matrices_to_eulers
 from ....content_providers.content_manager import ContentManager
 from ....source_shared.model_container import Source1ModelContainer
 
@@ -27,39 +25,6 @@ log_manager = BPYLoggingManager()
 logger = log_manager.get_logger('Source1::ModelLoader')
 
 
-def merge_strip_groups(vtx_mesh: VtxMesh):
-    indices_accumulator = []
-    vertex_accumulator = []
-    vertex_offset = 0
-    for strip_group in vtx_mesh.strip_groups:
-        indices_accumulator.append(np.add(strip_group.indexes, vertex_offset))
-        vertex_accumulator.append(strip_group.vertexes['original_mesh_vertex_index'].reshape(-1))
-        vertex_offset += sum(strip.vertex_count for strip in strip_group.strips)
-    return np.hstack(indices_accumulator), np.hstack(vertex_accumulator), vertex_offset
-
-
-def merge_meshes(model: ModelV49, vtx_model: VtxModel):
-    vtx_vertices = []
-    acc = 0
-    mat_arrays = []
-    indices_array = []
-    for n, (vtx_mesh, mesh) in enumerate(zip(vtx_model.meshes, model.meshes)):
-
-        if not vtx_mesh.strip_groups:
-            continue
-
-        vertex_start = mesh.vertex_index_start
-        indices, vertices, offset = merge_strip_groups(vtx_mesh)
-        indices = np.add(indices, acc)
-        mat_array = np.full(indices.shape[0] // 3, mesh.material_index)
-        mat_arrays.append(mat_array)
-        vtx_vertices.extend(np.add(vertices, vertex_start))
-        indices_array.append(indices)
-        acc += offset
-
-    return vtx_vertices, np.hstack(indices_array), np.hstack(mat_arrays)
-
-
 def get_slice(data: [Iterable, Sized], start, count=None):
     if count is None:
         count = len(data) - start
@@ -227,12 +192,8 @@ def import_model(mdl_file: Union[BinaryIO, Path],
 
             if not static_prop:
                 weight_groups = {bone.name: mesh_obj.vertex_groups.new(name=bone.name) for bone in mdl.bones}
-
-                for n, (bone_indices, bone_weights) in enumerate(zip(vertices['bone_id'], vertices['weight'])):
-                    for bone_index, weight in zip(bone_indices, bone_weights):
-                        if weight > 0:
-                            bone_name = mdl.bones[bone_index].name
-                            weight_groups[bone_name].add([n], weight, 'REPLACE')
+                add_vertex_weights(weight_groups, [bone.name for bone in mdl.bones],
+                                   vertices['bone_id'], vertices['weight'])
 
             if not static_prop:
                 flex_names = []
@@ -244,9 +205,8 @@ def import_model(mdl_file: Union[BinaryIO, Path],
                 for flex_name in flex_names:
                     shape_key = mesh_data.shape_keys.key_blocks.get(flex_name, None) or mesh_obj.shape_key_add(
                         name=flex_name)
-                    vertex_animation = vac.vertex_cache[flex_name]
-
-                    model_vertices = get_slice(vertex_animation, model.vertex_offset, model.vertex_count)
+                    model_vertices = vac.get_model_vertices(flex_name, model.vertex_offset, model.vertex_count,
+                                                            desired_lod)
                     flex_vertices = model_vertices[vtx_vertices] * scale
 
                     shape_key.data.foreach_set("co", flex_vertices.reshape(-1))
@@ -372,11 +332,6 @@ def import_materials(mdl, unique_material_names=False, use_bvlg=False):
             new_material.create_material()
 
 
-def __swap_components(vec, mp):
-    __pat = 'XYZ'
-    return [vec[__pat.index(k)] for k in mp]
-
-
 def import_animations(mdl: Mdl, armature, scale):
     bpy.ops.object.select_all(action="DESELECT")
     armature.select_set(True)
@@ -384,6 +339,9 @@ def import_animations(mdl: Mdl, armature, scale):
     bpy.ops.object.mode_set(mode='POSE')
     if not armature.animation_data:
         armature.animation_data_create()
+    root_bones = np.array([bone.parent_bone_index == -1 for bone in mdl.bones], dtype=bool)
+    # Rotation by 90 degrees around X, then around Z
+    axis_fix_matrix = eulers_to_matrices(np.radians([90, 0, 90]))
     # for var_pos in ['XYZ', 'YXZ', ]:
     #     for var_rot in ['XYZ', 'XZY', 'YZX', 'ZYX', 'YXZ', 'ZXY', ]:
     for var_pos in ['XYZ']:
@@ -392,82 +350,34 @@ def import_animations(mdl: Mdl, armature, scale):
                 anim_name = f'pos_{var_pos}_rot_{var_rot}_{anim_desc.name}'
                 action = bpy.data.actions.new(anim_name)
                 armature.animation_data.action = action
-                curve_per_bone = {}
-                for bone in anim_desc.anim_bones:
-                    if bone.bone_id == -1:
-                        continue
-                    bone_name = mdl.bones[bone.bone_id].name
-
-                    bone_string = f'pose.bones["{bone_name}"].'
-                    group = action.groups.new(name=bone_name)
-                    pos_curves = []
-                    rot_curves = []
+                anim_bones = [bone for bone in anim_desc.anim_bones if bone.bone_id != -1]
+
+                rest_rotations = np.zeros((len(mdl.bones), 3), np.float64)
+                for bone in anim_bones:
+                    bl_bone = armature.pose.bones.get(mdl.bones[bone.bone_id].name)
+                    bl_bone.rotation_mode = 'XYZ'
+                    rest_rotations[bone.bone_id] = bl_bone.rotation_euler
+
+                positions, position_key_counts, rotations, rotation_key_counts = anim_desc.stack_bone_tracks(
+                    mdl.bones)
+                positions = positions[..., ['XYZ'.index(k) for k in var_pos]] * scale
+                rotations[:, root_bones] += np.radians([-90, 180, -90])
+                rotations = rotations[..., ['XYZ'.index(k) for k in var_rot]]
+                rotations = matrices_to_eulers(
+                    axis_fix_matrix @ eulers_to_matrices(rotations) @ eulers_to_matrices(rest_rotations))
+
+                for bone in anim_bones:
+                    bone_id = bone.bone_id
+                    mdl_bone = mdl.bones[bone_id]
+                    bone_string = f'pose.bones["{mdl_bone.name}"].'
+                    group = action.groups.new(name=mdl_bone.name)
                     for i in range(3):
                         pos_curve = action.fcurves.new(data_path=bone_string + "location", index=i)
-                        pos_curve.keyframe_points.add(anim_desc.frame_count)
-                        pos_curves.append(pos_curve)
                         pos_curve.group = group
+                        set_keyframes(pos_curve, positions[:position_key_counts[bone_id], bone_id, i])
                     for i in range(3):
-                        # rot_curve = action.fcurves.new(data_path=bone_string + "rotation_quaternion", index=i)
                         rot_curve = action.fcurves.new(data_path=bone_string + "rotation_euler", index=i)
-                        rot_curve.keyframe_points.add(anim_desc.frame_count)
-                        rot_curves.append(rot_curve)
                         rot_curve.group = group
-                    curve_per_bone[bone_name] = pos_curves, rot_curves
+                        set_keyframes(rot_curve, rotations[:rotation_key_counts[bone_id], bone_id, i])
 
-                for bone in anim_desc.anim_bones:
-                    if bone.bone_id == -1:
-                        continue
-                    mdl_bone = mdl.bones[bone.bone_id]
-
-                    bl_bone = armature.pose.bones.get(mdl_bone.name)
-                    bl_bone.rotation_mode = 'XYZ'
-
-                    pos_scale = mdl_bone.position_scale
-                    rot_scale = mdl_bone.rotation_scale
-                    if bone.is_raw_pos:
-                        pos_frames = [Vector(np.multiply(np.multiply(bone.pos, pos_scale), scale))]
-                    elif bone.is_anim_pos:
-                        pos_frames = [Vector(np.multiply(np.multiply(pos, pos_scale), scale)) for pos in
-                                      bone.pos_anim]
-                    else:
-                        pos_frames = []
-
-                    if bone.is_raw_rot:
-                        rot_frames = [Euler(np.multiply(Quaternion(bone.quat).to_euler('XYZ'), rot_scale))]
-                    elif bone.is_anim_rot:
-                        rot_frames = [Euler(np.multiply(rot, rot_scale)) for rot in bone.vec_rot_anim]
-                    else:
-                        rot_frames = []
-
-                    pos_curves, rot_curves = curve_per_bone[mdl_bone.name]
-                    for n, pos_frame in enumerate(pos_frames):
-                        pos = __swap_components(pos_frame, var_pos)
-
-                        for i in range(3):
-                            pos_curves[i].keyframe_points.add(1)
-                            pos_curves[i].keyframe_points[-1].co = (n, pos[i])
-
-                    for n, rot_frame in enumerate(rot_frames):
-                        fixed_rot = rot_frame
-                        if mdl_bone.parent_bone_index == -1:
-                            fixed_rot.x += math.radians(-90)
-                            fixed_rot.y += math.radians(180)
-                            fixed_rot.z += math.radians(-90)
-                        fixed_rot = Euler(__swap_components(fixed_rot, var_rot))
-                        # qx = Quaternion([1, 0, 0], fixed_rot[0])
-                        # qy = Quaternion([0, 1, 0], -fixed_rot[1])
-                        # qz = Quaternion([0, 0, 1], -fixed_rot[2])
-                        # fixed_rot: Euler = (qx @ qy @ qz).to_euler()
-                        # fixed_rot.x += mdl_bone.rotation[0]
-                        # fixed_rot.y += mdl_bone.rotation[1]
-                        # fixed_rot.z += mdl_bone.rotation[2]
-                        fixed_rot.rotate(Euler([math.radians(90), math.radians(0), math.radians(0)]))
-                        fixed_rot.rotate(Euler([math.radians(0), math.radians(0), math.radians(90)]))
-                        fixed_rot = (
-                                fixed_rot.to_matrix().to_4x4() @ bl_bone.rotation_euler.to_matrix().to_4x4()).to_euler()
-                        for i in range(3):
-                            rot_curves[i].keyframe_points.add(1)
-                            rot_curves[i].keyframe_points[-1].co = (n, fixed_rot[i])
-
-                        bpy.ops.object.mode_set(mode='OBJECT')
+    bpy.ops.object.mode_set(mode='OBJECT')
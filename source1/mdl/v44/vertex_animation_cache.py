@@ -1,3 +1,5 @@
+from typing import Dict, List, Tuple
+
 import numpy as np
 
 from ....source_shared.base import Base
@@ -12,7 +14,8 @@ logger = BPYLoggingManager().get_logger("Source1::VertexAnimationCache")
 class VertexAnimationCache(Base):
 
     def __init__(self, mdl: Mdl, vvd: Vvd):
-        self.vertex_cache = {}
+        # (flex name, model vertex offset) -> list of (model local vertex indices, deltas)
+        self.flex_deltas: Dict[Tuple[str, int], List[Tuple[np.ndarray, np.ndarray]]] = {}
         self.mdl = mdl
         self.vvd = vvd
 
@@ -29,13 +32,15 @@ class VertexAnimationCache(Base):
                         self.process_mesh(mesh, model.vertex_offset)
         logger.info("[Done] Pre-computing vertex animation cache")
 
-    def process_mesh(self, mesh: MeshV49, vertex_offset, desired_lod=0):
+    def process_mesh(self, mesh: MeshV49, vertex_offset):
         for flex in mesh.flexes:
-            if flex.name not in self.vertex_cache:
-                vertex_cache = self.vertex_cache[flex.name] = np.copy(self.vvd.lod_data[desired_lod]['vertex'])
-            else:
-                vertex_cache = self.vertex_cache[flex.name]
-            vertex_indices = flex.vertex_animations['index'].reshape(-1) + mesh.vertex_index_start + vertex_offset
-            vertex_cache[vertex_indices] = np.add(vertex_cache[vertex_indices], flex.vertex_animations['vertex_delta'])
-
-        pass
+            vertex_indices = flex.vertex_animations['index'].reshape(-1).astype(np.uint32) + mesh.vertex_index_start
+            self.flex_deltas.setdefault((flex.name, vertex_offset), []).append(
+                (vertex_indices, flex.vertex_animations['vertex_delta']))
+
+    def get_model_vertices(self, flex_name: str, vertex_offset: int, vertex_count: int, desired_lod=0):
+        """Materialize positions of one model with single flex applied."""
+        vertices = self.vvd.lod_data[desired_lod]['vertex'][vertex_offset:vertex_offset + vertex_count].copy()
+        for vertex_indices, deltas in self.flex_deltas.get((flex_name, vertex_offset), []):
+            vertices[vertex_indices] = vertices[vertex_indices] + deltas
+        return vertices
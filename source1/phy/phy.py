@@ -2,7 +2,7 @@ from typing import List, Optional
 
 import numpy as np
 
-from ...source_shared.base import Base
+from ...source_shared.base import Base, with_storage
 from ...utilities.byte_io_mdl import ByteIO
 
 
@@ -148,12 +148,15 @@ class SolidHeader:
 
 
 class Phy(Base):
+    @with_storage
     def __init__(self, filepath):
+        self.begin_storage()
         self.reader = ByteIO(filepath)
         self.header = Header()
         self.solids = []  # type:List[SolidHeader]
         self.kv = ''
 
+    @with_storage
     def read(self):
         reader = self.reader
         self.header.read(reader)
@@ -21,9 +21,9 @@ def is_vtflib_supported():
         return False
 
 
-if is_vtflib_supported() and not NO_BPY:
+if not NO_BPY:
+    # Import falls back to built-in decoder when VTFLib can't be loaded
     from .import_vtf import import_texture
-    from .export_vtf import export_texture
     from .cubemap_to_envmap import load_skybox_texture, SkyboxException
 else:
 
@@ -38,6 +38,9 @@ else:
     def load_skybox_texture(skyname):
         return
 
+if is_vtflib_supported() and not NO_BPY:
+    from .export_vtf import export_texture
+else:
 
     def export_texture(blender_texture, path, image_format=None, filter_mode=None):
         pass
@@ -1,7 +1,8 @@
 import bpy
 import numpy as np
 
-from ..vtf.VTFWrapper import VTFLib
+from . import is_vtflib_supported
+from .vtf_file import VTFFile, VTFException
 from ...bpy_utilities.logger import BPYLoggingManager
 
 log_manager = BPYLoggingManager()
@@ -36,12 +37,50 @@ def texture_from_data(name, rgba_data, image_width, image_height, update):
     return image
 
 
+_vtf_lib_unavailable = False
+
+
+def _get_vtf_lib():
+    global _vtf_lib_unavailable
+    if _vtf_lib_unavailable:
+        return None
+    if not is_vtflib_supported():
+        _vtf_lib_unavailable = True
+        return None
+    try:
+        # Wrapper module raises on platforms without bundled library, so it's imported only here
+        from .VTFWrapper import VTFLib
+        return VTFLib.VTFLib()
+    except (OSError, NotImplementedError) as ex:
+        logger.warn(f'Failed to load VTFLib: "{ex}", using built-in VTF decoder')
+        _vtf_lib_unavailable = True
+        return None
+
+
 def load_texture(file_object):
-    vtf_lib = VTFLib.VTFLib()
+    data = file_object.read()
+    vtf_lib = _get_vtf_lib()
+    if vtf_lib is not None:
+        result = _load_texture_vtflib(vtf_lib, data)
+        if result is not None:
+            return result
+    return _load_texture_numpy(data)
+
+
+def _load_texture_numpy(data: bytes):
+    try:
+        vtf = VTFFile(data).read()
+        rgba_data = np.flipud(vtf.decode_rgba8888())
+        return rgba_data, vtf.width, vtf.height
+    except (VTFException, ValueError) as ex:
+        logger.error('Caught exception "{}" '.format(ex))
+
+
+def _load_texture_vtflib(vtf_lib, data: bytes):
     rgba_data = None
     try:
 
-        vtf_lib.image_load_from_buffer(file_object.read())
+        vtf_lib.image_load_from_buffer(data)
         if not vtf_lib.image_is_loaded():
             raise Exception("Failed to load texture :{}".format(vtf_lib.get_last_error()))
         image_width = vtf_lib.width()
@@ -0,0 +1,262 @@
+from concurrent.futures import ThreadPoolExecutor
+from enum import IntEnum, IntFlag
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from ...utilities.byte_io_mdl import ByteIO
+from ...utilities.texture_decoders import decode_dxt1, decode_dxt3, decode_dxt5
+
+
+class VTFImageFormat(IntEnum):
+    NONE = -1
+    RGBA8888 = 0
+    ABGR8888 = 1
+    RGB888 = 2
+    BGR888 = 3
+    RGB565 = 4
+    I8 = 5
+    IA88 = 6
+    P8 = 7
+    A8 = 8
+    RGB888_BLUESCREEN = 9
+    BGR888_BLUESCREEN = 10
+    ARGB8888 = 11
+    BGRA8888 = 12
+    DXT1 = 13
+    DXT3 = 14
+    DXT5 = 15
+    BGRX8888 = 16
+    BGR565 = 17
+    BGRX5551 = 18
+    BGRA4444 = 19
+    DXT1_ONEBITALPHA = 20
+    BGRA5551 = 21
+    UV88 = 22
+    UVWQ8888 = 23
+    RGBA16161616F = 24
+    RGBA16161616 = 25
+    UVLX8888 = 26
+
+
+class VTFFlags(IntFlag):
+    POINT_SAMPLE = 0x00000001
+    TRILINEAR = 0x00000002
+    CLAMP_S = 0x00000004
+    CLAMP_T = 0x00000008
+    ANISOTROPIC = 0x00000010
+    HINT_DXT5 = 0x00000020
+    NORMAL = 0x00000080
+    NO_MIP = 0x00000100
+    NO_LOD = 0x00000200
+    ONE_BIT_ALPHA = 0x00001000
+    EIGHT_BIT_ALPHA = 0x00002000
+    ENVMAP = 0x00004000
+
+
+class VTFException(Exception):
+    pass
+
+
+# Bytes per 4x4 block
+_BLOCK_FORMATS = {
+    VTFImageFormat.DXT1: 8,
+    VTFImageFormat.DXT1_ONEBITALPHA: 8,
+    VTFImageFormat.DXT3: 16,
+    VTFImageFormat.DXT5: 16,
+}
+
+# Source channels of 8 bit per channel formats, L is replicated into RGB, X is ignored
+_CHANNEL_ORDERS = {
+    VTFImageFormat.RGBA8888: 'RGBA',
+    VTFImageFormat.ABGR8888: 'ABGR',
+    VTFImageFormat.RGB888: 'RGB',
+    VTFImageFormat.BGR888: 'BGR',
+    VTFImageFormat.I8: 'L',
+    VTFImageFormat.IA88: 'LA',
+    VTFImageFormat.A8: 'A',
+    VTFImageFormat.RGB888_BLUESCREEN: 'RGB',
+    VTFImageFormat.BGR888_BLUESCREEN: 'BGR',
+    VTFImageFormat.ARGB8888: 'ARGB',
+    VTFImageFormat.BGRA8888: 'BGRA',
+    VTFImageFormat.BGRX8888: 'BGRX',
+    VTFImageFormat.UV88: 'RG',
+    VTFImageFormat.UVWQ8888: 'RGBA',
+    VTFImageFormat.UVLX8888: 'RGBA',
+}
+
+_PIXEL_SIZES = {
+    VTFImageFormat.RGB565: 2,
+    VTFImageFormat.P8: 1,
+    VTFImageFormat.BGR565: 2,
+    VTFImageFormat.BGRX5551: 2,
+    VTFImageFormat.BGRA4444: 2,
+    VTFImageFormat.BGRA5551: 2,
+    VTFImageFormat.RGBA16161616F: 8,
+    VTFImageFormat.RGBA16161616: 8,
+}
+_PIXEL_SIZES.update({image_format: len(order) for image_format, order in _CHANNEL_ORDERS.items()})
+
+RESOURCE_LOW_RES_IMAGE = b'\x01\x00\x00'
+RESOURCE_HIGH_RES_IMAGE = b'\x30\x00\x00'
+RESOURCE_NO_DATA = 0x02
+
+
+def get_image_size(image_format: VTFImageFormat, width: int, height: int, depth: int = 1) -> int:
+    if image_format in _BLOCK_FORMATS:
+        return max(1, (width + 3) // 4) * max(1, (height + 3) // 4) * _BLOCK_FORMATS[image_format] * depth
+    if image_format not in _PIXEL_SIZES:
+        raise VTFException(f'Unsupported image format {image_format!r}')
+    return width * height * depth * _PIXEL_SIZES[image_format]
+
+
+def decode_image(data: bytes, image_format: VTFImageFormat, width: int, height: int) -> np.ndarray:
+    """Decode single image into (height, width, 4) array, first row is the top one.
+
+    Float formats produce float32 arrays, everything else uint8.
+    """
+    if image_format in (VTFImageFormat.DXT1, VTFImageFormat.DXT1_ONEBITALPHA):
+        return decode_dxt1(data, width, height)
+    if image_format == VTFImageFormat.DXT3:
+        return decode_dxt3(data, width, height)
+    if image_format == VTFImageFormat.DXT5:
+        return decode_dxt5(data, width, height)
+    if image_format == VTFImageFormat.RGBA16161616F:
+        return np.frombuffer(data, np.float16, width * height * 4).reshape((height, width, 4)).astype(np.float32)
+    channel_order = _CHANNEL_ORDERS.get(image_format, None)
+    if channel_order is None:
+        raise VTFException(f'Decoding of {image_format!r} is not supported')
+
+    pixels = np.frombuffer(data, np.uint8, width * height * len(channel_order))
+    pixels = pixels.reshape((height, width, len(channel_order)))
+    rgba = np.zeros((height, width, 4), np.uint8)
+    rgba[:, :, 3] = 255
+    for channel_id, channel in enumerate(channel_order):
+        if channel == 'L':
+            rgba[:, :, :3] = pixels[:, :, channel_id:channel_id + 1]
+        elif channel != 'X':
+            rgba[:, :, 'RGBA'.index(channel)] = pixels[:, :, channel_id]
+    return rgba
+
+
+class VTFFile:
+    """Pure numpy VTF reader, decodes single mip level without VTFLib."""
+
+    def __init__(self, filepath_or_object: Union[str, Path, BinaryIO, bytes]):
+        self.reader = ByteIO(filepath_or_object)
+        self.version = (0, 0)
+        self.header_size = 0
+        self.width = 0
+        self.height = 0
+        self.depth = 1
+        self.flags = VTFFlags(0)
+        self.frame_count = 1
+        self.first_frame = 0
+        self.reflectivity = (0.0, 0.0, 0.0)
+        self.bumpmap_scale = 1.0
+        self.image_format = VTFImageFormat.NONE
+        self.mip_count = 1
+        self.low_res_format = VTFImageFormat.NONE
+        self.low_res_width = 0
+        self.low_res_height = 0
+        self.resources: Dict[bytes, int] = {}
+
+    def read(self):
+        reader = self.reader
+        magic = reader.read(4)
+        if magic != b'VTF\x00':
+            raise VTFException(f'Unknown VTF magic {magic!r}')
+        self.version = reader.read_fmt('2I')
+        self.header_size = reader.read_uint32()
+        self.width, self.height = reader.read_fmt('2H')
+        self.flags = VTFFlags(reader.read_uint32())
+        self.frame_count, self.first_frame = reader.read_fmt('2H')
+        reader.skip(4)
+        self.reflectivity = reader.read_fmt('3f')
+        reader.skip(4)
+        self.bumpmap_scale = reader.read_float()
+        self.image_format = VTFImageFormat(reader.read_int32())
+        self.mip_count = reader.read_uint8()
+        self.low_res_format = VTFImageFormat(reader.read_int32())
+        self.low_res_width, self.low_res_height = reader.read_fmt('2B')
+        if self.version >= (7, 2):
+            self.depth = max(1, reader.read_uint16())
+
+        if self.version >= (7, 3):
+            reader.skip(3)
+            resource_count = reader.read_uint32()
+            reader.skip(8)
+            for _ in range(resource_count):
+                tag = reader.read(3)
+                resource_flags = reader.read_uint8()
+                offset = reader.read_uint32()
+                if resource_flags & RESOURCE_NO_DATA and tag in (RESOURCE_LOW_RES_IMAGE, RESOURCE_HIGH_RES_IMAGE):
+                    continue
+                self.resources[tag] = offset
+        else:
+            low_res_size = 0
+            if self.low_res_format != VTFImageFormat.NONE:
+                low_res_size = get_image_size(self.low_res_format, self.low_res_width, self.low_res_height)
+            self.resources[RESOURCE_LOW_RES_IMAGE] = self.header_size
+            self.resources[RESOURCE_HIGH_RES_IMAGE] = self.header_size + low_res_size
+        return self
+
+    @property
+    def face_count(self):
+        if not self.flags & VTFFlags.ENVMAP:
+            return 1
+        # Older versions store additional spheremap face
+        return 7 if self.version < (7, 5) and self.first_frame != 0xFFFF else 6
+
+    def get_mip_size(self, mip_level: int):
+        return (max(1, self.width >> mip_level),
+                max(1, self.height >> mip_level),
+                max(1, self.depth >> mip_level))
+
+    def get_image_offset(self, mip_level: int = 0, frame: int = 0, face: int = 0, slice_id: int = 0) -> int:
+        if RESOURCE_HIGH_RES_IMAGE not in self.resources:
+            raise VTFException('VTF file has no image data')
+        offset = self.resources[RESOURCE_HIGH_RES_IMAGE]
+        # Mips are stored from the smallest to the largest one
+        for mip in range(self.mip_count - 1, mip_level, -1):
+            width, height, depth = self.get_mip_size(mip)
+            offset += get_image_size(self.image_format, width, height, depth) * self.frame_count * self.face_count
+        width, height, depth = self.get_mip_size(mip_level)
+        slice_size = get_image_size(self.image_format, width, height)
+        return offset + slice_size * (slice_id + depth * (face + self.face_count * frame))
+
+    def get_image_data(self, mip_level: int = 0, frame: int = 0, face: int = 0, slice_id: int = 0) -> bytes:
+        mip_level = min(mip_level, self.mip_count - 1)
+        width, height, _ = self.get_mip_size(mip_level)
+        self.reader.seek(self.get_image_offset(mip_level, frame, face, slice_id))
+        size = get_image_size(self.image_format, width, height)
+        data = self.reader.read(size)
+        if len(data) != size:
+            raise VTFException(f'Image data is truncated, expected {size} bytes, got {len(data)}')
+        return data
+
+    def decode(self, mip_level: int = 0, frame: int = 0, face: int = 0, slice_id: int = 0) -> np.ndarray:
+        """Decode image into (height, width, 4) array, first row is the top one."""
+        mip_level = min(mip_level, self.mip_count - 1)
+        width, height, _ = self.get_mip_size(mip_level)
+        return decode_image(self.get_image_data(mip_level, frame, face, slice_id), self.image_format, width, height)
+
+    def decode_rgba8888(self, mip_level: int = 0) -> np.ndarray:
+        """Same as decode, but HDR images are clamped into uint8 range."""
+        pixels = self.decode(mip_level)
+        if pixels.dtype != np.uint8:
+            pixels = (np.clip(pixels, 0, 1) * 255 + 0.5).astype(np.uint8)
+        return pixels
+
+
+def _decode_vtf(file: Union[str, Path, BinaryIO, bytes], mip_level: int) -> np.ndarray:
+    return VTFFile(file).read().decode_rgba8888(mip_level)
+
+
+def decode_vtf_files(files: Iterable[Union[str, Path, BinaryIO, bytes]], mip_level: int = 0,
+                     workers: Optional[int] = None) -> List[np.ndarray]:
+    """Decode many VTF files to RGBA8888 on a thread pool, numpy releases GIL while decoding."""
+    files = list(files)
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(_decode_vtf, files, [mip_level] * len(files)))
@@ -8,7 +8,9 @@ from ...utilities.byte_io_mdl import ByteIO
 
 def open_vtx(filepath_or_object: Union[Path, str, BinaryIO]):
     reader = ByteIO(filepath_or_object)
-    version = reader.read_int32()
+    # Shared file objects must stay at the start for the Vtx reader
+    with reader.save_current_pos():
+        version = reader.read_int32()
     reader.file = None
     del reader
     if version == 6:
@@ -2,7 +2,7 @@ import struct
 from typing import List
 
 from .structs.material_replacement_list import MaterialReplacementList
-from ....source_shared.base import Base
+from ....source_shared.base import Base, with_storage
 from ....utilities.byte_io_mdl import ByteIO
 
 from .structs.header import Header
@@ -10,12 +10,15 @@ from .structs.bodypart import BodyPart
 
 
 class Vtx(Base):
+    @with_storage
     def __init__(self, filepath):
+        self.begin_storage()
         self.reader = ByteIO(filepath)
         self.header = Header()
         self.body_parts = []  # type: List[BodyPart]
         self.material_replacement_lists = []  # type: List[MaterialReplacementList]
 
+    @with_storage
     def read(self):
         self.header.read(self.reader)
 
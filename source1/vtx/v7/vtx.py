@@ -2,7 +2,7 @@ import struct
 from typing import List
 
 from .structs.material_replacement_list import MaterialReplacementList
-from ....source_shared.base import Base
+from ....source_shared.base import Base, with_storage
 from ....utilities.byte_io_mdl import ByteIO
 
 from ..v6.vtx import Vtx as Vtx6
@@ -11,6 +11,7 @@ from .structs.bodypart import BodyPart
 
 
 class Vtx(Vtx6):
+    @with_storage
     def read(self):
         self.header.read(self.reader)
 
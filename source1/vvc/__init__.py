@@ -3,18 +3,21 @@ from typing import List, Dict
 import numpy as np
 
 from .header import Header
-from ...source_shared.base import Base
+from ...source_shared.base import Base, with_storage
 from ...utilities.byte_io_mdl import ByteIO
 
 
 class Vvc(Base):
+    @with_storage
     def __init__(self, filepath):
+        self.begin_storage()
         self.reader = ByteIO(filepath)
         self.header = Header()
         self.color_data = []
         self.secondary_uv = []
         self.lod_data = {}  # type:Dict[int,np.ndarray]
 
+    @with_storage
     def read(self):
         self.header.read(self.reader)
         self.reader.seek(self.header.vertex_colors_offset)
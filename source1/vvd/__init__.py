@@ -4,7 +4,7 @@ import numpy as np
 
 from .header import Header
 from .fixup import Fixup
-from ...source_shared.base import Base
+from ...source_shared.base import Base, with_storage
 from ...utilities.byte_io_mdl import ByteIO
 
 
@@ -17,13 +17,16 @@ class Vvd(Base):
                          ("uv", np.float32, 2),
                          ])
 
+    @with_storage
     def __init__(self, filepath):
+        self.begin_storage()
         self.reader = ByteIO(filepath)
         self.header = Header()
         self._vertices = np.array([], dtype=self.vertex_t)
         self.fixups = []  # type:List[Fixup]
         self.lod_data = {}  # type:Dict[int,np.ndarray]
 
+    @with_storage
     def read(self):
         self.header.read(self.reader)
 
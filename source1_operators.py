@@ -8,7 +8,7 @@ from .bpy_utilities.material_loader.material_loader import Source1MaterialLoader
 from .source1.bsp.import_bsp import BSP, BPSPropCache
 from .source1.dmx.load_sfm_session import load_session
 from .source1.mdl.model_loader import import_model_from_full_path
-from .source1.vtf import is_vtflib_supported
+from .source1.vtf import is_vtflib_supported, import_texture, load_skybox_texture
 
 from .content_providers.content_manager import ContentManager
 from .utilities.math_utilities import HAMMER_UNIT_TO_METERS
@@ -56,7 +56,7 @@ class MDLImport_OT_operator(bpy.types.Operator):
                                                           unique_material_names=self.unique_materials_names)
             put_into_collections(model_container, mdl_path.stem, bodygroup_grouping=self.bodygroup_grouping)
 
-            if self.import_textures and is_vtflib_supported():
+            if self.import_textures:
                 try:
 
                     import_materials(model_container.mdl, use_bvlg=self.use_bvlg)
@@ -121,6 +121,7 @@ class BSPImport_OT_operator(bpy.types.Operator):
     import_textures: BoolProperty(name="Import materials", default=True, subtype='UNSIGNED')
     import_cubemaps: BoolProperty(name="Import cubemaps", default=False, subtype='UNSIGNED')
     import_decal: BoolProperty(name="Import decals", default=False, subtype='UNSIGNED')
+    merge_displacements: BoolProperty(name="Merge displacements by material", default=False, subtype='UNSIGNED')
     use_bvlg: BoolProperty(name="Use BlenderVertexLitGeneric shader", default=True, subtype='UNSIGNED')
 
     filter_glob: StringProperty(default="*.bsp", options={'HIDDEN'})
@@ -134,7 +135,7 @@ class BSPImport_OT_operator(bpy.types.Operator):
 
         BPSPropCache().purge()
 
-        bsp_map.load_disp()
+        bsp_map.load_disp(self.merge_displacements)
         bsp_map.load_entities()
         bsp_map.load_static_props()
         if self.import_cubemaps:
@@ -181,110 +182,108 @@ class DMXImporter_OT_operator(bpy.types.Operator):
         return {'RUNNING_MODAL'}
 
 
-if is_vtflib_supported():
-    from .source1.vtf.export_vtf import export_texture
-    from .source1.vtf.import_vtf import import_texture
-    from .source1.vtf.cubemap_to_envmap import load_skybox_texture
+# noinspection PyUnresolvedReferences,PyPep8Naming
+class VTFImport_OT_operator(bpy.types.Operator):
+    """Load Source Engine VTF texture"""
+    bl_idname = "import_texture.vtf"
+    bl_label = "Import VTF"
+    bl_options = {'UNDO'}
 
+    filepath: StringProperty(subtype='FILE_PATH', )
+    files: CollectionProperty(name='File paths', type=bpy.types.OperatorFileListElement)
+    filter_glob: StringProperty(default="*.vtf", options={'HIDDEN'})
 
-    # noinspection PyUnresolvedReferences,PyPep8Naming
-    class VTFImport_OT_operator(bpy.types.Operator):
-        """Load Source Engine VTF texture"""
-        bl_idname = "import_texture.vtf"
-        bl_label = "Import VTF"
-        bl_options = {'UNDO'}
-
-        filepath: StringProperty(subtype='FILE_PATH', )
-        files: CollectionProperty(name='File paths', type=bpy.types.OperatorFileListElement)
-        filter_glob: StringProperty(default="*.vtf", options={'HIDDEN'})
+    def execute(self, context):
+        if Path(self.filepath).is_file():
+            directory = Path(self.filepath).parent.absolute()
+        else:
+            directory = Path(self.filepath).absolute()
+        for file in self.files:
+            import_texture(file.name, (directory / file.name).open('rb'), True)
+        return {'FINISHED'}
 
-        def execute(self, context):
-            if Path(self.filepath).is_file():
-                directory = Path(self.filepath).parent.absolute()
-            else:
-                directory = Path(self.filepath).absolute()
-            for file in self.files:
-                import_texture(file.name, (directory / file.name).open('rb'), True)
-            return {'FINISHED'}
+    def invoke(self, context, event):
+        wm = context.window_manager
+        wm.fileselect_add(self)
+        return {'RUNNING_MODAL'}
 
-        def invoke(self, context, event):
-            wm = context.window_manager
-            wm.fileselect_add(self)
-            return {'RUNNING_MODAL'}
 
+# noinspection PyUnresolvedReferences,PyPep8Naming
+class SkyboxImport_OT_operator(bpy.types.Operator):
+    """Load Source Engine Skybox texture"""
+    bl_idname = "import_texture.vtf_skybox"
+    bl_label = "Import Skybox"
+    bl_options = {'UNDO'}
 
-    # noinspection PyUnresolvedReferences,PyPep8Naming
-    class SkyboxImport_OT_operator(bpy.types.Operator):
-        """Load Source Engine Skybox texture"""
-        bl_idname = "import_texture.vtf_skybox"
-        bl_label = "Import Skybox"
-        bl_options = {'UNDO'}
-
-        filepath: StringProperty(subtype='FILE_PATH', )
-        files: CollectionProperty(name='File paths', type=bpy.types.OperatorFileListElement)
-        filter_glob: StringProperty(default="*.vmt", options={'HIDDEN'})
-
-        resolution: EnumProperty(
-            name="Skybox texture resolution",
-            description="Resolution of final skybox texture",
-            items=(
-                ('1024', "1024x512", "256mb free ram required"),
-                ('2048', "2048x1024", "512mb free ram required"),
-                ('4096', "4096x2048", "1Gb free ram required"),
-                ('8192', "8192x4096", "2Gb free ram required"),
-                ('16384', "16384x8192", "8Gb free ram required")),
-            default='2048',
-        )
+    filepath: StringProperty(subtype='FILE_PATH', )
+    files: CollectionProperty(name='File paths', type=bpy.types.OperatorFileListElement)
+    filter_glob: StringProperty(default="*.vmt", options={'HIDDEN'})
+
+    resolution: EnumProperty(
+        name="Skybox texture resolution",
+        description="Resolution of final skybox texture",
+        items=(
+            ('1024', "1024x512", "256mb free ram required"),
+            ('2048', "2048x1024", "512mb free ram required"),
+            ('4096', "4096x2048", "1Gb free ram required"),
+            ('8192', "8192x4096", "2Gb free ram required"),
+            ('16384', "16384x8192", "8Gb free ram required")),
+        default='2048',
+    )
 
-        def execute(self, context):
-            if Path(self.filepath).is_file():
-                directory = Path(self.filepath).parent.absolute()
-            else:
-                directory = Path(self.filepath).absolute()
-            ContentManager().scan_for_content(directory)
-            for file in self.files:
-                skybox_name = Path(file.name).stem
-                load_skybox_texture(skybox_name[:-2], int(self.resolution))
-            return {'FINISHED'}
+    def execute(self, context):
+        if Path(self.filepath).is_file():
+            directory = Path(self.filepath).parent.absolute()
+        else:
+            directory = Path(self.filepath).absolute()
+        ContentManager().scan_for_content(directory)
+        for file in self.files:
+            skybox_name = Path(file.name).stem
+            load_skybox_texture(skybox_name[:-2], int(self.resolution))
+        return {'FINISHED'}
 
-        def invoke(self, context, event):
-            wm = context.window_manager
-            wm.fileselect_add(self)
-            return {'RUNNING_MODAL'}
+    def invoke(self, context, event):
+        wm = context.window_manager
+        wm.fileselect_add(self)
+        return {'RUNNING_MODAL'}
 
 
-    # noinspection PyUnresolvedReferences,PyPep8Naming
-    class VMTImport_OT_operator(bpy.types.Operator):
-        """Load Source Engine VMT material"""
-        bl_idname = "import_texture.vmt"
-        bl_label = "Import VMT"
-        bl_options = {'UNDO'}
+# noinspection PyUnresolvedReferences,PyPep8Naming
+class VMTImport_OT_operator(bpy.types.Operator):
+    """Load Source Engine VMT material"""
+    bl_idname = "import_texture.vmt"
+    bl_label = "Import VMT"
+    bl_options = {'UNDO'}
 
-        filepath: StringProperty(
-            subtype='FILE_PATH',
-        )
-        files: CollectionProperty(type=bpy.types.PropertyGroup)
-        filter_glob: StringProperty(default="*.vmt", options={'HIDDEN'})
-        override: BoolProperty(default=False, name='Override existing?')
+    filepath: StringProperty(
+        subtype='FILE_PATH',
+    )
+    files: CollectionProperty(type=bpy.types.PropertyGroup)
+    filter_glob: StringProperty(default="*.vmt", options={'HIDDEN'})
+    override: BoolProperty(default=False, name='Override existing?')
 
-        def execute(self, context):
-            content_manager = ContentManager()
-            if Path(self.filepath).is_file():
-                directory = Path(self.filepath).parent.absolute()
-            else:
-                directory = Path(self.filepath).absolute()
-            for file in self.files:
-                mat = Source1MaterialLoader((directory / file.name).open('rb'), Path(file.name).stem)
-                if mat.create_material() == 'EXISTS' and not self.override:
-                    self.report({'INFO'}, '{} material already exists')
-            content_manager.flush_cache()
-            content_manager.clean()
-            return {'FINISHED'}
+    def execute(self, context):
+        content_manager = ContentManager()
+        if Path(self.filepath).is_file():
+            directory = Path(self.filepath).parent.absolute()
+        else:
+            directory = Path(self.filepath).absolute()
+        for file in self.files:
+            mat = Source1MaterialLoader((directory / file.name).open('rb'), Path(file.name).stem)
+            if mat.create_material() == 'EXISTS' and not self.override:
+                self.report({'INFO'}, '{} material already exists')
+        content_manager.flush_cache()
+        content_manager.clean()
+        return {'FINISHED'}
 
-        def invoke(self, context, event):
-            wm = context.window_manager
-            wm.fileselect_add(self)
-            return {'RUNNING_MODAL'}
+    def invoke(self, context, event):
+        wm = context.window_manager
+        wm.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
+if is_vtflib_supported():
+    from .source1.vtf.export_vtf import export_texture
 
 
     # noinspection PyUnresolvedReferences,PyPep8Naming
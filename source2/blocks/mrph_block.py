@@ -1,4 +1,5 @@
 import struct
+from typing import Dict, List, Tuple
 
 from .data_block import DATA
 import numpy as np
@@ -11,7 +12,17 @@ class MRPH(DATA):
 
     def __init__(self, valve_file, info_block):
         super().__init__(valve_file, info_block)
-        self.flex_data = {}
+        self.bundle_count = 0
+        self._morph_atlas = np.zeros((0, 0, 4), np.uint8)
+        self._lookup_width = 0
+        # morph name -> rect sizes and destinations, per bundle atlas positions, ranges and offsets
+        self._morph_rects: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = {}
+        # morph name -> vertex ids and (bundle, vertex, 4) deltas, filled on first access
+        self._morph_deltas: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @property
+    def morph_names(self) -> List[str]:
+        return list(self._morph_rects.keys())
 
     def read_morphs(self):
         from ..resouce_types.texture import ValveCompiledTexture
@@ -27,9 +38,9 @@ class MRPH(DATA):
         morph_atlas.read_block_info()
         morph_atlas_data = morph_atlas.get_data_block(block_name="DATA")[0]
         morph_atlas_data.read_image(False)
+        if morph_atlas_data.image_data is None:
+            return False
         raw_flex_data = np.frombuffer(morph_atlas_data.image_data, dtype=np.uint8)
-        width = self.data['m_nWidth']
-        height = self.data['m_nHeight']
         encoding_type = self.data['m_nEncodingType']
         lookup_type = self.data['m_nLookupType']
         if isinstance(encoding_type, tuple):
@@ -37,31 +48,57 @@ class MRPH(DATA):
             lookup_type = lookup_type[0].split('::')[-1]
         assert lookup_type == 'LOOKUP_TYPE_VERTEX_ID', "Unknown lookup type"
         assert encoding_type == 'ENCODING_TYPE_OBJECT_SPACE', "Unknown encoding type"
-        bundle_types = self.data['m_bundleTypes']
-        raw_flex_data = raw_flex_data.reshape((morph_atlas_data.width, morph_atlas_data.height, 4))
+        self.set_morph_atlas(raw_flex_data.reshape((morph_atlas_data.height, morph_atlas_data.width, 4)))
+        return True
 
+    def set_morph_atlas(self, atlas: np.ndarray):
+        """Collect rects of every morph, deltas are decoded from the atlas only when morph is requested."""
+        atlas_height, atlas_width = atlas.shape[:2]
+        self._morph_atlas = atlas
+        self._lookup_width = self.data['m_nWidth']
+        self.bundle_count = len(self.data['m_bundleTypes'])
+        self._morph_rects.clear()
+        self._morph_deltas.clear()
         for morph_datas in self.data['m_morphDatas']:
-            morph_name = morph_datas['m_name']
-            self.flex_data[morph_name] = np.zeros((len(bundle_types), height, width, 4), dtype=np.float32)
-            for n, rect in enumerate(morph_datas['m_morphRectDatas']):
-                rect_width = round(rect['m_flUWidthSrc'] * morph_atlas_data.width)
-                rect_height = round(rect['m_flVHeightSrc'] * morph_atlas_data.height)
-                dst_x = rect['m_nXLeftDst']
-                dst_y = rect['m_nYTopDst']
-                for c, bundle in enumerate(rect['m_bundleDatas']):
-                    rect_u = round(bundle['m_flULeftSrc'] * morph_atlas_data.width)
-                    rect_v = round(bundle['m_flVTopSrc'] * morph_atlas_data.height)
-                    morph_data_rect = raw_flex_data[rect_v:rect_v + rect_height, rect_u:rect_u + rect_width, :]
+            rects = morph_datas['m_morphRectDatas']
+            rect_count = len(rects)
+            sizes = np.array([(round(rect['m_flUWidthSrc'] * atlas_width),
+                               round(rect['m_flVHeightSrc'] * atlas_height),
+                               rect['m_nXLeftDst'], rect['m_nYTopDst']) for rect in rects], np.int64)
+            bundles = [bundle for rect in rects for bundle in rect['m_bundleDatas']]
+            sources = np.array([(round(bundle['m_flULeftSrc'] * atlas_width),
+                                 round(bundle['m_flVTopSrc'] * atlas_height)) for bundle in bundles], np.int64)
+            ranges = np.array([bundle['m_ranges'] for bundle in bundles], np.float64)
+            offsets = np.array([bundle['m_offsets'] for bundle in bundles], np.float64)
+            self._morph_rects[morph_datas['m_name']] = (sizes.reshape((rect_count, 4)),
+                                                        sources.reshape((rect_count, self.bundle_count, 2)),
+                                                        ranges.reshape((rect_count, self.bundle_count, 4)),
+                                                        offsets.reshape((rect_count, self.bundle_count, 4)))
 
-                    transformed_data = np.divide(morph_data_rect, 255)
-                    transformed_data = np.multiply(transformed_data, bundle['m_ranges'])
-                    transformed_data = np.add(transformed_data, bundle['m_offsets'])
-                    y_slice = slice(dst_y, dst_y + rect_height)
-                    x_slice = slice(dst_x, dst_x + rect_width)
-                    self.flex_data[morph_name][c, y_slice, x_slice, :] = transformed_data
-        for k, v in self.flex_data.items():
-            self.flex_data[k] = v.reshape((len(bundle_types), width * height, 4))
-        return True
+    def get_morph_deltas(self, morph_name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ids of vertices touched by morph and their (bundle, vertex, 4) deltas."""
+        if morph_name in self._morph_deltas:
+            return self._morph_deltas[morph_name]
+        sizes, sources, ranges, offsets = self._morph_rects[morph_name]
+        widths, heights, dst_x, dst_y = sizes.T
+        pixel_counts = widths * heights
+        # Gather pixels of all rects at once, every pixel knows its rect and position inside of it
+        rect_ids = np.repeat(np.arange(pixel_counts.size), pixel_counts)
+        local_ids = np.arange(rect_ids.size) - np.repeat(np.cumsum(pixel_counts) - pixel_counts, pixel_counts)
+        rows = local_ids // widths[rect_ids]
+        columns = local_ids % widths[rect_ids]
+        vertex_ids = (dst_y[rect_ids] + rows) * self._lookup_width + dst_x[rect_ids] + columns
+        pixels = self._morph_atlas[sources[rect_ids, :, 1] + rows[:, None], sources[rect_ids, :, 0] + columns[:, None]]
+        deltas = (pixels / 255 * ranges[rect_ids] + offsets[rect_ids]).astype(np.float32)
+
+        # Later rects overwrite earlier ones
+        unique_ids, last_ids = np.unique(vertex_ids[::-1], return_index=True)
+        if unique_ids.size != vertex_ids.size:
+            keep = vertex_ids.size - 1 - last_ids
+            vertex_ids, deltas = vertex_ids[keep], deltas[keep]
+        result = vertex_ids, np.ascontiguousarray(deltas.transpose((1, 0, 2)))
+        self._morph_deltas[morph_name] = result
+        return result
 
     def rebuild_flex_expressions(self):
         flex_rules = {}
@@ -1,5 +1,6 @@
+from concurrent.futures import ThreadPoolExecutor
 from enum import IntEnum, IntFlag
-from typing import Optional
+from typing import Iterable, List, Optional
 
 import numpy as np
 
@@ -7,25 +8,22 @@ from ...utilities.byte_io_mdl import ByteIO
 
 from .base_block import DataBlock
 
+from ...utilities.lz4_wrapper import LZ4Wrapper
+from ...utilities.texture_decoders import (decode_bc4, decode_bc5, decode_bc6h, decode_bc7, decode_dxt1,
+                                           decode_dxt5)
+
 # noinspection PyUnresolvedReferences
 try:
     from ..utils.PySourceIOUtils import *
-    from ...utilities.lz4_wrapper import LZ4Wrapper
-
-
-    def uncompress(compressed_data, _b, decompressed_size):
-        decoder = LZ4Wrapper()
-        return decoder.decompress_safe(compressed_data, decompressed_size)
-
 
     NO_SOURCE_IO_UTILS = False
 except ImportError:
     NO_SOURCE_IO_UTILS = True
-    from ..utils.lz4 import uncompress as uncompress_tmp
 
 
-    def uncompress(a, _b, _c):
-        return uncompress_tmp(a)
+def uncompress(compressed_data, _b, decompressed_size):
+    decoder = LZ4Wrapper()
+    return decoder.decompress_safe(compressed_data, decompressed_size)
 
 
 class VTexFlags(IntFlag):
@@ -96,6 +94,60 @@ class VTexFormat(IntEnum):
     BGRA8888 = 28
 
 
+def _decode_raw(data: bytes, width: int, height: int, dtype, channel_order='RGBA'):
+    pixels = np.frombuffer(data, dtype, width * height * 4).reshape((height, width, 4))
+    return pixels[:, :, ['RGBA'.index(channel) for channel in channel_order]]
+
+
+# Decoders producing (height, width, 4) arrays, first row is the top one
+_TEXTURE_DECODERS = {
+    VTexFormat.DXT1: decode_dxt1,
+    VTexFormat.DXT5: decode_dxt5,
+    VTexFormat.ATI1N: decode_bc4,
+    VTexFormat.ATI2N: decode_bc5,
+    VTexFormat.BC6H: decode_bc6h,
+    VTexFormat.BC7: decode_bc7,
+    VTexFormat.RGBA8888: lambda data, width, height: _decode_raw(data, width, height, np.uint8),
+    VTexFormat.BGRA8888: lambda data, width, height: _decode_raw(data, width, height, np.uint8, 'BGRA'),
+    VTexFormat.RGBA16161616F: lambda data, width, height: _decode_raw(data, width, height,
+                                                                      np.float16).astype(np.float32),
+}
+HDR_FORMATS = (VTexFormat.BC6H, VTexFormat.RGBA16161616F)
+# Formats handled by PySourceIOUtils when it is available
+_NATIVE_FORMATS = (VTexFormat.DXT1, VTexFormat.DXT5, VTexFormat.ATI1N, VTexFormat.ATI2N, VTexFormat.BC7)
+
+
+def decode_texture(data: bytes, image_format: VTexFormat, width: int, height: int) -> np.ndarray:
+    """Decode single image into (height, width, 4) array, HDR formats produce float32 arrays, others uint8."""
+    if image_format not in _TEXTURE_DECODERS:
+        raise NotImplementedError(f'Decoding of {image_format!r} is not supported')
+    return _TEXTURE_DECODERS[image_format](data, width, height)
+
+
+def decode_hemi_oct_normals(pixels: np.ndarray) -> np.ndarray:
+    """Convert hemi octahedral normal in RG into RGB normal, roughness from B is moved into alpha."""
+    red = pixels[:, :, 0].astype(np.float32)
+    green = pixels[:, :, 1].astype(np.float32)
+    normal = np.empty(pixels.shape[:2] + (3,), np.float32)
+    normal[:, :, 0] = (red + green) / 255 - 1.003922
+    normal[:, :, 1] = (red - green) / 255
+    normal[:, :, 2] = 1 - np.abs(normal[:, :, 0]) - np.abs(normal[:, :, 1])
+    normal /= np.linalg.norm(normal, axis=2, keepdims=True)
+    result = np.empty_like(pixels)
+    result[:, :, :3] = ((normal * 0.5 + 0.5) * 255).astype(np.uint8)
+    result[:, :, 3] = pixels[:, :, 2]
+    return result
+
+
+def reconstruct_normal_z(pixels: np.ndarray) -> np.ndarray:
+    """Fill B channel of two channel normal map with reconstructed Z."""
+    xy = pixels[:, :, :2].astype(np.float32) / 127.5 - 1
+    z = np.sqrt(np.clip(1 - np.sum(xy * xy, axis=2), 0, 1))
+    pixels = pixels.copy()
+    pixels[:, :, 2] = (z * 127.5 + 127.5).astype(np.uint8)
+    return pixels
+
+
 class VTexExtraData(IntEnum):
     UNKNOWN = 0
     FALLBACK_BITS = 1
@@ -162,8 +214,8 @@ class TEXR(DataBlock):
 
     def calculate_buffer_size_for_mip(self, mip_level):
         bytes_per_pixel = block_size(self.format)
-        width = self.width >> mip_level
-        height = self.height >> mip_level
+        width = max(1, self.width >> mip_level)
+        height = max(1, self.height >> mip_level)
         depth = self.depth >> mip_level
         if depth < 1:
             depth = 1
@@ -229,31 +281,73 @@ class TEXR(DataBlock):
                 reader.skip(self.calculate_buffer_size_for_mip(i))
             return reader
 
+    @property
+    def is_hdr(self):
+        return self.format in HDR_FORMATS
+
+    def get_mip_size(self, mip_level):
+        return max(1, self.width >> mip_level), max(1, self.height >> mip_level)
+
+    def read_mip_data(self, mip_level=0) -> bytes:
+        reader = self._valve_file.reader
+        reader.seek(self.info_block.absolute_offset + self.info_block.block_size)
+        return self.get_decompressed_at_mip(reader, mip_level)
+
+    def is_hemi_oct_rb(self):
+        from .redi_block_types import SpecialDependencies
+        redi = self._valve_file.get_data_block(block_name='REDI')[0]
+        for block in redi.blocks:
+            if type(block) is SpecialDependencies:
+                for container in block.container:
+                    if container.compiler_identifier == "CompileTexture" and container.string == "Texture Compiler Version Mip HemiOctIsoRoughness_RG_B":
+                        return True
+        return False
+
+    def _post_process(self, pixels: np.ndarray, hemi_oct_rb: bool):
+        if self.format == VTexFormat.BC7 and hemi_oct_rb:
+            return decode_hemi_oct_normals(pixels)
+        if self.format == VTexFormat.ATI2N:
+            return reconstruct_normal_z(pixels)
+        return pixels
+
+    def decode_mip(self, mip_level=0) -> np.ndarray:
+        """Decode first slice of mip level into (height, width, 4) array, first row is the top one."""
+        width, height = self.get_mip_size(mip_level)
+        pixels = decode_texture(self.read_mip_data(mip_level), self.format, width, height)
+        return self._post_process(pixels, self.format == VTexFormat.BC7 and self.is_hemi_oct_rb())
+
+    def decode_mips(self, mip_levels: Optional[Iterable[int]] = None, workers: Optional[int] = None) -> List[np.ndarray]:
+        """Decode several mip levels on a thread pool, by default whole mip chain starting from the largest one."""
+        if mip_levels is None:
+            mip_levels = range(self.mipmap_count)
+        mip_levels = list(mip_levels)
+        hemi_oct_rb = self.format == VTexFormat.BC7 and self.is_hemi_oct_rb()
+        # File reader is shared, so data is read upfront and only decoding runs in parallel
+        mips = [(self.read_mip_data(mip_level),) + self.get_mip_size(mip_level) for mip_level in mip_levels]
+
+        def decode(mip):
+            data, width, height = mip
+            return self._post_process(decode_texture(data, self.format, width, height), hemi_oct_rb)
+
+        with ThreadPoolExecutor(workers) as executor:
+            return list(executor.map(decode, mips))
+
     def read_image(self, flip=True):
         if self.image_data is not None:
             return
-        if NO_SOURCE_IO_UTILS:
+        if NO_SOURCE_IO_UTILS or self.format not in _NATIVE_FORMATS:
+            if self.format not in _TEXTURE_DECODERS:
+                return
+            pixels = self.decode_mip(0)
+            if flip:
+                pixels = np.flipud(pixels)
+            self.image_data = pixels.ravel() if self.is_hdr else pixels.tobytes()
             return
         reader = self._valve_file.reader
         reader.seek(self.info_block.absolute_offset + self.info_block.block_size)
-        if self.format == VTexFormat.RGBA8888:
+        if self.format == VTexFormat.BC7:
             data = self.get_decompressed_buffer(reader, 0).read(-1)
-            data = np.frombuffer(data, np.uint8).reshape((self.width, self.height, 4))
-            if flip:
-                data = np.flipud(data)
-            self.image_data = data.tobytes()
-        elif self.format == VTexFormat.BC7:
-            from .redi_block_types import SpecialDependencies
-            redi = self._valve_file.get_data_block(block_name='REDI')[0]
-            hemi_oct_rb = False
-            for block in redi.blocks:
-                if type(block) is SpecialDependencies:
-                    for container in block.container:
-                        if container.compiler_identifier == "CompileTexture" and container.string == "Texture Compiler Version Mip HemiOctIsoRoughness_RG_B":
-                            hemi_oct_rb = True
-                            break
-            data = self.get_decompressed_buffer(reader, 0).read(-1)
-            data = read_bc7(data, self.width, self.height, hemi_oct_rb, flip)
+            data = read_bc7(data, self.width, self.height, self.is_hemi_oct_rb(), flip)
             self.image_data = data
         elif self.format == VTexFormat.ATI1N:
             data = self.get_decompressed_buffer(reader, 0).read(-1)
@@ -271,7 +365,3 @@ class TEXR(DataBlock):
             data = self.get_decompressed_buffer(reader, 0).read(-1)
             data = read_dxt5(data, self.width, self.height, flip)
             self.image_data = data
-        elif self.format == VTexFormat.RGBA16161616F:
-            data = self.get_decompressed_buffer(reader, 0).read(-1)
-            data = np.frombuffer(data, np.float16, self.width * self.height * 4)
-            self.image_data = data
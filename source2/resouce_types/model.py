@@ -16,7 +16,7 @@ from ..blocks import MRPH, VBIB, DATA
 from ..utils.decode_animations import parse_anim_data
 from ..common import convert_normals
 
-from ...bpy_utilities.utils import get_material, get_new_unique_collection
+from ...bpy_utilities.utils import get_material, get_new_unique_collection, add_vertex_weights
 from ...content_providers.content_manager import ContentManager
 
 
@@ -264,24 +264,9 @@ class ValveCompiledModel(ValveCompiledResource):
                     if 'BLENDWEIGHT' in vertex_buffer.attribute_names and \
                             'BLENDINDICES' in vertex_buffer.attribute_names:
                         weights_array = vertex_buffer.vertexes["BLENDWEIGHT"] / 255
-                        indices_array = vertex_buffer.vertexes["BLENDINDICES"]
-                    else:
-                        weights_array = []
-                        indices_array = []
-
-                    for n, bone_indices in enumerate(indices_array):
-
-                        if len(weights_array) > 0:
-                            weights = weights_array[n]
-                            for bone_index, weight in zip(bone_indices, weights):
-                                if weight > 0:
-                                    bone_name = new_bone_names[remap_table[remaps_start:][int(bone_index)]]
-                                    weight_groups[bone_name].add([n], weight, 'REPLACE')
-
-                        else:
-                            for bone_index in bone_indices:
-                                bone_name = new_bone_names[remap_table[remaps_start:][int(bone_index)]]
-                                weight_groups[bone_name].add([n], 1.0, 'REPLACE')
+                        indices_array = vertex_buffer.vertexes["BLENDINDICES"].astype(np.int64)
+                        bone_ids = np.asarray(remap_table[remaps_start:])[indices_array]
+                        add_vertex_weights(weight_groups, new_bone_names, bone_ids, weights_array)
 
                 mesh.polygons.foreach_set("use_smooth", np.ones(len(mesh.polygons)))
                 mesh.normals_split_custom_set_from_vertices(normals)
@@ -298,18 +283,22 @@ class ValveCompiledModel(ValveCompiledResource):
                     else:
                         bundle_id = -1
                     if bundle_id != -1:
-                        for n, (flex_name, flex_data) in enumerate(morph_block.flex_data.items()):
-                            print(f"Importing {flex_name} {n + 1}/{len(morph_block.flex_data)}")
+                        vertices = np.zeros((len(mesh.vertices) * 3,), dtype=np.float32)
+                        mesh.vertices.foreach_get('co', vertices)
+                        vertices = vertices.reshape((-1, 3))
+                        morph_names = morph_block.morph_names
+                        for n, flex_name in enumerate(morph_names):
+                            print(f"Importing {flex_name} {n + 1}/{len(morph_names)}")
                             if flex_name is None:
                                 continue
 
                             shape = mesh_obj.shape_key_add(name=flex_name)
-                            vertices = np.zeros((len(mesh.vertices) * 3,), dtype=np.float32)
-                            mesh.vertices.foreach_get('co', vertices)
-                            vertices = vertices.reshape((-1, 3))
-                            bundle_data = flex_data[bundle_id]
-                            pre_computed_data = np.add(
-                                bundle_data[global_vertex_offset:global_vertex_offset + vertex_count][:, :3], vertices)
+                            vertex_ids, deltas = morph_block.get_morph_deltas(flex_name)
+                            in_mesh = (vertex_ids >= global_vertex_offset) & (
+                                    vertex_ids < global_vertex_offset + vertex_count)
+                            pre_computed_data = vertices.copy()
+                            pre_computed_data[vertex_ids[in_mesh] - global_vertex_offset] += deltas[bundle_id,
+                                                                                                    in_mesh, :3]
                             shape.data.foreach_set("co", pre_computed_data.reshape((-1,)))
 
                 global_vertex_offset += vertex_count
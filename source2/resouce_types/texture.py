@@ -3,7 +3,6 @@ import bpy
 import numpy as np
 
 from ..blocks import TEXR
-from ..blocks.texture_block import VTexFormat
 from . import ValveCompiledResource
 
 from ...bpy_utilities.logger import BPYLoggingManager
@@ -31,7 +30,7 @@ class ValveCompiledTexture(ValveCompiledResource):
                 alpha=True
             )
             return image
-        if data_block.format == VTexFormat.RGBA16161616F:
+        if data_block.is_hdr:
             pixel_data = data_block.image_data
         else:
             pixel_data = np.divide(np.frombuffer(data_block.image_data, np.uint8), 255, dtype=np.float32)
@@ -44,7 +43,7 @@ class ValveCompiledTexture(ValveCompiledResource):
         )
 
         image.alpha_mode = 'CHANNEL_PACKED'
-        if data_block.format == VTexFormat.RGBA16161616F:
+        if data_block.is_hdr:
             image.use_generated_float = True
             image.file_format = 'HDR'
         else:
@@ -290,7 +290,7 @@ class BinaryKeyValue:
         else:
             self.block_sizes = [self.buffer.read_uint32() for _ in range(block_count)]
             assert self.buffer.read_uint32() == 0xFFEEDD00, 'Invalid terminator'
-            cd = LZ4ChainDecoder(block_total_size, 0)
+            cd = LZ4ChainDecoder()
             for uncompressed_block_size in self.block_sizes:
                 if compression_method == 0:
                     self.block_data += reader.read(uncompressed_block_size)
@@ -342,91 +342,82 @@ class BinaryKeyValue:
         self.read_value(name, reader, data_type, parent, in_array)
 
     def read_value(self, name, reader: ByteIO, data_type: KVType, parent, is_array=False):
-        def add(v):
-            if not is_array:
-                parent.update({name: v})
-            else:
-                parent.append(v)
-
-        if data_type == KVType.NULL:
-            add(None)
-            return
-        elif data_type == KVType.DOUBLE:
-            add(self.double_buffer.read_double())
-            return
-        elif data_type == KVType.BOOLEAN:
-            add(self.byte_buffer.read_int8() == 1)
-            return
-        elif data_type == KVType.BOOLEAN_TRUE:
-            add(True)
-            return
-        elif data_type == KVType.BOOLEAN_FALSE:
-            add(False)
-            return
-        elif data_type == KVType.INT64:
-            add(self.double_buffer.read_int64())
-            return
-        elif data_type == KVType.UINT64:
-            add(self.double_buffer.read_uint64())
-            return
-
-        elif data_type == KVType.DOUBLE_ZERO:
-            add(0.0)
-            return
-        elif data_type == KVType.INT64_ZERO:
-            add(0)
-            return
-        elif data_type == KVType.INT64_ONE:
-            add(1)
-            return
-        elif data_type == KVType.DOUBLE_ONE:
-            add(1.0)
-            return
-        elif data_type == KVType.INT32:
-            add(self.int_buffer.read_int32())
-            return
-        elif data_type == KVType.STRING:
-            string_id = self.int_buffer.read_int32()
-            if string_id == -1:
-                add(None)
-                return
-            add(self.strings[string_id])
-            return
-        elif data_type == KVType.ARRAY:
-            size = self.int_buffer.read_uint32()
-            arr = []
-            for _ in range(size):
-                self.parse(reader, arr, True)
-            add(arr)
-            return
-        elif data_type == KVType.OBJECT:
-            size = self.int_buffer.read_uint32()
-            tmp = {}
-            for _ in range(size):
-                self.parse(reader, tmp, False)
-            add(tmp)
-            if not parent:
-                parent = tmp
-        elif data_type == KVType.ARRAY_TYPED:
-            t_array_size = self.int_buffer.read_uint32()
-            sub_type, sub_flag = self.read_type(reader)
-            tmp = []
-            for _ in range(t_array_size):
-                self.read_value(name, reader, sub_type, tmp, True)
-
-            if sub_type in (KVType.DOUBLE, KVType.DOUBLE_ONE, KVType.DOUBLE_ZERO):
-                tmp = np.array(tmp, dtype=np.float64)
-            add(tmp)
-        elif data_type == KVType.BINARY_BLOB:
-            if self.block_reader.size() != 0:
-                data = self.block_reader.read(self.block_sizes[self.next_block_id])
-                self.next_block_id += 1
-                add(data)
-            else:
-                size = self.int_buffer.read_uint32()
-                add(self.byte_buffer.read(size))
-            return
-        else:
+        value_reader = self._value_readers.get(data_type, None)
+        if value_reader is None:
             raise NotImplementedError("Unknown KVType.{}".format(data_type.name))
-
-        return parent
+        value = value_reader(self, reader)
+        if is_array:
+            parent.append(value)
+        else:
+            parent[name] = value
+
+    def _read_string(self, reader: ByteIO):
+        string_id = self.int_buffer.read_int32()
+        if string_id == -1:
+            return None
+        return self.strings[string_id]
+
+    def _read_array(self, reader: ByteIO):
+        size = self.int_buffer.read_uint32()
+        array = []
+        for _ in range(size):
+            self.parse(reader, array, True)
+        return array
+
+    def _read_object(self, reader: ByteIO):
+        size = self.int_buffer.read_uint32()
+        obj = {}
+        for _ in range(size):
+            self.parse(reader, obj, False)
+        return obj
+
+    def _read_typed_array(self, reader: ByteIO):
+        size = self.int_buffer.read_uint32()
+        sub_type, sub_flag = self.read_type(reader)
+        typed_reader = self._typed_array_readers.get(sub_type, None)
+        if typed_reader is not None:
+            return typed_reader(self, size)
+        array = []
+        for _ in range(size):
+            self.read_value(None, reader, sub_type, array, True)
+        if sub_type in (KVType.DOUBLE_ONE, KVType.DOUBLE_ZERO):
+            array = np.array(array, dtype=np.float64)
+        return array
+
+    def _read_binary_blob(self, reader: ByteIO):
+        if self.block_reader.size() != 0:
+            data = self.block_reader.read(self.block_sizes[self.next_block_id])
+            self.next_block_id += 1
+            return data
+        size = self.int_buffer.read_uint32()
+        return self.byte_buffer.read(size)
+
+    _value_readers = {
+        KVType.NULL: lambda self, reader: None,
+        KVType.BOOLEAN: lambda self, reader: self.byte_buffer.read_int8() == 1,
+        KVType.INT64: lambda self, reader: self.double_buffer.read_int64(),
+        KVType.UINT64: lambda self, reader: self.double_buffer.read_uint64(),
+        KVType.DOUBLE: lambda self, reader: self.double_buffer.read_double(),
+        KVType.STRING: _read_string,
+        KVType.BINARY_BLOB: _read_binary_blob,
+        KVType.ARRAY: _read_array,
+        KVType.OBJECT: _read_object,
+        KVType.ARRAY_TYPED: _read_typed_array,
+        KVType.INT32: lambda self, reader: self.int_buffer.read_int32(),
+        KVType.UINT32: lambda self, reader: self.int_buffer.read_uint32(),
+        KVType.BOOLEAN_TRUE: lambda self, reader: True,
+        KVType.BOOLEAN_FALSE: lambda self, reader: False,
+        KVType.INT64_ZERO: lambda self, reader: 0,
+        KVType.INT64_ONE: lambda self, reader: 1,
+        KVType.DOUBLE_ZERO: lambda self, reader: 0.0,
+        KVType.DOUBLE_ONE: lambda self, reader: 1.0,
+    }
+
+    # Numeric typed arrays are read straight from value buffers, integers stay python lists as before
+    _typed_array_readers = {
+        KVType.DOUBLE: lambda self, size: np.frombuffer(self.double_buffer.read(8 * size), '<f8').copy(),
+        KVType.INT64: lambda self, size: np.frombuffer(self.double_buffer.read(8 * size), '<i8').tolist(),
+        KVType.UINT64: lambda self, size: np.frombuffer(self.double_buffer.read(8 * size), '<u8').tolist(),
+        KVType.INT32: lambda self, size: np.frombuffer(self.int_buffer.read(4 * size), '<i4').tolist(),
+        KVType.UINT32: lambda self, size: np.frombuffer(self.int_buffer.read(4 * size), '<u4').tolist(),
+    }
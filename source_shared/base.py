@@ -1,15 +1,55 @@
+import functools
+import threading
+from contextlib import contextmanager
+
+
 class Base:
-    storage = {}
+    _context = threading.local()
+
+    def __new__(cls, *args, **kwargs):
+        instance = super().__new__(cls)
+        # Structures share storage of the file that is currently parsed in this thread,
+        # structures created outside of any file scope get their own empty storage
+        storage = getattr(Base._context, 'storage', None)
+        instance._storage = storage if storage is not None else {}
+        return instance
+
+    def begin_storage(self):
+        """Give this file its own storage and make it current for structures created in this thread."""
+        self._storage = {}
+        self.resume_storage()
+
+    def resume_storage(self):
+        Base._context.storage = self._storage
 
-    @classmethod
-    def store_value(cls, key, value):
-        cls.storage[key] = value
+    @contextmanager
+    def storage_scope(self):
+        """Make this storage current in this thread and restore the previous one on exit."""
+        previous = getattr(Base._context, 'storage', None)
+        self.resume_storage()
+        try:
+            yield self
+        finally:
+            Base._context.storage = previous
 
-    @classmethod
-    def get_value(cls, key):
-        return cls.storage.get(key, None)
+    def store_value(self, key, value):
+        self._storage[key] = value
+
+    def get_value(self, key):
+        return self._storage.get(key, None)
 
     @property
     def mdl_version(self):
         mdl = self.get_value('MDL')
         return mdl.header.version
+
+
+def with_storage(method):
+    """Run file method inside its storage scope."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.storage_scope():
+            return method(self, *args, **kwargs)
+
+    return wrapper
@@ -1,22 +1,24 @@
+import mmap
 from functools import lru_cache
 from io import BytesIO
 from pathlib import Path, WindowsPath, PosixPath, PurePath
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Mapping, Optional
 
 from .structs.entry import TitanfallEntry
+from .vpk_index import VPKIndex, IndexedEntries, IndexRow, get_default_index_path
 from ...utilities.byte_io_mdl import ByteIO
 from .structs import *
 from ...utilities.thirdparty.lzham.lzham import LZHAM
 
 
-def open_vpk(filepath: Union[str, Path]):
+def open_vpk(filepath: Union[str, Path], use_index=False):
     from struct import unpack
     with open(filepath, 'rb') as f:
         magic, version_mj, version_mn = unpack('IHH', f.read(8))
     if magic != Header.MAGIC:
         raise Exception('Not a VPK file')
     if version_mj in [1, 2] and version_mn == 0:
-        return VPKFile(filepath)
+        return VPKFile(filepath, use_index)
     elif version_mj == 2 and version_mn == 3 and LZHAM.lib is not None:
         return TitanfallVPKFile(filepath)
     else:
@@ -26,13 +28,14 @@ def open_vpk(filepath: Union[str, Path]):
 
 class VPKFile:
 
-    def __init__(self, filepath: Union[str, Path]):
+    def __init__(self, filepath: Union[str, Path], use_index=False):
         self.filepath = Path(filepath)
         self.reader = ByteIO(self.filepath)
         self.header = Header()
         self.archive_md5_entries: List[ArchiveMD5Entry] = []
 
-        self.entries: Dict[str, Entry] = {}
+        self.index_path: Optional[Path] = get_default_index_path(self.filepath) if use_index else None
+        self.entries: Mapping[str, Entry] = {}
         self.tree_offset = 0
         self.tree_hash = b''
         self.archive_md5_hash = b''
@@ -42,6 +45,7 @@ class VPKFile:
         self.signature = b''
 
         self._folders_in_current_dir = set()
+        self._archive_maps: Dict[int, Union[mmap.mmap, bytes]] = {}
 
     def read(self):
         reader = self.reader
@@ -68,6 +72,12 @@ class VPKFile:
     def read_entries(self):
         reader = self.reader
         self.tree_offset = reader.tell()
+        if self.index_path is not None:
+            index = VPKIndex.load(self.index_path, self.filepath)
+            if index is not None and index.tree_offset == self.tree_offset:
+                self.entries = IndexedEntries(index)
+                return
+        index_rows: List[IndexRow] = []
         while 1:
             type_name = reader.read_ascii_string()
             if not type_name:
@@ -82,9 +92,15 @@ class VPKFile:
                         break
 
                     full_path = f'{directory_name}/{file_name}.{type_name}'.lower()
-                    self.entries[full_path] = Entry(full_path, reader.tell())
-                    _, preload_size = reader.read_fmt('IH')
-                    reader.skip(preload_size + 12)
+                    entry_offset = reader.tell()
+                    self.entries[full_path] = Entry(full_path, entry_offset)
+                    crc32, preload_size, archive_id, offset, size = reader.read_fmt('I2H2I')
+                    reader.skip(preload_size + 2)
+                    if self.index_path is not None:
+                        index_rows.append((full_path, entry_offset, crc32,
+                                           preload_size, archive_id, offset, size))
+        if self.index_path is not None:
+            VPKIndex.from_rows(self.tree_offset, index_rows).save(self.index_path, self.filepath)
 
     def read_archive_md5_section(self):
         reader = self.reader
@@ -107,23 +123,60 @@ class VPKFile:
             full_path = Path(full_path).as_posix().lower()
         return self.entries.get(full_path, None)
 
-    def read_file(self, entry: Entry) -> BytesIO:
+    def _get_archive_path(self, archive_id: int) -> Path:
+        if archive_id == 0x7FFF:
+            return self.filepath
+        return self.filepath.parent / f'{self.filepath.stem[:-3]}{archive_id:03d}.vpk'
+
+    def _get_archive_map(self, archive_id: int) -> Union[mmap.mmap, bytes]:
+        archive_map = self._archive_maps.get(archive_id, None)
+        if archive_map is None:
+            with open(self._get_archive_path(archive_id), 'rb') as archive_file:
+                try:
+                    archive_map = mmap.mmap(archive_file.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    # Empty archives can't be mapped
+                    archive_map = b''
+            self._archive_maps[archive_id] = archive_map
+        return archive_map
+
+    def _get_data_offset(self, entry: Entry) -> int:
         if not entry.loaded:
             entry.read(self.reader)
         if entry.archive_id == 0x7FFF:
-            data = bytearray(entry.preload_data)
-            with self.reader.save_current_pos():
-                self.reader.seek(entry.offset + self.header.tree_size + self.tree_offset)
-                data.extend(self.reader.read(entry.size))
+            return entry.offset + self.header.tree_size + self.tree_offset
+        return entry.offset
 
-            reader = BytesIO(data)
-            return reader
-        else:
-            target_archive_path = self.filepath.parent / f'{self.filepath.stem[:-3]}{entry.archive_id:03d}.vpk'
-            with open(target_archive_path, 'rb') as target_archive:
-                target_archive.seek(entry.offset)
-                reader = BytesIO(entry.preload_data + target_archive.read(entry.size))
-                return reader
+    def read_file_view(self, entry: Entry) -> Union[memoryview, bytes]:
+        """Return entry data without copying it out of the archive when possible.
+
+        Entries without preload data are returned as a memoryview over the mapped archive,
+        entries with preload data have to be joined and are returned as bytes.
+        """
+        offset = self._get_data_offset(entry)
+        view = memoryview(self._get_archive_map(entry.archive_id))[offset:offset + entry.size]
+        if entry.preload_data:
+            return entry.preload_data + view
+        return view
+
+    def read_file(self, entry: Entry) -> BytesIO:
+        offset = self._get_data_offset(entry)
+        # Slicing mmap yields bytes that BytesIO can share without second copy
+        data = self._get_archive_map(entry.archive_id)[offset:offset + entry.size]
+        if entry.preload_data:
+            data = entry.preload_data + data
+        return BytesIO(data)
+
+    def close(self):
+        for archive_map in self._archive_maps.values():
+            if isinstance(archive_map, mmap.mmap):
+                try:
+                    archive_map.close()
+                except BufferError:
+                    # Views returned by read_file_view are still alive, mapping is released with them
+                    pass
+        self._archive_maps.clear()
+        self.reader.close()
 
     def files_in_path(self, partial_path):
         if partial_path is None:
@@ -165,6 +218,14 @@ class TitanfallVPKFile(VPKFile):
                     entry = self.entries[full_path] = TitanfallEntry(full_path, reader.tell())
                     entry.read(reader)
 
+    def _get_archive_path(self, archive_id: int) -> Path:
+        archive_name_base = self.filepath.stem[:-3]
+        archive_name_base = 'client_' + archive_name_base.split('_', 1)[-1]
+        return self.filepath.parent / f'{archive_name_base}{archive_id:03d}.vpk'
+
+    def read_file_view(self, entry: TitanfallEntry) -> bytes:
+        return self.read_file(entry).getvalue()
+
     def read_file(self, entry: TitanfallEntry) -> BytesIO:
         if not entry.loaded:
             entry.read(self.reader)
@@ -172,18 +233,13 @@ class TitanfallVPKFile(VPKFile):
             reader = BytesIO(entry.preload_data)
             return reader
         else:
-            archive_name_base = self.filepath.stem[:-3]
-            archive_name_base = 'client_' + archive_name_base.split('_', 1)[-1]
-            target_archive_path = self.filepath.parent / f'{archive_name_base}{entry.archive_id:03d}.vpk'
-            with open(target_archive_path, 'rb') as target_archive:
-
-                buffer = entry.preload_data
-                for block in entry.blocks:
-                    target_archive.seek(block.offset)
-                    block_data = target_archive.read(block.compressed_size)
-                    if block.compressed_size == block.uncompressed_size:
-                        buffer += block_data
-                    else:
-                        buffer += LZHAM.decompress_memory(block_data, block.uncompressed_size, 20, 1 << 0)
-                reader = BytesIO(buffer)
-                return reader
+            target_archive = self._get_archive_map(entry.archive_id)
+            buffer = bytearray(entry.preload_data)
+            for block in entry.blocks:
+                block_data = target_archive[block.offset:block.offset + block.compressed_size]
+                if block.compressed_size == block.uncompressed_size:
+                    buffer += block_data
+                else:
+                    buffer += LZHAM.decompress_memory(block_data, block.uncompressed_size, 20, 1 << 0)
+            reader = BytesIO(buffer)
+            return reader
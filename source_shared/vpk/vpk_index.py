@@ -0,0 +1,176 @@
+import struct
+import tempfile
+from collections.abc import Mapping
+from hashlib import blake2b
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .structs import Entry
+
+INDEX_MAGIC = b'SIOI'
+INDEX_VERSION = 2
+# magic, version, vpk size, vpk mtime_ns, tree offset, entry count, names size
+INDEX_HEADER = struct.Struct('<4sIQQIII')
+
+index_entry_dtype = np.dtype([
+    ('hash', np.uint64),
+    ('name_offset', np.uint32),
+    ('name_length', np.uint16),
+    ('preload_size', np.uint16),
+    ('entry_offset', np.uint32),
+    ('crc32', np.uint32),
+    ('offset', np.uint32),
+    ('size', np.uint32),
+    ('archive_id', np.uint16),
+    ('pad', np.uint16),
+])
+
+IndexRow = Tuple[str, int, int, int, int, int, int]
+
+
+def hash_path(path: str) -> int:
+    return int.from_bytes(blake2b(path.encode('utf8'), digest_size=8).digest(), 'little')
+
+
+def get_default_index_path(vpk_path: Path) -> Path:
+    path_key = blake2b(str(vpk_path.resolve()).encode('utf8'), digest_size=8).hexdigest()
+    return Path(tempfile.gettempdir()) / 'SourceIO' / 'vpk_index' / f'{vpk_path.stem}_{path_key}.idx'
+
+
+class VPKIndex:
+    """Flat on-disk copy of VPK directory tree, sorted by path hash."""
+
+    def __init__(self, tree_offset: int, table: np.ndarray, names: bytes):
+        self.tree_offset = tree_offset
+        self.table = table
+        self.names = names
+        self._decoded_names: Optional[str] = None
+
+    @staticmethod
+    def _vpk_stamp(vpk_path: Path):
+        stat = vpk_path.stat()
+        return stat.st_size, stat.st_mtime_ns
+
+    @classmethod
+    def from_rows(cls, tree_offset: int, rows: List[IndexRow]):
+        table = np.zeros(len(rows), index_entry_dtype)
+        encoded_names = [row[0].encode('utf8') for row in rows]
+        names = b'\0'.join(encoded_names)
+        name_lengths = np.array([len(name) for name in encoded_names], np.uint32)
+        table['hash'] = np.array([hash_path(row[0]) for row in rows], np.uint64)
+        # Names are joined with a separator, offsets and lengths are in bytes
+        table['name_offset'] = np.cumsum(name_lengths + 1) - (name_lengths + 1)
+        table['name_length'] = name_lengths
+        for column_id, column_name in enumerate(('entry_offset', 'crc32', 'preload_size',
+                                                 'archive_id', 'offset', 'size'), 1):
+            table[column_name] = np.array([row[column_id] for row in rows], table.dtype[column_name])
+        table = table[np.argsort(table['hash'], kind='stable')]
+        return cls(tree_offset, table, names)
+
+    @classmethod
+    def load(cls, index_path: Path, vpk_path: Path) -> Optional['VPKIndex']:
+        if not index_path.exists():
+            return None
+        try:
+            with index_path.open('rb') as f:
+                magic, version, vpk_size, vpk_mtime, tree_offset, count, names_size = INDEX_HEADER.unpack(
+                    f.read(INDEX_HEADER.size))
+                if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                    return None
+                if (vpk_size, vpk_mtime) != cls._vpk_stamp(vpk_path):
+                    return None
+                table = np.fromfile(f, index_entry_dtype, count)
+                names = f.read(names_size)
+        except (OSError, struct.error, ValueError):
+            return None
+        if table.shape[0] != count or len(names) != names_size:
+            return None
+        return cls(tree_offset, table, names)
+
+    def save(self, index_path: Path, vpk_path: Path):
+        vpk_size, vpk_mtime = self._vpk_stamp(vpk_path)
+        try:
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = index_path.with_suffix('.tmp')
+            with tmp_path.open('wb') as f:
+                f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, vpk_size, vpk_mtime,
+                                          self.tree_offset, self.table.shape[0], len(self.names)))
+                self.table.tofile(f)
+                f.write(self.names)
+            tmp_path.replace(index_path)
+        except OSError:
+            # Index is only an optimization, read-only locations are fine
+            pass
+
+    def __len__(self):
+        return self.table.shape[0]
+
+    def get_name(self, row_id: int) -> str:
+        row = self.table[row_id]
+        name_offset = int(row['name_offset'])
+        return self.names[name_offset:name_offset + int(row['name_length'])].decode('utf8')
+
+    def get_all_names(self) -> List[str]:
+        offsets = zip(self.table['name_offset'].tolist(), self.table['name_length'].tolist())
+        if not self.names.isascii():
+            names = self.names
+            return [names[offset:offset + length].decode('utf8') for offset, length in offsets]
+        # Byte offsets are char offsets of ascii names, slicing one decoded string is faster
+        if self._decoded_names is None:
+            self._decoded_names = self.names.decode('ascii')
+        decoded_names = self._decoded_names
+        return [decoded_names[offset:offset + length] for offset, length in offsets]
+
+    def find_row(self, full_path: str) -> int:
+        hashes = self.table['hash']
+        path_hash = np.uint64(hash_path(full_path))
+        row_id = int(np.searchsorted(hashes, path_hash))
+        while row_id < hashes.shape[0] and hashes[row_id] == path_hash:
+            if self.get_name(row_id) == full_path:
+                return row_id
+            row_id += 1
+        return -1
+
+    def create_entry(self, row_id: int, full_path: str) -> Entry:
+        row = self.table[row_id]
+        entry = Entry(full_path, int(row['entry_offset']))
+        entry.crc32 = int(row['crc32'])
+        entry.preload_data_size = int(row['preload_size'])
+        entry.archive_id = int(row['archive_id'])
+        entry.offset = int(row['offset'])
+        entry.size = int(row['size'])
+        # Preload data lives in the directory file, let Entry.read fetch it on demand
+        entry.loaded = entry.preload_data_size == 0
+        return entry
+
+
+class IndexedEntries(Mapping):
+    """Read-only path -> Entry mapping backed by VPKIndex, entries are created on first access."""
+
+    def __init__(self, index: VPKIndex):
+        self._index = index
+        self._entries: Dict[str, Entry] = {}
+        self._names: Optional[List[str]] = None
+
+    def __getitem__(self, full_path: str) -> Entry:
+        entry = self._entries.get(full_path, None)
+        if entry is not None:
+            return entry
+        row_id = self._index.find_row(full_path)
+        if row_id == -1:
+            raise KeyError(full_path)
+        entry = self._entries[full_path] = self._index.create_entry(row_id, full_path)
+        return entry
+
+    def __contains__(self, full_path) -> bool:
+        return full_path in self._entries or self._index.find_row(full_path) != -1
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __iter__(self) -> Iterator[str]:
+        if self._names is None:
+            self._names = self._index.get_all_names()
+        yield from self._names
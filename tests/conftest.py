@@ -0,0 +1,17 @@
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+# Tests run headless, addon is imported as SourceIO package without bpy
+os.environ['NO_BPY'] = '1'
+
+_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+if 'SourceIO' not in sys.modules:
+    _spec = importlib.util.spec_from_file_location('SourceIO', _ROOT / '__init__.py',
+                                                   submodule_search_locations=[str(_ROOT)])
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules['SourceIO'] = _module
+    _spec.loader.exec_module(_module)
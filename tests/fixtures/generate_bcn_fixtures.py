@@ -0,0 +1,86 @@
+"""Generate bcn_blocks.npz, needs imagecodecs (bcdec) as the reference decoder.
+
+Usage: python tests/fixtures/generate_bcn_fixtures.py
+"""
+from pathlib import Path
+
+import imagecodecs
+import numpy as np
+
+BLOCKS_PER_CASE = 4
+# Low 5 bits of BC6H blocks for modes 0-13, followed by reserved ones
+BC6H_MODE_BITS = [0, 1, 2, 6, 10, 14, 18, 22, 26, 30, 3, 7, 11, 15]
+BC6H_RESERVED_MODE_BITS = [19, 23, 27, 31]
+
+
+def reference(blocks, bcn_format, width, height, channels):
+    shape = (height, width) if channels == 1 else (height, width, channels)
+    return imagecodecs.bcn_decode(blocks.tobytes(), bcn_format, shape=shape)
+
+
+def random_blocks(rng, count, block_size):
+    return rng.integers(0, 256, (count, block_size), dtype=np.uint8)
+
+
+def main():
+    rng = np.random.default_rng(24)
+    arrays = {}
+
+    def add(name, blocks, bcn_format, channels, height=4):
+        width = blocks.shape[0] * 16 // height
+        arrays[f'{name}_encoded'] = blocks.ravel()
+        arrays[f'{name}_decoded'] = reference(blocks, bcn_format, width, height, channels)
+
+    for mode in range(8):
+        blocks = random_blocks(rng, BLOCKS_PER_CASE, 16)
+        # Mode is the position of the lowest set bit
+        blocks[:, 0] = (blocks[:, 0] | 1) << mode
+        add(f'bc7_mode{mode}', blocks, imagecodecs.BCN.FORMAT.BC7, 4)
+    for signed, bcn_format in ((False, imagecodecs.BCN.FORMAT.BC6HU), (True, imagecodecs.BCN.FORMAT.BC6HS)):
+        suffix = 'signed' if signed else 'unsigned'
+        for mode, mode_bits in enumerate(BC6H_MODE_BITS):
+            blocks = random_blocks(rng, BLOCKS_PER_CASE, 16)
+            mask = 0x03 if mode < 2 else 0x1F
+            blocks[:, 0] = (blocks[:, 0] & (0xFF ^ mask)) | mode_bits
+            add(f'bc6h_mode{mode}_{suffix}', blocks, bcn_format, 3)
+        blocks = random_blocks(rng, len(BC6H_RESERVED_MODE_BITS), 16)
+        blocks[:, 0] = (blocks[:, 0] & 0xE0) | BC6H_RESERVED_MODE_BITS
+        add(f'bc6h_reserved_{suffix}', blocks, bcn_format, 3)
+
+    # color0 <= color1 selects three colors and transparent black, equal colors included
+    blocks = random_blocks(rng, BLOCKS_PER_CASE, 8)
+    colors = np.sort(blocks[:, :4].copy().view('<u2'), axis=1)
+    colors[0, 1] = colors[0, 0]
+    blocks[:, :4] = colors.view(np.uint8)
+    add('dxt1_three_color', blocks, imagecodecs.BCN.FORMAT.BC1, 4)
+    blocks = random_blocks(rng, BLOCKS_PER_CASE, 8)
+    blocks[:, :4] = np.ascontiguousarray(np.sort(blocks[:, :4].copy().view('<u2'), axis=1)[:, ::-1]).view(np.uint8)
+    blocks[:, 0] |= 1
+    add('dxt1_four_color', blocks, imagecodecs.BCN.FORMAT.BC1, 4)
+
+    # value0 <= value1 selects six interpolated values, 0 and 255
+    blocks = random_blocks(rng, BLOCKS_PER_CASE, 8)
+    blocks[:, :2] = np.sort(blocks[:, :2], axis=1)
+    blocks[0, 1] = blocks[0, 0]
+    add('bc4_six_value', blocks, imagecodecs.BCN.FORMAT.BC4, 1)
+    blocks = random_blocks(rng, BLOCKS_PER_CASE, 8)
+    blocks[:, :2] = np.sort(blocks[:, :2], axis=1)[:, ::-1]
+    blocks[:, 0] |= 1
+    add('bc4_eight_value', blocks, imagecodecs.BCN.FORMAT.BC4, 1)
+    blocks = random_blocks(rng, BLOCKS_PER_CASE * 2, 16)
+    add('bc5', blocks, imagecodecs.BCN.FORMAT.BC5, 2, height=8)
+
+    # BC7 mip chain of 32x8 texture, mips smaller than a block are stored as whole blocks
+    for mip in range(6):
+        width, height = max(1, 32 >> mip), max(1, 8 >> mip)
+        blocks_x, blocks_y = (width + 3) // 4, (height + 3) // 4
+        blocks = random_blocks(rng, blocks_x * blocks_y, 16)
+        blocks[:, 0] = (blocks[:, 0] | 1) << (np.arange(len(blocks)) % 8)
+        decoded = reference(blocks, imagecodecs.BCN.FORMAT.BC7, blocks_x * 4, blocks_y * 4, 4)
+        arrays[f'bc7_mip{mip}_encoded'] = blocks.ravel()
+        arrays[f'bc7_mip{mip}_decoded'] = decoded[:height, :width]
+    np.savez_compressed(Path(__file__).with_name('bcn_blocks.npz'), **arrays)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Generate meshopt_buffers.npz, needs the meshoptimizer package (format version 0 encoder and reference decoder).
+
+Usage: python tests/fixtures/generate_meshopt_fixtures.py
+"""
+from pathlib import Path
+
+import meshoptimizer
+import numpy as np
+
+
+def vertex_data(rng, size, count):
+    """Smooth, constant and noisy byte columns so every group encoding is used."""
+    data = np.empty((count, size), np.uint8)
+    for column in range(size):
+        kind = column % 4
+        if kind == 0:
+            data[:, column] = np.arange(count) * (column + 1)
+        elif kind == 1:
+            data[:, column] = column
+        elif kind == 2:
+            data[:, column] = 128 + rng.integers(-3, 4, count)
+        else:
+            data[:, column] = rng.integers(0, 256, count)
+    return data
+
+
+def index_data(rng, vertex_count, grid_size):
+    """Grid triangles sharing edges mixed with scattered triangles that need free and long varint indices."""
+    triangles = []
+    for y in range(grid_size):
+        for x in range(grid_size):
+            i = y * (grid_size + 1) + x
+            triangles += [(i, i + 1, i + grid_size + 1), (i + 1, i + grid_size + 2, i + grid_size + 1)]
+    scattered = rng.integers(0, vertex_count, (len(triangles) // 2, 3))
+    scattered = [tuple(triangle) for triangle in scattered if len(set(triangle)) == 3]
+    for position, triangle in zip(rng.integers(0, len(triangles), len(scattered)), scattered):
+        triangles.insert(position, triangle)
+    return np.array(triangles, np.uint32).ravel()
+
+
+def main():
+    rng = np.random.default_rng(23)
+    meshoptimizer.encode_vertex_version(0)
+    meshoptimizer.encode_index_version(0)
+    arrays = {}
+    # Counts are not multiples of 16 or of the decoder block size
+    for size, count in ((4, 300), (12, 529), (252, 37)):
+        vertices = vertex_data(rng, size, count)
+        encoded = meshoptimizer.encode_vertex_buffer(vertices, count, size)
+        decoded = meshoptimizer.decode_vertex_buffer(count, size, encoded)
+        assert decoded.tobytes() == vertices.tobytes()
+        arrays[f'vertex_{size}_{count}_encoded'] = np.frombuffer(encoded, np.uint8)
+        arrays[f'vertex_{size}_{count}_decoded'] = np.frombuffer(vertices.tobytes(), np.uint8)
+    for size, vertex_count in ((2, 60000), (4, 5000000)):
+        indices = index_data(rng, vertex_count, 9)
+        encoded = meshoptimizer.encode_index_buffer(indices, len(indices), vertex_count)
+        # Encoder rotates triangles, so expected data comes from the reference decoder,
+        # it writes indices of given size to the start of uint32 array
+        decoded = meshoptimizer.decode_index_buffer(len(indices), size, encoded).view(np.uint8)[:len(indices) * size]
+        assert sorted(decoded.view(f'<u{size}')) == sorted(indices)
+        arrays[f'index_{size}_{len(indices)}_encoded'] = np.frombuffer(encoded, np.uint8)
+        arrays[f'index_{size}_{len(indices)}_decoded'] = decoded
+    np.savez_compressed(Path(__file__).with_name('meshopt_buffers.npz'), **arrays)
+
+
+if __name__ == '__main__':
+    main()
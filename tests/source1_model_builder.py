@@ -0,0 +1,242 @@
+"""Writers for minimal Source1 MDL v49, VVD and VTX v7 files used by the tests."""
+import struct
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+VVD_VERTEX_DTYPE = np.dtype([('weight', np.float32, 3),
+                             ('bone_id', np.uint8, 3),
+                             ('pad', np.uint8),
+                             ('vertex', np.float32, 3),
+                             ('normal', np.float32, 3),
+                             ('uv', np.float32, 2),
+                             ])
+VERT_ANIM_DTYPE = np.dtype([('index', np.uint16),
+                            ('speed', np.uint8),
+                            ('side', np.uint8),
+                            ('vertex_delta', np.float16, 3),
+                            ('normal_delta', np.float16, 3),
+                            ])
+VTX_VERTEX_DTYPE = np.dtype([('bone_weight_index', np.uint8, 3),
+                             ('bone_count', np.uint8),
+                             ('original_mesh_vertex_index', np.uint16),
+                             ('bone_id', np.uint8, 3),
+                             ])
+
+_MDL_HEADER_FIELDS = [
+    ('id', '4s'), ('version', 'i'), ('checksum', 'i'), ('name', '64s'), ('file_size', 'I'),
+    ('positions', '18f'), ('flags', 'I'),
+    ('bone_count', 'I'), ('bone_offset', 'I'), ('bone_controller', '2I'), ('hitbox_set', '2I'),
+    ('local_animation', '2I'), ('local_sequence', '2I'), ('activity', '2I'),
+    ('texture_count', 'I'), ('texture_offset', 'I'),
+    ('texture_path_count', 'I'), ('texture_path_offset', 'I'),
+    ('skin_reference_count', 'I'), ('skin_family_count', 'I'), ('skin_family_offset', 'I'),
+    ('body_part_count', 'I'), ('body_part_offset', 'I'), ('local_attachment', '2I'), ('local_node', '3I'),
+    ('flex_desc_count', 'I'), ('flex_desc_offset', 'I'), ('flex_controller', '2I'), ('flex_rule', '2I'),
+    ('ik_chain', '2I'), ('mouth', '2I'), ('local_pose_parameter', '2I'), ('surface_prop', 'i'),
+    ('key_value', '2I'), ('local_ik_auto_play_lock', '2I'), ('mass', 'f'), ('contents', 'I'),
+    ('include_model', '2I'), ('virtual_model_and_anim_block_name', '2I'), ('anim_block', '2I'),
+    ('anim_block_model_and_bone_table_by_name', '2I'), ('vertex_and_index_base', '2I'),
+    ('lod_info', '4b'), ('unused4', 'I'), ('flex_controller_ui', '2I'), ('vert_anim_scale', 'fI'),
+    ('studio_header2', '2I'), ('source_bone_transform', '2I'), ('illum_position_and_eye_deflection', 'If'),
+    ('linear_bone_and_name', '2I'), ('bone_flex_driver', '2I'), ('reserved', '56i'),
+]
+
+
+class _Writer:
+    def __init__(self):
+        self.buffer = bytearray()
+        self.strings: List[Tuple[int, int, str]] = []
+
+    def tell(self):
+        return len(self.buffer)
+
+    def write(self, fmt, *values):
+        offset = self.tell()
+        self.buffer += struct.pack(fmt, *values)
+        return offset
+
+    def patch(self, offset, fmt, *values):
+        struct.pack_into(fmt, self.buffer, offset, *values)
+
+    def write_string_ref(self, entry, string):
+        """Write int32 string offset relative to entry, string itself goes to the string table."""
+        self.strings.append((self.write('i', 0), entry, string))
+
+    def align(self, alignment):
+        self.buffer += b'\x00' * (-self.tell() % alignment)
+
+    def finish(self):
+        for offset, entry, string in self.strings:
+            self.patch(offset, 'i', self.tell() - entry)
+            self.buffer += string.encode('ascii') + b'\x00'
+        return bytes(self.buffer)
+
+
+def _write_header(writer: _Writer, **values):
+    offsets = {}
+    for name, fmt in _MDL_HEADER_FIELDS:
+        offsets[name] = writer.tell()
+        value = values.get(name, 0)
+        if isinstance(value, bytes) or struct.calcsize(fmt) == struct.calcsize(fmt[-1]):
+            writer.write(fmt, value)
+        else:
+            writer.write(fmt, *([value] * (struct.calcsize(fmt) // struct.calcsize(fmt[-1]))))
+    return offsets
+
+
+def build_mdl(version: int, name: str, bone_names: Sequence[str], material_names: Sequence[str],
+              flex_names: Sequence[str], vertex_count: int, meshes: Sequence[Dict]) -> bytes:
+    """Build MDL with one body part and one model.
+
+    Each mesh is a dict with vertex_index_start, vertex_count, optional material_index and flexes,
+    a list of (flex_desc_index, vertex_animations) with VERT_ANIM_DTYPE arrays.
+    """
+    writer = _Writer()
+    header = _write_header(writer, id=b'IDST', version=version, name=name.encode('ascii'))
+
+    writer.align(4)
+    bone_offset = writer.tell()
+    for bone_id, bone_name in enumerate(bone_names):
+        entry = writer.tell()
+        writer.write_string_ref(entry, bone_name)
+        writer.write('i', bone_id - 1)
+        writer.write('6f', *([0.0] * 6))
+        writer.write('3f', float(bone_id), 0.0, 0.0)
+        writer.write('4f', 0.0, 0.0, 0.0, 1.0)
+        writer.write('3f', 0.0, 0.0, 0.0)
+        writer.write('3f', 1.0, 1.0, 1.0)
+        writer.write('3f', 1.0, 1.0, 1.0)
+        writer.write('12f', *np.eye(3, 4, dtype=np.float32).ravel())
+        writer.write('4f', 0.0, 0.0, 0.0, 1.0)
+        writer.write('4I', 0, 0, 0, 0)
+        writer.write_string_ref(entry, '')
+        writer.write('I', 0)
+        writer.write('8I', *([0] * 8))
+        if version >= 53:
+            writer.write('7I', *([0] * 7))
+
+    texture_offset = writer.tell()
+    for material_name in material_names:
+        entry = writer.tell()
+        writer.write_string_ref(entry, material_name)
+        writer.write('5I', 0, 0, 0, 0, 0)
+        writer.write('{}I'.format(10 if version < 53 else 5), *([0] * (10 if version < 53 else 5)))
+
+    texture_path_offset = writer.tell()
+    writer.write_string_ref(0, 'models/test/')
+    skin_family_offset = writer.write('H', 0)
+    writer.align(4)
+
+    flex_desc_offset = writer.tell()
+    for flex_name in flex_names:
+        writer.write_string_ref(writer.tell(), flex_name)
+
+    body_part_offset = writer.tell()
+    writer.write_string_ref(body_part_offset, name)
+    writer.write('3I', 1, 0, 16)
+
+    model_entry = writer.tell()
+    writer.write('64s', name.encode('ascii'))
+    writer.write('If', 0, 1.0)
+    model_fields = writer.write('7I', len(meshes), 0, vertex_count, 0, 0, 0, 0)
+    writer.write('2I', 0, 0)
+    writer.write('2I', 0, 0)
+    writer.write('8I', *([0] * 8))
+    writer.patch(model_fields + 4, 'I', writer.tell() - model_entry)
+
+    mesh_entries = []
+    for mesh_id, mesh in enumerate(meshes):
+        mesh_entry = writer.tell()
+        writer.write('4I', mesh.get('material_index', 0), 0, mesh['vertex_count'], mesh['vertex_index_start'])
+        writer.write('5I', len(mesh['flexes']), 0, 0, 0, mesh_id)
+        writer.write('3f', 0.0, 0.0, 0.0)
+        writer.write('I', 0)
+        writer.write('8I', mesh['vertex_count'], *([0] * 7))
+        writer.write('8I', *([0] * 8))
+        mesh_entries.append(mesh_entry)
+
+    for mesh_entry, mesh in zip(mesh_entries, meshes):
+        if not mesh['flexes']:
+            continue
+        writer.patch(mesh_entry + 20, 'I', writer.tell() - mesh_entry)
+        flex_entries = []
+        for flex_desc_index, vertex_animations in mesh['flexes']:
+            flex_entries.append(writer.tell())
+            writer.write('I', flex_desc_index)
+            writer.write('4f', 0.0, 0.0, 1.0, 1.0)
+            writer.write('3I', len(vertex_animations), 0, 0)
+            writer.write('B3x', 0)
+            writer.write('6I', *([0] * 6))
+        for flex_entry, (_, vertex_animations) in zip(flex_entries, mesh['flexes']):
+            writer.patch(flex_entry + 4 + 16 + 4, 'I', writer.tell() - flex_entry)
+            writer.buffer += vertex_animations.astype(VERT_ANIM_DTYPE).tobytes()
+
+    writer.patch(header['bone_count'], '2I', len(bone_names), bone_offset)
+    writer.patch(header['texture_count'], '2I', len(material_names), texture_offset)
+    writer.patch(header['texture_path_count'], '2I', 1, texture_path_offset)
+    writer.patch(header['skin_reference_count'], '3I', 1, 1, skin_family_offset)
+    writer.patch(header['flex_desc_count'], '2I', len(flex_names), flex_desc_offset)
+    writer.patch(header['body_part_count'], '2I', 1, body_part_offset)
+    data = bytearray(writer.finish())
+    struct.pack_into('I', data, header['file_size'], len(data))
+    return bytes(data)
+
+
+def build_vvd(vertices: np.ndarray) -> bytes:
+    """Build single LOD VVD without fixups from VVD_VERTEX_DTYPE array."""
+    header_size = struct.calcsize('4s3I8I4I')
+    return struct.pack('4s3I8I4I', b'IDSV', 4, 0, 1, len(vertices), *([0] * 7),
+                       0, header_size, header_size, 0) + vertices.astype(VVD_VERTEX_DTYPE).tobytes()
+
+
+def build_vtx(strip_vertex_counts: Sequence[int] = (3,), extra8=False, meshes: Sequence[Sequence] = None) -> bytes:
+    """Build VTX v7 with one body part, model and LOD.
+
+    meshes is a list of meshes, each a list of strip groups given as (original_mesh_vertex_index, indices)
+    with one strip per group. Without meshes the file has one triangle mesh split into given strips.
+    With extra8 strips and strip groups carry topology fields, so the file only parses in that layout
+    when one of the strips has more vertices than the plain layout allows as bone count.
+    """
+    if meshes is None:
+        meshes = [[([0, 1, 2], [0, 1, 2], strip_vertex_counts)]]
+    else:
+        meshes = [[(vertex_ids, indices, [len(vertex_ids)]) for vertex_ids, indices in mesh] for mesh in meshes]
+    writer = _Writer()
+    writer.write('2I2H5I', 7, 24, 53, 9, 3, 0, 1, 0, 1)
+    writer.write('I', writer.tell() + 4)
+    writer.write('2I', 1, 8)
+    writer.write('2i', 1, 8)
+    writer.write('2If', len(meshes), 12, 0.0)
+    mesh_entries = [writer.write('2IB', len(strip_groups), 0, 0) for strip_groups in meshes]
+
+    for mesh_entry, strip_groups in zip(mesh_entries, meshes):
+        if not strip_groups:
+            continue
+        writer.patch(mesh_entry + 4, 'I', writer.tell() - mesh_entry)
+        group_entries = []
+        for _ in strip_groups:
+            group_entries.append(writer.write('6IB', 0, 0, 0, 0, 0, 0, 0))
+            if extra8:
+                writer.write('2I', 0, 0)
+        for group_entry, (vertex_ids, indices, strip_counts) in zip(group_entries, strip_groups):
+            strip_offset = writer.tell() - group_entry
+            for vertex_count in strip_counts:
+                writer.write('4IH', len(indices), 0, vertex_count, 0, 3)
+                writer.write('B', 1)
+                writer.write('2I', 0, 0)
+                if extra8:
+                    writer.write('2i', 0, 0)
+            index_offset = writer.tell() - group_entry
+            writer.buffer += np.asarray(indices, np.uint16).tobytes()
+            vertex_offset = writer.tell() - group_entry
+            vertices = np.zeros(len(vertex_ids), VTX_VERTEX_DTYPE)
+            vertices['bone_count'] = 1
+            vertices['original_mesh_vertex_index'] = vertex_ids
+            writer.buffer += vertices.tobytes()
+            writer.patch(group_entry, '6I', len(vertex_ids), vertex_offset, len(indices), index_offset,
+                         len(strip_counts), strip_offset)
+
+    material_replacement_list_offset = writer.write('2i', 0, 0)
+    writer.patch(4 * 6, 'I', material_replacement_list_offset)
+    return writer.finish()
@@ -0,0 +1,129 @@
+import multiprocessing
+from io import BytesIO
+
+import numpy as np
+import pytest
+
+from source1_model_builder import VVD_VERTEX_DTYPE, build_mdl, build_vtx, build_vvd
+from SourceIO.content_providers.content_manager import ContentManager
+from SourceIO.source1.mdl.batch_loader import parse_model, parse_models
+from SourceIO.source1.mdl.mesh_merge import merge_meshes
+from SourceIO.source1.mdl.v49.mdl_file import Mdl
+from SourceIO.source1.vtx import open_vtx
+from SourceIO.source1.vtx.v7.vtx import Vtx as Vtx7
+
+MATERIALS = ['metal', 'glass']
+
+
+def _random_strip_group(rng, mesh_vertex_count, vertex_count, triangle_count):
+    vertex_ids = rng.choice(mesh_vertex_count, vertex_count, replace=False)
+    return vertex_ids, rng.integers(0, vertex_count, triangle_count * 3)
+
+
+def build_model(seed, name='box'):
+    """Model files with three meshes, middle one without strip groups, and triangles as model vertex ids."""
+    rng = np.random.default_rng(seed)
+    mesh_sizes = [20, 12, 30]
+    mesh_starts = np.cumsum(mesh_sizes) - mesh_sizes
+    vtx_meshes = [
+        [_random_strip_group(rng, 20, 10, 6), _random_strip_group(rng, 20, 15, 9)],
+        [],
+        [_random_strip_group(rng, 30, 25, 12)],
+    ]
+    mdl_meshes = [{'vertex_index_start': int(start), 'vertex_count': size, 'material_index': material, 'flexes': []}
+                  for start, size, material in zip(mesh_starts, mesh_sizes, [1, 0, 0])]
+    vertices = np.zeros(sum(mesh_sizes), VVD_VERTEX_DTYPE)
+    vertices['vertex'] = rng.normal(size=(len(vertices), 3))
+    vertices['normal'] = rng.normal(size=(len(vertices), 3))
+    vertices['uv'] = rng.random((len(vertices), 2))
+    vertices['bone_id'] = rng.integers(0, 2, (len(vertices), 3))
+    vertices['weight'] = rng.random((len(vertices), 3))
+
+    triangles = []
+    triangle_materials = []
+    for mesh, strip_groups in zip(mdl_meshes, vtx_meshes):
+        for vertex_ids, indices in strip_groups:
+            triangles.append(vertex_ids[indices] + mesh['vertex_index_start'])
+            triangle_materials += [mesh['material_index']] * (len(indices) // 3)
+    files = {'mdl': build_mdl(49, name, ['root', 'child'], MATERIALS, [], len(vertices), mdl_meshes),
+             'vvd': build_vvd(vertices),
+             'vtx': build_vtx(meshes=vtx_meshes)}
+    return files, vertices, np.concatenate(triangles).reshape((-1, 3)), np.array(triangle_materials)
+
+
+def check_payload(payload, vertices, triangles, triangle_materials, scale):
+    assert payload.materials == MATERIALS
+    assert payload.bone_names == ['root', 'child']
+    assert len(payload.meshes) == 1
+    mesh = payload.meshes[0]
+    # Blender winding: whole index buffer is reversed
+    expected = vertices[triangles.ravel()[::-1]]
+    np.testing.assert_allclose(mesh.vertices[mesh.indices.ravel()], expected['vertex'] * scale, rtol=1e-6)
+    np.testing.assert_array_equal(mesh.normals[mesh.indices.ravel()], expected['normal'])
+    np.testing.assert_array_equal(mesh.uv[mesh.indices.ravel()], np.stack([expected['uv'][:, 0],
+                                                                             1 - expected['uv'][:, 1]], axis=1))
+    np.testing.assert_array_equal(mesh.bone_ids[mesh.indices.ravel()], expected['bone_id'])
+    np.testing.assert_array_equal(mesh.material_ids, triangle_materials[::-1])
+
+
+def test_merge_meshes():
+    files, _, triangles, triangle_materials = build_model(0)
+    mdl = Mdl(files['mdl'])
+    mdl.read()
+    vtx = Vtx7(files['vtx'])
+    vtx.read()
+    model = mdl.body_parts[0].models[0]
+    vertex_ids, indices, material_ids = merge_meshes(model, vtx.body_parts[0].models[0].model_lods[0])
+    np.testing.assert_array_equal(vertex_ids[indices].reshape((-1, 3)), triangles)
+    np.testing.assert_array_equal(material_ids, triangle_materials)
+
+
+@pytest.mark.parametrize('wrap', [bytes, BytesIO])
+def test_parse_model(wrap):
+    files, vertices, triangles, triangle_materials = build_model(1)
+    payload = parse_model('models/test/box.mdl', wrap(files['mdl']), wrap(files['vvd']), wrap(files['vtx']), 2.0)
+    assert payload.name == 'models/test/box.mdl' and not payload.static_prop
+    check_payload(payload, vertices, triangles, triangle_materials, 2.0)
+
+
+def test_vtx_version_from_header(tmp_path):
+    files, _, _, _ = build_model(2)
+    vtx_path = tmp_path / 'box.dx90.vtx'
+    vtx_path.write_bytes(files['vtx'])
+    with vtx_path.open('rb') as vtx_file:
+        vtx = open_vtx(vtx_file)
+        assert type(vtx) is Vtx7
+        vtx.read()
+        assert len(vtx.body_parts[0].models[0].model_lods[0].meshes) == 3
+
+    unknown_version = b'\x05' + files['vtx'][1:]
+    assert parse_model('box', files['mdl'], files['vvd'], unknown_version) is None
+
+
+@pytest.fixture
+def model_directory(tmp_path):
+    content_manager = ContentManager()
+    content_manager.clean()
+    models = {}
+    for seed, name in enumerate(['crate', 'barrel']):
+        files, *expected = build_model(seed + 10, name)
+        for suffix, data in (('.mdl', files['mdl']), ('.vvd', files['vvd']), ('.dx90.vtx', files['vtx'])):
+            path = tmp_path / 'models' / 'test' / (name + suffix)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+        models[f'models/test/{name}.mdl'] = expected
+    content_manager.deserialize({'test_models': str(tmp_path)})
+    yield models
+    content_manager.clean()
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_parse_models(model_directory, workers):
+    if workers > 1 and multiprocessing.get_start_method() != 'fork':
+        pytest.skip('worker processes can only import test package when forked')
+    paths = list(model_directory) + ['models/test/missing.mdl', list(model_directory)[0]]
+    payloads = parse_models(paths, ContentManager().serialize(), scale=0.5, workers=workers)
+    assert list(payloads) == paths[:3]
+    assert payloads['models/test/missing.mdl'] is None
+    for path, (vertices, triangles, triangle_materials) in model_directory.items():
+        check_payload(payloads[path], vertices, triangles, triangle_materials, 0.5)
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from SourceIO.source2.utils.compressed_buffers import decode_index_buffer, decode_vertex_buffer
+
+# Encoded with meshoptimizer format version 0, see fixtures/generate_meshopt_fixtures.py
+FIXTURES = np.load(Path(__file__).parent / 'fixtures' / 'meshopt_buffers.npz')
+
+
+def _cases(kind):
+    cases = []
+    for key in sorted(FIXTURES.files):
+        if key.startswith(kind) and key.endswith('_encoded'):
+            _, size, count, _ = key.split('_')
+            cases.append(pytest.param(int(size), int(count), id=f'{size}x{count}'))
+    return cases
+
+
+def _fixture(kind, size, count):
+    prefix = f'{kind}_{size}_{count}'
+    return FIXTURES[f'{prefix}_encoded'].tobytes(), FIXTURES[f'{prefix}_decoded'].tobytes()
+
+
+@pytest.mark.parametrize('size,count', _cases('vertex'))
+def test_decode_vertex_buffer(size, count):
+    encoded, expected = _fixture('vertex', size, count)
+    assert len(expected) == size * count
+    assert decode_vertex_buffer(encoded, size, count) == expected
+
+
+@pytest.mark.parametrize('size,count', _cases('index'))
+def test_decode_index_buffer(size, count):
+    encoded, expected = _fixture('index', size, count)
+    codes = encoded[1:1 + count // 3]
+    # Triangles with two or three free vertices, indices encoded with varints
+    assert 0xfe in codes and 0xff in codes
+    # Free indices jump across the whole range, so varints take several bytes
+    assert np.frombuffer(expected, f'<u{size}').max() >= 1 << 15
+    assert decode_index_buffer(encoded, size, count) == expected
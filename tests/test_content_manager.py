@@ -0,0 +1,121 @@
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+from SourceIO.content_providers.content_manager import ContentManager
+from SourceIO.content_providers.content_provider_base import ContentProviderBase
+from SourceIO.utilities.byte_io_mdl import ByteIO
+
+
+class MemoryProvider(ContentProviderBase):
+    """Provider over dict of files, reader_type is the type of returned files."""
+
+    def __init__(self, name, files, reader_type=BytesIO):
+        super().__init__(Path(name))
+        self.files = files
+        self.reader_type = reader_type
+        self.index_calls = 0
+        self.opened = 0
+
+    def find_file(self, filepath):
+        cached_file = self.get_from_cache(filepath)
+        if cached_file:
+            return cached_file
+        data = self.files.get(Path(filepath).as_posix().lower(), None)
+        if data is not None:
+            self.opened += 1
+            return self.cache_file(filepath, self.reader_type(data))
+
+    def index_files(self):
+        self.index_calls += 1
+        return ((file_name, file_name) for file_name in self.files)
+
+    def open_indexed_file(self, locator):
+        return self.find_file(locator)
+
+
+@pytest.fixture
+def content_manager():
+    manager = ContentManager()
+    manager.clean()
+    yield manager
+    manager.clean()
+
+
+@pytest.mark.parametrize('reader_type', [BytesIO, ByteIO])
+def test_cache_keeps_reader_type(content_manager, reader_type):
+    provider = MemoryProvider('hfs', {'models/a.mdl': b'IDST'}, reader_type)
+    content_manager.register_content_provider('hfs', provider)
+    first = content_manager.find_file('models/a.mdl')
+    second = content_manager.find_file('models/a.mdl')
+    assert provider.opened == 1
+    assert type(first) is type(second) is type(reader_type(b''))
+    assert first.read(4) == b'IDST' and second.read(4) == b'IDST'
+
+
+def test_clean_flushes_cache(content_manager):
+    provider = MemoryProvider('mod', {'models/a.mdl': b'IDST' * 64})
+    content_manager.register_content_provider('mod', provider)
+    assert content_manager.find_file('models/a.mdl') is not None
+    assert content_manager.get_cache_stats()['entries'] == 1
+    content_manager.clean()
+    assert all(key[0] is not provider for key in ContentProviderBase.file_cache._entries)
+
+
+def _read(file):
+    return file.read() if file is not None else None
+
+
+def test_index_updates_only_changed_providers(content_manager):
+    game = MemoryProvider('game', {'materials/a.vmt': b'game a', 'materials/b.vmt': b'game b'})
+    mod = MemoryProvider('mod', {'materials/b.vmt': b'mod b', 'materials/c.vmt': b'mod c'})
+    content_manager.register_content_provider('game', game)
+    content_manager.register_content_provider('mod', mod)
+    assert _read(content_manager.find_file('materials/b.vmt')) == b'game b'
+    assert _read(content_manager.find_file('materials/d.vmt')) is None
+
+    # Map pack is assigned directly for every imported map
+    first_map = MemoryProvider('map1', {'materials/a.vmt': b'map1 a', 'materials/d.vmt': b'map1 d'})
+    content_manager.content_providers['map'] = first_map
+    assert _read(content_manager.find_file('materials/d.vmt')) == b'map1 d'
+    assert _read(content_manager.find_file('materials/a.vmt')) == b'game a'
+
+    second_map = MemoryProvider('map2', {'materials/c.vmt': b'map2 c', 'materials/e.vmt': b'map2 e'})
+    content_manager.content_providers['map'] = second_map
+    assert _read(content_manager.find_file('materials/d.vmt')) is None
+    assert _read(content_manager.find_file('materials/e.vmt')) == b'map2 e'
+    assert _read(content_manager.find_file('materials/c.vmt')) == b'mod c'
+    assert (game.index_calls, mod.index_calls, first_map.index_calls, second_map.index_calls) == (1, 1, 1, 1)
+
+    # Path claimed by a removed provider falls back to the next one
+    content_manager.content_providers['map'] = second_map
+    del content_manager.content_providers['game']
+    assert _read(content_manager.find_file('materials/b.vmt')) == b'mod b'
+    assert _read(content_manager.find_file('materials/a.vmt')) is None
+    assert (game.index_calls, mod.index_calls, second_map.index_calls) == (1, 1, 1)
+
+
+def test_index_matches_full_rebuild(content_manager):
+    providers = [MemoryProvider(f'p{i}', {f'f{j}.txt': f'{i} {j}'.encode() for j in range(i, i + 6)})
+                 for i in range(8)]
+    for i in (0, 3, 1, 5):
+        content_manager.content_providers[f'p{i}'] = providers[i]
+        content_manager.find_file('f0.txt')
+    content_manager.content_providers['p3'] = providers[7]
+    del content_manager.content_providers['p1']
+    content_manager.find_file('f0.txt')
+    incremental = dict(content_manager._file_index)
+    content_manager.build_file_index()
+    assert content_manager._file_index == incremental
+
+
+def test_unindexed_provider_priority(content_manager):
+    class UnindexedProvider(MemoryProvider):
+        def index_files(self):
+            return None
+
+    content_manager.register_content_provider('loose', UnindexedProvider('loose', {'a.txt': b'loose'}))
+    content_manager.register_content_provider('pak', MemoryProvider('pak', {'a.txt': b'pak', 'b.txt': b'pak b'}))
+    assert _read(content_manager.find_file('a.txt')) == b'loose'
+    assert _read(content_manager.find_file('b.txt')) == b'pak b'
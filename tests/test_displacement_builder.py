@@ -0,0 +1,204 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from SourceIO.source1.bsp.datatypes.face import Face
+from SourceIO.source1.bsp.displacement_builder import VERTEX_COLOR_DEFAULTS, build_displacements, \
+    merge_displacements_by
+from SourceIO.source1.bsp.lumps.displacement_lump import DispMultiblend, DispVert
+
+SCALE = 0.5
+
+
+class FakeBSP:
+    """Quad faces with displacements, displacement records are given as (corners, start corner, power, tex info)."""
+
+    def __init__(self, displacements, multiblend):
+        rng = np.random.default_rng(0)
+        vertices = []
+        edges = [(0, 0)]
+        surf_edges = []
+        face_data = np.zeros(len(displacements) + 1, Face.dtype)
+        infos = []
+        vert_start = 0
+        for face_id, (corners, start_corner, power, tex_info_id) in enumerate(displacements, 1):
+            first_vertex = len(vertices)
+            vertices.extend(corners)
+            face_data[face_id]['first_edge'] = len(surf_edges)
+            face_data[face_id]['edge_count'] = 4
+            face_data[face_id]['tex_info_id'] = tex_info_id
+            for i in range(4):
+                # Odd edges are stored reversed
+                if i % 2:
+                    edges.append((first_vertex + (i + 1) % 4, first_vertex + i))
+                    surf_edges.append(-(len(edges) - 1))
+                else:
+                    edges.append((first_vertex + i, first_vertex + (i + 1) % 4))
+                    surf_edges.append(len(edges) - 1)
+            infos.append(SimpleNamespace(map_face=face_id, power=power, disp_vert_start=vert_start,
+                                         start_position=np.array(corners[start_corner], np.float32),
+                                         has_multiblend=multiblend[face_id - 1]))
+            vert_start += ((1 << power) + 1) ** 2
+
+        disp_verts = np.zeros(vert_start, DispVert.dtype)
+        disp_verts['position'] = rng.normal(size=(vert_start, 3))
+        disp_verts['dist'] = rng.uniform(0, 16, (vert_start, 1))
+        disp_verts['alpha'] = rng.uniform(0, 255, (vert_start, 1))
+        blend_count = sum(((1 << info.power) + 1) ** 2 for info in infos if info.has_multiblend)
+        blends = np.zeros(blend_count, DispMultiblend.dtype)
+        for field in DispMultiblend.dtype.names:
+            blends[field] = rng.random(blends[field].shape)
+
+        texture_infos = [SimpleNamespace(texture_vectors=[[1 / 4, 0, 0, 8], [0, -1 / 4, 0, 16]], texture_data_id=0),
+                         SimpleNamespace(texture_vectors=[[0.5, 0.5, 0, 0], [0, 0.25, 0.25, 32]], texture_data_id=1)]
+        texture_datas = [SimpleNamespace(view_width=512, view_height=256),
+                         SimpleNamespace(view_width=128, view_height=128)]
+        self.lumps = {
+            'LUMP_FACES': SimpleNamespace(face_data=face_data),
+            'LUMP_SURFEDGES': SimpleNamespace(surf_edges=np.array(surf_edges, np.int32)),
+            'LUMP_EDGES': SimpleNamespace(edges=np.array(edges, np.uint16)),
+            'LUMP_VERTICES': SimpleNamespace(vertices=np.array(vertices, np.float32)),
+            'LUMP_DISPINFO': SimpleNamespace(infos=infos),
+            'LUMP_DISP_VERTS': SimpleNamespace(vertices=disp_verts,
+                                               transformed_vertices=disp_verts['position'] * disp_verts['dist']),
+            'LUMP_DISP_MULTIBLEND': SimpleNamespace(blends=blends),
+            'LUMP_TEXINFO': SimpleNamespace(texture_info=texture_infos),
+            'LUMP_TEXDATA': SimpleNamespace(texture_data=texture_datas),
+        }
+
+    def get_lump(self, name):
+        return self.lumps.get(name)
+
+
+def _reference_displacement(bsp, info):
+    """Previous per displacement implementation without Blender parts."""
+    face = bsp.lumps['LUMP_FACES'].face_data[info.map_face]
+    surf_edges = bsp.lumps['LUMP_SURFEDGES'].surf_edges[face['first_edge']:face['first_edge'] + face['edge_count']]
+    reverse = np.subtract(1, (surf_edges > 0).astype(np.uint8))
+    face_vertex_ids = bsp.lumps['LUMP_EDGES'].edges[np.abs(surf_edges)][np.arange(4), reverse]
+    face_vertices = bsp.lumps['LUMP_VERTICES'].vertices[face_vertex_ids] * SCALE
+    min_index = np.where(np.sum(np.isclose(face_vertices, info.start_position * SCALE, 0.5e-2), axis=1) == 3)[0][0]
+
+    left_edge = face_vertices[(1 + min_index) & 3] - face_vertices[min_index & 3]
+    right_edge = face_vertices[(2 + min_index) & 3] - face_vertices[(3 + min_index) & 3]
+    num_edge_vertices = (1 << info.power) + 1
+    subdivide_scale = 1.0 / (num_edge_vertices - 1)
+    disp_vertices = np.zeros((num_edge_vertices ** 2, 3), np.float32)
+    for i in range(num_edge_vertices):
+        left_end = left_edge * subdivide_scale * i + face_vertices[min_index & 3]
+        right_end = right_edge * subdivide_scale * i + face_vertices[(3 + min_index) & 3]
+        for j in range(num_edge_vertices):
+            disp_vertices[i * num_edge_vertices + j] = left_end + (right_end - left_end) * subdivide_scale * j
+
+    texture_info = bsp.lumps['LUMP_TEXINFO'].texture_info[face['tex_info_id']]
+    texture_data = bsp.lumps['LUMP_TEXDATA'].texture_data[texture_info.texture_data_id]
+    tv1, tv2 = np.array(texture_info.texture_vectors, np.float32)
+    uv = np.zeros((num_edge_vertices ** 2, 2), np.float32)
+    uv[:, 0] = (np.dot(disp_vertices, tv1[:3]) + tv1[3] * SCALE) / (texture_data.view_width * SCALE)
+    uv[:, 1] = 1 - (np.dot(disp_vertices, tv2[:3]) + tv2[3] * SCALE) / (texture_data.view_height * SCALE)
+
+    triangles = []
+    for i in range(num_edge_vertices - 1):
+        for j in range(num_edge_vertices - 1):
+            index = i * num_edge_vertices + j
+            if index & 1:
+                triangles.append((index, index + 1, index + num_edge_vertices))
+                triangles.append((index + 1, index + num_edge_vertices + 1, index + num_edge_vertices))
+            else:
+                triangles.append((index, index + num_edge_vertices + 1, index + num_edge_vertices))
+                triangles.append((index, index + 1, index + num_edge_vertices + 1))
+
+    vertex_ids = np.arange(num_edge_vertices ** 2) + info.disp_vert_start
+    offsets = bsp.lumps['LUMP_DISP_VERTS'].transformed_vertices[vertex_ids] * SCALE
+    alpha = bsp.lumps['LUMP_DISP_VERTS'].vertices['alpha'][vertex_ids]
+    return disp_vertices, disp_vertices + offsets, uv, triangles, np.hstack([alpha, alpha, alpha, np.ones_like(alpha)])
+
+
+CORNERS = [(0, 0, 0), (0, 256, 0), (512, 256, 64), (512, 0, 64)]
+DISPLACEMENTS = [
+    (CORNERS, 0, 2, 0),
+    # Start position at third corner, grid starts there
+    ([(1024 + x, y, z) for x, y, z in CORNERS], 2, 3, 1),
+    ([(x, 1024 + y, z) for x, y, z in CORNERS], 1, 2, 0),
+]
+
+
+@pytest.fixture
+def bsp():
+    return FakeBSP(DISPLACEMENTS, multiblend=[True, False, True])
+
+
+def test_displacements_match_reference(bsp):
+    meshes = build_displacements(bsp, SCALE)
+    assert [mesh.name for mesh in meshes] == ['disp_1', 'disp_2', 'disp_3']
+    assert [mesh.tex_data_id for mesh in meshes] == [0, 1, 0]
+    for mesh, info in zip(meshes, bsp.lumps['LUMP_DISPINFO'].infos):
+        grid, positions, uv, triangles, alpha = _reference_displacement(bsp, info)
+        num_edge_vertices = (1 << info.power) + 1
+        assert mesh.vertices.shape == (num_edge_vertices ** 2, 3)
+        np.testing.assert_allclose(mesh.vertices, positions, rtol=1e-5, atol=1e-4)
+        np.testing.assert_allclose(mesh.uv, uv, rtol=1e-5, atol=1e-5)
+        assert mesh.indices.tolist() == [list(triangle) for triangle in triangles]
+        np.testing.assert_allclose(mesh.vertex_colors['vertex_alpha'], alpha)
+
+
+def test_grid_corners(bsp):
+    meshes = build_displacements(bsp, SCALE)
+    disp_offsets = bsp.lumps['LUMP_DISP_VERTS'].transformed_vertices * SCALE
+    for mesh, info, (corners, start_corner, _, _) in zip(meshes, bsp.lumps['LUMP_DISPINFO'].infos, DISPLACEMENTS):
+        n = (1 << info.power) + 1
+        grid = mesh.vertices - disp_offsets[info.disp_vert_start:info.disp_vert_start + n * n]
+        corners = np.roll(np.array(corners, np.float32), -start_corner, axis=0) * SCALE
+        # Rows go from start corner along the next edge, columns towards the last corner
+        np.testing.assert_allclose(grid[[0, (n - 1) * n, n * n - 1, n - 1]], corners, atol=1e-4)
+        np.testing.assert_allclose(grid.reshape((n, n, 3))[n // 2, n // 2], corners.mean(axis=0), atol=1e-4)
+
+
+def test_multiblend_layers(bsp):
+    meshes = build_displacements(bsp, SCALE)
+    blends = bsp.lumps['LUMP_DISP_MULTIBLEND'].blends
+    assert set(meshes[1].vertex_colors) == {'vertex_alpha'}
+    # Records are stored back to back only for displacements that have them
+    blend_ranges = [blends[:len(meshes[0].vertices)], blends[len(meshes[0].vertices):]]
+    assert len(blend_ranges[1]) == len(meshes[2].vertices)
+    for mesh, mesh_blends in zip([meshes[0], meshes[2]], blend_ranges):
+        colors = mesh.vertex_colors
+        assert set(colors) == {'vertex_alpha', *VERTEX_COLOR_DEFAULTS}
+        np.testing.assert_array_equal(colors['multiblend'], mesh_blends['multiblend'][:, [3, 1, 2, 0]])
+        np.testing.assert_array_equal(colors['alphablend'], mesh_blends['alphablend'])
+        for layer_id in range(4):
+            np.testing.assert_array_equal(colors[f'multiblend_color{layer_id}'][:, :3],
+                                          mesh_blends['multiblend_colors'][:, layer_id])
+            assert (colors[f'multiblend_color{layer_id}'][:, 3] == 1).all()
+
+
+def test_merge_by_material(bsp):
+    meshes = build_displacements(bsp, SCALE)
+    merged = merge_displacements_by(meshes, lambda mesh: mesh.tex_data_id)
+    assert list(merged) == [0, 1]
+    first, _, third = meshes
+    material_mesh = merged[0]
+    assert material_mesh.name == '0' and material_mesh.tex_data_id == 0
+    np.testing.assert_array_equal(material_mesh.vertices, np.concatenate([first.vertices, third.vertices]))
+    np.testing.assert_array_equal(material_mesh.uv, np.concatenate([first.uv, third.uv]))
+    np.testing.assert_array_equal(material_mesh.indices,
+                                  np.concatenate([first.indices, third.indices + len(first.vertices)]))
+    np.testing.assert_array_equal(material_mesh.vertex_colors['vertex_alpha'],
+                                  np.concatenate([first.vertex_colors['vertex_alpha'],
+                                                  third.vertex_colors['vertex_alpha']]))
+
+    for layer_name in VERTEX_COLOR_DEFAULTS:
+        np.testing.assert_array_equal(material_mesh.vertex_colors[layer_name],
+                                      np.concatenate([first.vertex_colors[layer_name],
+                                                      third.vertex_colors[layer_name]]))
+
+    mixed = merge_displacements_by(meshes, lambda mesh: 'all')['all']
+    assert mixed.vertices.shape[0] == sum(mesh.vertices.shape[0] for mesh in meshes)
+    second_range = slice(len(first.vertices), len(first.vertices) + len(meshes[1].vertices))
+    for layer_name, default in VERTEX_COLOR_DEFAULTS.items():
+        layer = mixed.vertex_colors[layer_name]
+        # Displacements without multiblend data get default layer values
+        assert (layer[second_range] == default).all()
+        np.testing.assert_array_equal(layer[:len(first.vertices)], first.vertex_colors[layer_name])
+        np.testing.assert_array_equal(layer[-len(third.vertices):], third.vertex_colors[layer_name])
@@ -0,0 +1,49 @@
+import random
+
+from SourceIO.source1.bsp.lumps.entity_lump import parse_entities
+from SourceIO.utilities.keyvalues import KVParser
+
+
+def kv_parser_entities(data):
+    parser = KVParser('EntityLump', data)
+    entities = []
+    entity = parser.parse_value()
+    while entity is not None:
+        entities.append(entity)
+        entity = parser.parse_value()
+    return entities
+
+
+def random_entities(count, seed=0):
+    rng = random.Random(seed)
+    values = ['', 'worldspawn', 'prop_static', '1', '-16 32 0.5', 'models/props/crate.mdl', 'OnTrigger,!self,Kill,,0,-1',
+              'with { braces }', "single ' quote", 'a/b\\c']
+    bare_values = ['1', '0', '-1', '255', '0.25', 'light', 'func_detail', 'prop_physics_multiplayer', '$skin']
+    blocks = []
+    for _ in range(count):
+        lines = []
+        for pair_id in range(rng.randrange(1, 12)):
+            key = rng.choice(['classname', 'Origin', 'angles', 'targetname', 'OnTrigger', 'model', f'key{pair_id}'])
+            if rng.random() < 0.2:
+                lines.append(f'"{key}" {rng.choice(bare_values)}')
+            else:
+                lines.append(f'"{key}"{rng.choice([" ", "  ", chr(9)])}"{rng.choice(values)}"')
+        blocks.append('{\n' + '\n'.join(lines) + '\n}')
+    return '\n'.join(blocks) + '\n\x00'
+
+
+def test_same_as_kv_parser():
+    data = random_entities(500)
+    entities = parse_entities(data)
+    assert len(entities) == 500
+    assert entities == kv_parser_entities(data)
+
+
+def test_unquoted_values():
+    entities = parse_entities('{\n"classname" light\n"_light" "255 255 255 200"\n"spawnflags" 1\n"style" -1\n}\n')
+    assert entities == [{'classname': 'light', '_light': '255 255 255 200', 'spawnflags': '1', 'style': '-1'}]
+
+
+def test_duplicate_keys():
+    entities = parse_entities('{ "OnTrigger" "a,b" "classname" "trigger_once" "ontrigger" "c,d" }')
+    assert entities == [{'ontrigger': ['a,b', 'c,d'], 'classname': 'trigger_once'}]
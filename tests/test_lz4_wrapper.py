@@ -0,0 +1,122 @@
+import ctypes
+import random
+
+import pytest
+
+from SourceIO.utilities.lz4_wrapper import LZ4ChainDecoder, LZ4Exception, LZ4Wrapper, Mem
+
+BLOCK_SIZE = Mem.K16
+
+
+def _sample_data(size):
+    rng = random.Random(21)
+    words = [bytes(rng.randrange(256) for _ in range(rng.randrange(4, 24))) for _ in range(64)]
+    data = bytearray()
+    while len(data) < size:
+        data += rng.choice(words) if rng.random() < 0.9 else bytes([rng.randrange(256)]) * rng.randrange(4, 300)
+    return bytes(data[:size])
+
+
+def _literals(data):
+    """Sequence with literals only, it always ends a block."""
+    token_length = min(len(data), 15)
+    result = bytearray([token_length << 4])
+    if token_length == 15:
+        length = len(data) - 15
+        while length >= 255:
+            result.append(255)
+            length -= 255
+        result.append(length)
+    return bytes(result + data)
+
+
+def _match(literals, offset, match_length):
+    assert len(literals) < 15 and 4 <= match_length < 19
+    return bytes([(len(literals) << 4) | (match_length - 4)]) + literals + offset.to_bytes(2, 'little')
+
+
+# Second and third blocks copy data decoded by previous blocks, blocks end with 12 literals as LZ4 requires
+_TAIL = b'-end-of-block'
+HANDMADE_BLOCKS = [
+    (_literals(b'0123456789abcdef'), b'0123456789abcdef'),
+    (_match(b'xy', 18, 8) + _literals(_TAIL), b'xy01234567' + _TAIL),
+    (_match(b'', 3, 10) + _match(b'', 49, 16) + _literals(_TAIL), b'ockockocko' + b'0123456789abcdef' + _TAIL),
+]
+
+
+def _compress_chain(data):
+    """Compress data into chained blocks with LZ4 streaming API, blocks may reference previous blocks."""
+    lib = LZ4Wrapper.lib_cdll
+    lib.LZ4_createStream.restype = ctypes.c_void_p
+    lib.LZ4_freeStream.argtypes = [ctypes.c_void_p]
+    lib.LZ4_compress_fast_continue.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_char_p,
+                                               ctypes.c_int, ctypes.c_int, ctypes.c_int]
+    lib.LZ4_compress_fast_continue.restype = ctypes.c_int
+    # Previous blocks must stay at the same address while the stream is used
+    source = ctypes.create_string_buffer(data, len(data))
+    stream = lib.LZ4_createStream()
+    blocks = []
+    try:
+        for offset in range(0, len(data), BLOCK_SIZE):
+            size = min(BLOCK_SIZE, len(data) - offset)
+            destination = ctypes.create_string_buffer(LZ4Wrapper().compress_bound(size))
+            compressed_size = lib.LZ4_compress_fast_continue(stream, ctypes.addressof(source) + offset, destination,
+                                                             size, len(destination), 1)
+            assert compressed_size > 0
+            blocks.append((destination.raw[:compressed_size], size))
+    finally:
+        lib.LZ4_freeStream(stream)
+    return blocks
+
+
+@pytest.fixture(params=['native', 'python'])
+def decoder_path(request, monkeypatch):
+    if request.param == 'native':
+        if LZ4Wrapper.lib_cdll is None:
+            pytest.skip('liblz4 is not available')
+    else:
+        monkeypatch.setattr(LZ4Wrapper, 'lib_cdll', None)
+    return request.param
+
+
+def test_chained_handmade_blocks(decoder_path):
+    decoder = LZ4ChainDecoder()
+    assert decoder.is_native == (decoder_path == 'native')
+    for compressed, expected in HANDMADE_BLOCKS:
+        assert decoder.decompress(compressed, len(expected)) == expected
+
+
+def test_chained_block_needs_history(decoder_path):
+    compressed, expected = HANDMADE_BLOCKS[1]
+    with pytest.raises(LZ4Exception):
+        LZ4ChainDecoder().decompress(compressed, len(expected))
+
+
+@pytest.fixture(scope='module')
+def chained_blocks():
+    if LZ4Wrapper.lib_cdll is None:
+        pytest.skip('liblz4 is required to compress chained blocks')
+    data = _sample_data(Mem.K256 + 1234)
+    return data, _compress_chain(data)
+
+
+def test_chained_round_trip(chained_blocks, decoder_path):
+    data, blocks = chained_blocks
+    # Streaming compressor must have produced blocks that depend on previous ones
+    with pytest.raises(LZ4Exception):
+        for compressed, size in blocks[1:]:
+            LZ4Wrapper().decompress_safe(compressed, size)
+
+    decoder = LZ4ChainDecoder()
+    decoded = b''.join(decoder.decompress(compressed, size) for compressed, size in blocks)
+    assert decoded == data
+
+
+def test_round_trip(decoder_path):
+    data = _sample_data(Mem.K64 * 3)
+    if LZ4Wrapper.lib_cdll is None:
+        compressed = _literals(data)
+    else:
+        compressed = LZ4Wrapper().compress_fast(data)
+        assert len(compressed) < len(data)
+    assert LZ4Wrapper().decompress_safe(compressed, len(data)) == data
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from SourceIO.source2.blocks.mrph_block import MRPH
+
+ATLAS_WIDTH, ATLAS_HEIGHT = 64, 48
+LOOKUP_WIDTH, LOOKUP_HEIGHT = 16, 12
+BUNDLE_COUNT = 2
+
+
+def _morph_block(data):
+    # DataBlock constructor imports resource types that need bpy
+    block = MRPH.__new__(MRPH)
+    block.data = data
+    block._morph_rects = {}
+    block._morph_deltas = {}
+    return block
+
+
+def _random_rect(rng):
+    width, height = rng.integers(1, 7, 2)
+    bundles = []
+    for _ in range(BUNDLE_COUNT):
+        bundles.append({'m_flULeftSrc': rng.integers(0, ATLAS_WIDTH - width + 1) / ATLAS_WIDTH,
+                        'm_flVTopSrc': rng.integers(0, ATLAS_HEIGHT - height + 1) / ATLAS_HEIGHT,
+                        'm_ranges': rng.uniform(0, 4, 4).tolist(),
+                        'm_offsets': rng.uniform(-2, 0, 4).tolist()})
+    return {'m_flUWidthSrc': width / ATLAS_WIDTH, 'm_flVHeightSrc': height / ATLAS_HEIGHT,
+            'm_nXLeftDst': int(rng.integers(0, LOOKUP_WIDTH - width + 1)),
+            'm_nYTopDst': int(rng.integers(0, LOOKUP_HEIGHT - height + 1)),
+            'm_bundleDatas': bundles}
+
+
+def _random_morph_data(rng, morph_count):
+    morphs = []
+    for morph_id in range(morph_count):
+        # Small lookup grid makes rects of one morph overlap a lot, some morphs have no rects
+        rect_count = 0 if morph_id % 5 == 0 else int(rng.integers(1, 8))
+        morphs.append({'m_name': f'morph_{morph_id}',
+                       'm_morphRectDatas': [_random_rect(rng) for _ in range(rect_count)]})
+    return {'m_nWidth': LOOKUP_WIDTH, 'm_nHeight': LOOKUP_HEIGHT,
+            'm_bundleTypes': ['MORPH_BUNDLE_TYPE_POSITION_SPEED', 'MORPH_BUNDLE_TYPE_NORMAL_WRINKLE'][:BUNDLE_COUNT],
+            'm_morphDatas': morphs}
+
+
+def _dense_deltas(atlas, morph):
+    """Previous implementation, full (bundle, height, width, 4) grid written rect after rect."""
+    deltas = np.zeros((BUNDLE_COUNT, LOOKUP_HEIGHT, LOOKUP_WIDTH, 4), np.float32)
+    touched = np.zeros((LOOKUP_HEIGHT, LOOKUP_WIDTH), bool)
+    for rect in morph['m_morphRectDatas']:
+        rect_width = round(rect['m_flUWidthSrc'] * ATLAS_WIDTH)
+        rect_height = round(rect['m_flVHeightSrc'] * ATLAS_HEIGHT)
+        y_slice = slice(rect['m_nYTopDst'], rect['m_nYTopDst'] + rect_height)
+        x_slice = slice(rect['m_nXLeftDst'], rect['m_nXLeftDst'] + rect_width)
+        for bundle_id, bundle in enumerate(rect['m_bundleDatas']):
+            rect_u = round(bundle['m_flULeftSrc'] * ATLAS_WIDTH)
+            rect_v = round(bundle['m_flVTopSrc'] * ATLAS_HEIGHT)
+            pixels = atlas[rect_v:rect_v + rect_height, rect_u:rect_u + rect_width, :]
+            deltas[bundle_id, y_slice, x_slice] = np.divide(pixels, 255) * bundle['m_ranges'] + bundle['m_offsets']
+        touched[y_slice, x_slice] = True
+    return deltas.reshape((BUNDLE_COUNT, -1, 4)), touched.ravel()
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_morph_deltas_match_dense(seed):
+    rng = np.random.default_rng(seed)
+    data = _random_morph_data(rng, 30)
+    atlas = rng.integers(0, 256, (ATLAS_HEIGHT, ATLAS_WIDTH, 4), np.uint8)
+    block = _morph_block(data)
+    block.set_morph_atlas(atlas)
+    assert block.bundle_count == BUNDLE_COUNT
+    assert block.morph_names == [morph['m_name'] for morph in data['m_morphDatas']]
+
+    overlapping = 0
+    for morph in data['m_morphDatas']:
+        vertex_ids, deltas = block.get_morph_deltas(morph['m_name'])
+        dense, touched = _dense_deltas(atlas, morph)
+        overlapping += sum(round(rect['m_flUWidthSrc'] * ATLAS_WIDTH) * round(rect['m_flVHeightSrc'] * ATLAS_HEIGHT)
+                           for rect in morph['m_morphRectDatas']) > touched.sum()
+        assert deltas.shape == (BUNDLE_COUNT, vertex_ids.size, 4) and deltas.dtype == np.float32
+        assert sorted(vertex_ids.tolist()) == np.flatnonzero(touched).tolist()
+        np.testing.assert_array_equal(deltas, dense[:, vertex_ids])
+        if not morph['m_morphRectDatas']:
+            assert vertex_ids.size == 0
+        assert block.get_morph_deltas(morph['m_name'])[1] is deltas
+    assert overlapping > 5
+
+
+def test_new_atlas_drops_decoded_morphs():
+    rng = np.random.default_rng(3)
+    data = _random_morph_data(rng, 3)
+    block = _morph_block(data)
+    block.set_morph_atlas(rng.integers(0, 256, (ATLAS_HEIGHT, ATLAS_WIDTH, 4), np.uint8))
+    _, old_deltas = block.get_morph_deltas('morph_1')
+    atlas = rng.integers(0, 256, (ATLAS_HEIGHT, ATLAS_WIDTH, 4), np.uint8)
+    block.set_morph_atlas(atlas)
+    vertex_ids, deltas = block.get_morph_deltas('morph_1')
+    assert deltas is not old_deltas
+    np.testing.assert_array_equal(deltas, _dense_deltas(atlas, data['m_morphDatas'][1])[0][:, vertex_ids])
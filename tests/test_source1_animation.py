@@ -0,0 +1,106 @@
+import struct
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from SourceIO.source1.mdl.structs.anim_desc import AnimBone, AnimBoneFlags, AnimDesc
+from SourceIO.utilities.byte_io_mdl import ByteIO
+from SourceIO.utilities.math_utilities import (euler_to_matrix, eulers_to_matrices, matrices_to_eulers,
+                                               quat_to_matrix, quats_to_eulers)
+
+FRAME_COUNT = 12
+
+
+def _anim_value_streams(tracks):
+    """Value pointers of all tracks followed by one RLE run per component."""
+    pointers_size = 6 * len(tracks)
+    pointers = b''
+    streams = b''
+    for track_id, values in enumerate(tracks):
+        offsets = []
+        for component in range(3):
+            offsets.append(pointers_size - 6 * track_id + len(streams))
+            streams += struct.pack('2B', FRAME_COUNT, FRAME_COUNT) + values[:, component].astype(np.int16).tobytes()
+        pointers += struct.pack('3h', *offsets)
+    return pointers + streams
+
+
+def _read_anim_bone(bone_id, flags, rng):
+    data = b''
+    if flags & AnimBoneFlags.RawRot:
+        data += np.array([30000, 40000, 20000 | 0x8000], np.uint16).tobytes()
+    if flags & AnimBoneFlags.RawPos:
+        data += np.array([1.5, -2, 3], np.float16).tobytes()
+    tracks = [rng.integers(-3000, 3000, (FRAME_COUNT, 3))
+              for flag in (AnimBoneFlags.AnimRot, AnimBoneFlags.AnimPos) if flags & flag]
+    if tracks:
+        data += _anim_value_streams(tracks)
+    anim_bone = AnimBone(bone_id, flags, FRAME_COUNT)
+    anim_bone.read(ByteIO(data))
+    return anim_bone
+
+
+def test_stack_bone_tracks():
+    rng = np.random.default_rng(19)
+    bones = [SimpleNamespace(position_scale=rng.uniform(0.1, 1, 3), rotation_scale=rng.uniform(1e-4, 1e-3, 3))
+             for _ in range(5)]
+    anim_desc = AnimDesc()
+    anim_desc.frame_count = FRAME_COUNT
+    anim_desc.anim_bones = [
+        _read_anim_bone(0, AnimBoneFlags.RawPos | AnimBoneFlags.RawRot, rng),
+        _read_anim_bone(1, AnimBoneFlags.AnimPos | AnimBoneFlags.AnimRot, rng),
+        _read_anim_bone(3, AnimBoneFlags.AnimRot, rng),
+        _read_anim_bone(-1, AnimBoneFlags.AnimPos, rng),
+    ]
+
+    positions, position_key_counts, rotations, rotation_key_counts = anim_desc.stack_bone_tracks(bones)
+    assert positions.shape == rotations.shape == (FRAME_COUNT, len(bones), 3)
+    assert position_key_counts.tolist() == [1, FRAME_COUNT, 0, 0, 0]
+    assert rotation_key_counts.tolist() == [1, FRAME_COUNT, 0, FRAME_COUNT, 0]
+
+    raw_bone, animated_bone, rotated_bone = anim_desc.anim_bones[:3]
+    np.testing.assert_allclose(positions[0, 0], raw_bone.pos * bones[0].position_scale)
+    np.testing.assert_allclose(rotations[0, 0], quats_to_eulers(raw_bone.quat) * bones[0].rotation_scale)
+    np.testing.assert_allclose(positions[:, 1], animated_bone.pos_anim * bones[1].position_scale)
+    np.testing.assert_allclose(rotations[:, 1], animated_bone.vec_rot_anim * bones[1].rotation_scale)
+    np.testing.assert_allclose(rotations[:, 3], rotated_bone.vec_rot_anim * bones[3].rotation_scale)
+    assert not positions[1:, 0].any() and not positions[:, 2:].any()
+
+
+def _random_eulers(rng, count):
+    eulers = rng.uniform(-7, 7, (count, 3))
+    # Gimbal lock
+    eulers[:20, 1] = np.pi / 2
+    eulers[20:40, 1] = -np.pi / 2
+    return eulers
+
+
+def test_euler_matrix_round_trip():
+    rng = np.random.default_rng(20)
+    eulers = _random_eulers(rng, 500)
+    matrices = eulers_to_matrices(eulers)
+    for euler, matrix in zip(eulers[::25], matrices[::25]):
+        np.testing.assert_allclose(matrix, euler_to_matrix(euler), atol=1e-12)
+    np.testing.assert_allclose(eulers_to_matrices(matrices_to_eulers(matrices)), matrices, atol=1e-9)
+    assert np.abs(matrices_to_eulers(matrices)).max() <= np.pi
+
+    quats = rng.normal(size=(100, 4))
+    quats /= np.linalg.norm(quats, axis=1, keepdims=True)
+    for quat, euler in zip(quats, quats_to_eulers(quats)):
+        np.testing.assert_allclose(eulers_to_matrices(euler), quat_to_matrix(quat), atol=1e-9)
+
+
+def test_eulers_match_mathutils():
+    mathutils = pytest.importorskip('mathutils')
+    rng = np.random.default_rng(21)
+    eulers = _random_eulers(rng, 500)
+    matrices = eulers_to_matrices(eulers)
+    expected_matrices = np.array([mathutils.Euler(euler).to_matrix() for euler in eulers])
+    np.testing.assert_allclose(matrices, expected_matrices, atol=1e-6)
+    expected_eulers = np.array([mathutils.Matrix(matrix).to_euler() for matrix in matrices])
+    np.testing.assert_allclose(matrices_to_eulers(matrices), expected_eulers, atol=1e-5)
+
+    quats = rng.normal(size=(500, 4))
+    expected_eulers = np.array([mathutils.Quaternion(quat[[3, 0, 1, 2]]).to_euler() for quat in quats])
+    np.testing.assert_allclose(quats_to_eulers(quats), expected_eulers, atol=1e-5)
@@ -0,0 +1,123 @@
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from source1_model_builder import VERT_ANIM_DTYPE, VVD_VERTEX_DTYPE, build_mdl, build_vtx, build_vvd
+from SourceIO.source1.mdl.structs.bone import BoneV49
+from SourceIO.source1.mdl.v49.mdl_file import Mdl
+from SourceIO.source1.vtx.v7.vtx import Vtx
+from SourceIO.source1.vvd import Vvd
+
+
+def _model_set(version, name, bone_names, flex_names, extra8):
+    vertex_animations = np.zeros(1, VERT_ANIM_DTYPE)
+    vertices = np.zeros(3, VVD_VERTEX_DTYPE)
+    mesh = dict(vertex_index_start=0, vertex_count=3, flexes=[(len(flex_names) - 1, vertex_animations)])
+    return dict(version=version, bone_names=bone_names, flex_names=flex_names, extra8=extra8,
+                mdl=build_mdl(version, name, bone_names, ['materials/' + name], flex_names, 3, [mesh]),
+                vvd=build_vvd(vertices),
+                # Second strip of extra8 file is only readable with topology fields
+                vtx=build_vtx([3, 300] if extra8 else [3, 3], extra8=extra8))
+
+
+# Version 53 bones and materials have a different size, so mixed up versions break parsing
+MODEL_SETS = [
+    _model_set(49, 'model_a', ['root_a', 'spine_a', 'head_a'], ['a_smile', 'a_blink'], extra8=False),
+    _model_set(53, 'model_b', ['root_b'], ['b_frown'], extra8=True),
+]
+
+
+def _parse(model_set):
+    mdl = Mdl(model_set['mdl'])
+    vvd = Vvd(model_set['vvd'])
+    vtx = Vtx(model_set['vtx'])
+    mdl.read()
+    vvd.read()
+    vtx.read()
+    return mdl, vvd, vtx
+
+
+def _check(model_set, mdl, vvd, vtx):
+    assert mdl.get_value('MDL') is mdl
+    assert mdl.header.get_value('mdl_version') == model_set['version']
+    assert [bone.name for bone in mdl.bones] == model_set['bone_names']
+    for bone in mdl.bones:
+        assert bone.get_value('MDL') is mdl
+        assert bone.mdl_version == model_set['version']
+    assert mdl.materials[0].mdl_version == model_set['version']
+    flex = mdl.body_parts[0].models[0].meshes[0].flexes[0]
+    assert flex.get_value('MDL') is mdl
+    assert flex.name == model_set['flex_names'][-1]
+
+    assert vvd.get_value('MDL') is None
+    assert vvd.lod_data[0].shape == (3,)
+
+    assert vtx.get_value('MDL') is None
+    assert vtx.get_value('extra8') is model_set['extra8']
+    strip_group = vtx.body_parts[0].models[0].model_lods[0].meshes[0].strip_groups[0]
+    assert strip_group.get_value('extra8') is model_set['extra8']
+    assert [strip.vertex_count for strip in strip_group.strips] == ([3, 300] if model_set['extra8'] else [3, 3])
+
+
+def test_storage_of_single_file():
+    for model_set in MODEL_SETS:
+        _check(model_set, *_parse(model_set))
+
+
+def test_storage_is_per_file_across_threads():
+    iterations = 50
+    barrier = threading.Barrier(len(MODEL_SETS))
+    errors = []
+
+    def worker(model_set):
+        try:
+            for _ in range(iterations):
+                barrier.wait()
+                _check(model_set, *_parse(model_set))
+        except BaseException as ex:
+            errors.append(ex)
+            barrier.abort()
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=worker, args=(model_set,)) for model_set in MODEL_SETS]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    if errors:
+        raise errors[0]
+
+
+def test_structure_created_after_parsing():
+    mdl_a, _, _ = _parse(MODEL_SETS[0])
+    mdl_b, _, vtx_b = _parse(MODEL_SETS[1])
+
+    # Nothing is parsed anymore, so new structures do not pick storage of the last parsed file
+    bone = BoneV49(0)
+    assert bone.get_value('MDL') is None
+    assert bone.get_value('extra8') is None
+    bone.store_value('MDL', 'detached')
+    assert mdl_b.get_value('MDL') is mdl_b
+    assert vtx_b.get_value('MDL') is None
+
+    with mdl_a.storage_scope():
+        bone = BoneV49(0)
+        with mdl_b.storage_scope():
+            assert BoneV49(0).mdl_version == 53
+        assert BoneV49(0).mdl_version == 49
+    assert bone.get_value('MDL') is mdl_a
+    assert bone.mdl_version == 49
+    assert BoneV49(0).get_value('MDL') is None
+
+
+def test_storage_is_restored_after_failed_read():
+    broken = Mdl(MODEL_SETS[0]['mdl'][:400])
+    with pytest.raises(Exception):
+        broken.read()
+    assert BoneV49(0).get_value('MDL') is None
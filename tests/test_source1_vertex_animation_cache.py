@@ -0,0 +1,106 @@
+import tracemalloc
+
+import numpy as np
+
+from source1_model_builder import VERT_ANIM_DTYPE, VVD_VERTEX_DTYPE, build_mdl, build_vvd
+from SourceIO.source1.mdl.v49.mdl_file import Mdl
+from SourceIO.source1.mdl.v44.vertex_animation_cache import VertexAnimationCache
+from SourceIO.source1.vvd import Vvd
+
+VERTEX_COUNT = 20000
+MESH_SIZE = VERTEX_COUNT // 2
+FLEX_COUNT = 40
+FLEX_VERTEX_COUNT = 64
+
+
+def _parse_model():
+    rng = np.random.default_rng(17)
+    vertices = np.zeros(VERTEX_COUNT, VVD_VERTEX_DTYPE)
+    vertices['vertex'] = rng.uniform(-64, 64, (VERTEX_COUNT, 3))
+
+    meshes = []
+    for mesh_id in range(2):
+        flexes = []
+        for flex_id in range(FLEX_COUNT):
+            vertex_animations = np.zeros(FLEX_VERTEX_COUNT, VERT_ANIM_DTYPE)
+            vertex_animations['index'] = rng.choice(MESH_SIZE, FLEX_VERTEX_COUNT, replace=False)
+            vertex_animations['vertex_delta'] = rng.uniform(-4, 4, (FLEX_VERTEX_COUNT, 3))
+            flexes.append((flex_id, vertex_animations))
+        meshes.append(dict(vertex_index_start=mesh_id * MESH_SIZE, vertex_count=MESH_SIZE, flexes=flexes))
+
+    flex_names = ['flex_{}'.format(flex_id) for flex_id in range(FLEX_COUNT)]
+    mdl = Mdl(build_mdl(49, 'face', ['root'], ['skin'], flex_names, VERTEX_COUNT, meshes))
+    mdl.read()
+    vvd = Vvd(build_vvd(vertices))
+    vvd.read()
+    return mdl, vvd
+
+
+def _dense_vertex_cache(mdl, vvd, desired_lod=0):
+    """Previous implementation, one full copy of LOD vertices per flex."""
+    vertex_cache = {}
+    for bodypart in mdl.body_parts:
+        for model in bodypart.models:
+            for mesh in model.meshes:
+                for flex in mesh.flexes:
+                    if flex.name not in vertex_cache:
+                        vertex_cache[flex.name] = np.copy(vvd.lod_data[desired_lod]['vertex'])
+                    cache = vertex_cache[flex.name]
+                    vertex_indices = flex.vertex_animations['index'].reshape(-1) + mesh.vertex_index_start + \
+                                     model.vertex_offset
+                    cache[vertex_indices] = np.add(cache[vertex_indices], flex.vertex_animations['vertex_delta'])
+    return vertex_cache
+
+
+def _traced_peak(func):
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def test_flex_deltas_are_sparse():
+    mdl, vvd = _parse_model()
+    model = mdl.body_parts[0].models[0]
+
+    def build_cache():
+        vac = VertexAnimationCache(mdl, vvd)
+        vac.process_data()
+        return vac
+
+    vac, sparse_peak = _traced_peak(build_cache)
+    dense_cache, dense_peak = _traced_peak(lambda: _dense_vertex_cache(mdl, vvd))
+
+    assert set(vac.flex_deltas) == {(name, model.vertex_offset) for name in mdl.flex_names}
+    for (flex_name, _), entries in vac.flex_deltas.items():
+        assert len(entries) == len(model.meshes)
+        for (vertex_indices, deltas), mesh in zip(entries, model.meshes):
+            flex = next(flex for flex in mesh.flexes if flex.name == flex_name)
+            assert vertex_indices.shape == (FLEX_VERTEX_COUNT,)
+            assert deltas.shape == (FLEX_VERTEX_COUNT, 3)
+            assert np.array_equal(vertex_indices, flex.vertex_animations['index'].reshape(-1) + mesh.vertex_index_start)
+            assert np.shares_memory(deltas, flex.vertex_animations)
+
+    dense_size = FLEX_COUNT * VERTEX_COUNT * 3 * 4
+    assert dense_peak >= dense_size
+    assert sparse_peak < dense_size // 20
+
+    for flex_name in mdl.flex_names:
+        vertices, materialize_peak = _traced_peak(
+            lambda: vac.get_model_vertices(flex_name, model.vertex_offset, model.vertex_count))
+        assert materialize_peak < 3 * VERTEX_COUNT * 3 * 4
+        assert vertices.dtype == dense_cache[flex_name].dtype
+        assert np.array_equal(vertices, dense_cache[flex_name][model.vertex_offset:
+                                                               model.vertex_offset + model.vertex_count])
+
+
+def test_model_without_flex_keeps_base_positions():
+    mdl, vvd = _parse_model()
+    vac = VertexAnimationCache(mdl, vvd)
+    vac.process_data()
+    vertices = vac.get_model_vertices('missing', 0, VERTEX_COUNT)
+    assert np.array_equal(vertices, vvd.lod_data[0]['vertex'])
+    assert not np.shares_memory(vertices, vvd.lod_data[0])
@@ -0,0 +1,168 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from SourceIO.source1.bsp.datatypes.face import Face
+from SourceIO.source1.bsp.spatial_index import (TriangleBVH, _closest_points_on_triangles, _intersect_triangles,
+                                                get_brush_entity_origins, get_brush_triangles)
+
+# Corners of every box side, wound outwards
+BOX_SIDES = [(0, 2, 3, 1), (4, 5, 7, 6), (0, 1, 5, 4), (2, 6, 7, 3), (0, 4, 6, 2), (1, 3, 7, 5)]
+
+
+class FakeBSP:
+    """Brush models built from boxes, every face is a quad with every other edge stored reversed."""
+
+    def __init__(self, models, entities=()):
+        vertices = []
+        edges = [(0, 0)]
+        surf_edges = []
+        faces = []
+        model_rows = []
+        self.quads = []
+        for boxes in models:
+            model_rows.append(SimpleNamespace(first_face=len(faces), face_count=len(boxes) * 6))
+            for box_min, box_max, disp_info_id in boxes:
+                first_vertex = len(vertices)
+                vertices.extend([[(box_min, box_max)[(corner >> axis) & 1][axis] for axis in range(3)]
+                                 for corner in range(8)])
+                for side in BOX_SIDES:
+                    faces.append((len(surf_edges), 4, disp_info_id))
+                    quad = [first_vertex + corner for corner in side]
+                    self.quads.append(quad)
+                    for i in range(4):
+                        if i % 2:
+                            edges.append((quad[(i + 1) % 4], quad[i]))
+                            surf_edges.append(-(len(edges) - 1))
+                        else:
+                            edges.append((quad[i], quad[(i + 1) % 4]))
+                            surf_edges.append(len(edges) - 1)
+        face_data = np.zeros(len(faces), Face.dtype)
+        face_data['first_edge'], face_data['edge_count'], face_data['disp_info_id'] = np.array(faces).T
+        self.lumps = {
+            'LUMP_MODELS': SimpleNamespace(models=model_rows),
+            'LUMP_FACES': SimpleNamespace(face_data=face_data),
+            'LUMP_SURFEDGES': SimpleNamespace(surf_edges=np.array(surf_edges, np.int32)),
+            'LUMP_EDGES': SimpleNamespace(edges=np.array(edges, np.uint16)),
+            'LUMP_VERTICES': SimpleNamespace(vertices=np.array(vertices, np.float32)),
+            'LUMP_ENTITIES': SimpleNamespace(entities=list(entities)),
+        }
+
+    def get_lump(self, name):
+        return self.lumps.get(name)
+
+
+def random_triangles(rng, count):
+    centers = rng.uniform(-100, 100, (count, 1, 3))
+    return centers + rng.normal(0, 8, (count, 3, 3))
+
+
+def brute_force_nearest(triangles, points):
+    pair_points = np.repeat(points, len(triangles), axis=0)
+    pair_triangles = np.tile(triangles, (len(points), 1, 1))
+    closest = _closest_points_on_triangles(pair_points, pair_triangles[:, 0], pair_triangles[:, 1],
+                                           pair_triangles[:, 2])
+    return np.linalg.norm(pair_points - closest, axis=1).reshape((len(points), len(triangles)))
+
+
+def test_closest_points_against_sampling():
+    rng = np.random.default_rng(0)
+    triangles = random_triangles(rng, 20)
+    points = rng.uniform(-120, 120, (20, 3))
+    weights = np.stack(np.meshgrid(np.linspace(0, 1, 201), np.linspace(0, 1, 201)), -1).reshape((-1, 2))
+    weights = weights[weights.sum(axis=1) <= 1]
+    closest = _closest_points_on_triangles(points, triangles[:, 0], triangles[:, 1], triangles[:, 2])
+    for point, triangle, closest_point in zip(points, triangles, closest):
+        samples = (triangle[0] + weights[:, :1] * (triangle[1] - triangle[0]) +
+                   weights[:, 1:] * (triangle[2] - triangle[0]))
+        sampled = np.linalg.norm(samples - point, axis=1).min()
+        distance = np.linalg.norm(closest_point - point)
+        assert distance <= sampled + 1e-9
+        assert sampled - distance < 0.2
+
+
+@pytest.mark.parametrize('triangle_count', [1, 7, 300])
+def test_find_nearest_against_brute_force(triangle_count):
+    rng = np.random.default_rng(triangle_count)
+    triangles = random_triangles(rng, triangle_count)
+    points = rng.uniform(-150, 150, (200, 3))
+    bvh = TriangleBVH(triangles)
+    distances, triangle_ids, closest_points, normals = bvh.find_nearest(points)
+
+    expected = brute_force_nearest(triangles, points)
+    np.testing.assert_allclose(distances, expected.min(axis=1), rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(expected[np.arange(len(points)), triangle_ids], distances, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(np.linalg.norm(points - closest_points, axis=1), distances, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(normals, bvh.normals[triangle_ids])
+
+    limited_distances, limited_ids, _, _ = bvh.find_nearest(points, max_distance=10)
+    in_range = expected.min(axis=1) < 10
+    np.testing.assert_allclose(limited_distances[in_range], distances[in_range])
+    assert (limited_ids[~in_range] == -1).all() and np.isinf(limited_distances[~in_range]).all()
+
+
+@pytest.mark.parametrize('triangle_count', [1, 7, 300])
+def test_ray_cast_against_brute_force(triangle_count):
+    rng = np.random.default_rng(triangle_count)
+    triangles = random_triangles(rng, triangle_count)
+    origins = rng.uniform(-150, 150, (300, 3))
+    # Aim half of rays at triangles so most of them hit something
+    directions = np.where(np.arange(300)[:, None] % 2, rng.normal(size=(300, 3)),
+                          triangles[rng.integers(0, triangle_count, 300)].mean(axis=1) - origins)
+    directions[0] = (1, 0, 0)
+    bvh = TriangleBVH(triangles)
+    distances, triangle_ids, hit_points, normals = bvh.ray_cast(origins, directions)
+
+    unit_directions = directions / np.linalg.norm(directions, axis=1, keepdims=True)
+    pair_triangles = np.tile(triangles, (len(origins), 1, 1))
+    expected = _intersect_triangles(np.repeat(origins, triangle_count, axis=0),
+                                    np.repeat(unit_directions, triangle_count, axis=0),
+                                    pair_triangles[:, 0], pair_triangles[:, 1], pair_triangles[:, 2])
+    expected = expected.reshape((len(origins), triangle_count))
+    hit = np.isfinite(expected.min(axis=1))
+    assert hit.sum() > 50
+    np.testing.assert_allclose(distances, expected.min(axis=1))
+    assert (triangle_ids[~hit] == -1).all()
+    np.testing.assert_allclose(expected[hit, triangle_ids[hit]], distances[hit])
+    np.testing.assert_allclose(hit_points[hit], origins[hit] + unit_directions[hit] * distances[hit, None])
+    np.testing.assert_allclose(normals[hit], bvh.normals[triangle_ids[hit]])
+
+
+def test_empty_index():
+    bvh = TriangleBVH(np.zeros((0, 3, 3)))
+    distances, triangle_ids, _, _ = bvh.find_nearest(np.ones((3, 3)))
+    assert np.isinf(distances).all() and (triangle_ids == -1).all()
+    distances, triangle_ids, _, _ = bvh.ray_cast(np.ones((3, 3)), np.ones((3, 3)))
+    assert np.isinf(distances).all() and (triangle_ids == -1).all()
+
+
+def test_brush_triangles():
+    bsp = FakeBSP([[((0, 0, 0), (10, 10, 10), -1), ((20, 0, 0), (30, 10, 10), 0)]])
+    triangles, face_ids = get_brush_triangles(bsp)
+    # Displacement faces are skipped, quads are fan triangulated
+    assert face_ids.tolist() == np.repeat(np.arange(6), 2).tolist()
+    for face_id in range(6):
+        quad = bsp.quads[face_id]
+        assert triangles[face_ids == face_id].tolist() == [[quad[0], quad[1], quad[2]], [quad[0], quad[2], quad[3]]]
+
+
+def test_from_bsp_with_brush_entities():
+    unit_box = ((-8, -8, -8), (8, 8, 8), -1)
+    bsp = FakeBSP([[((-64, -64, -64), (64, 64, 0), -1)], [unit_box], [unit_box], [unit_box]],
+                  [{'classname': 'worldspawn'},
+                   {'classname': 'func_brush', 'model': '*1', 'origin': '200 0 0'},
+                   {'classname': 'trigger_multiple', 'model': '*2', 'origin': '0 200 0'},
+                   {'classname': 'func_door', 'model': '*3'},
+                   {'classname': 'prop_static', 'model': 'models/crate.mdl', 'origin': '0 0 300'}])
+    model_origins = get_brush_entity_origins(bsp)
+    assert model_origins == {1: (200, 0, 0), 3: (0, 0, 0)}
+
+    bvh = TriangleBVH.from_bsp(bsp, (0, *model_origins), 0.5, model_origins)
+    points = np.array([[200, 0, 20], [200, 20, 0], [0, 190, 4], [0, 0, 30]], np.float64)
+    distances, triangle_ids, closest_points, normals = bvh.find_nearest(points * 0.5)
+    # Moved func_brush box, world box instead of trigger volume next to it and func_door box without origin
+    np.testing.assert_allclose(distances, np.array([12, 12, np.hypot(126, 4), 22]) * 0.5)
+    np.testing.assert_allclose(closest_points, np.array([[200, 0, 8], [200, 8, 0], [0, 64, 0], [0, 0, 8]]) * 0.5)
+    np.testing.assert_allclose(normals[[0, 1, 3]], [[0, 0, 1], [0, 1, 0], [0, 0, 1]])
+    assert bvh.face_ids[triangle_ids[[0, 1, 3]]].tolist() == [7, 9, 19]
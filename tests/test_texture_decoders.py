@@ -0,0 +1,94 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from SourceIO.source2.blocks.texture_block import TEXR, VTexFormat, decode_texture
+from SourceIO.utilities.byte_io_mdl import ByteIO
+from SourceIO.utilities.texture_decoders import decode_bc4, decode_bc5, decode_bc6h, decode_bc7, decode_dxt1
+
+# Reference output of bcdec, see fixtures/generate_bcn_fixtures.py
+FIXTURES = np.load(Path(__file__).parent / 'fixtures' / 'bcn_blocks.npz')
+
+
+def _fixture(name):
+    expected = FIXTURES[f'{name}_decoded']
+    return FIXTURES[f'{name}_encoded'].tobytes(), expected, expected.shape[1], expected.shape[0]
+
+
+@pytest.mark.parametrize('mode', range(8))
+def test_bc7_modes(mode):
+    data, expected, width, height = _fixture(f'bc7_mode{mode}')
+    np.testing.assert_array_equal(decode_bc7(data, width, height), expected)
+
+
+@pytest.mark.parametrize('signed', [False, True], ids=['unsigned', 'signed'])
+@pytest.mark.parametrize('mode', [str(mode) for mode in range(14)] + ['reserved'])
+def test_bc6h_modes(mode, signed):
+    name = f'bc6h_mode{mode}' if mode != 'reserved' else 'bc6h_reserved'
+    data, expected, width, height = _fixture(f'{name}_{"signed" if signed else "unsigned"}')
+    pixels = decode_bc6h(data, width, height, signed)
+    # Decoded halves are stored as float32, compare bit patterns of halves
+    np.testing.assert_array_equal(pixels[:, :, :3].astype(np.float16).view(np.uint16), expected.view(np.uint16))
+    assert (pixels[:, :, 3] == 1).all()
+
+
+@pytest.mark.parametrize('name', ['dxt1_three_color', 'dxt1_four_color'])
+def test_dxt1(name):
+    data, expected, width, height = _fixture(name)
+    pixels = decode_dxt1(data, width, height)
+    # Interpolated colors are truncated like PySourceIOUtils does, bcdec rounds them
+    np.testing.assert_allclose(pixels[:, :, :3], expected[:, :, :3], atol=1)
+    np.testing.assert_array_equal(pixels[:, :, 3], expected[:, :, 3])
+    if name == 'dxt1_three_color':
+        assert (pixels[:, :, 3] == 0).any()
+
+
+@pytest.mark.parametrize('name', ['bc4_six_value', 'bc4_eight_value'])
+def test_bc4(name):
+    data, expected, width, height = _fixture(name)
+    pixels = decode_bc4(data, width, height)
+    for channel in range(3):
+        np.testing.assert_array_equal(pixels[:, :, channel], expected)
+    assert (pixels[:, :, 3] == 255).all()
+
+
+def test_bc5():
+    data, expected, width, height = _fixture('bc5')
+    pixels = decode_bc5(data, width, height)
+    np.testing.assert_array_equal(pixels[:, :, :2], expected)
+
+
+def test_rgba16161616f():
+    values = np.array([0, -0.0, 1, -2.5, 65504, 6e-8, np.inf, -np.inf, np.nan, 0.333, 1e-3, -1e4], np.float16)
+    data = np.resize(values, (3, 5, 4))
+    pixels = decode_texture(data.tobytes(), VTexFormat.RGBA16161616F, 5, 3)
+    assert pixels.dtype == np.float32
+    np.testing.assert_array_equal(pixels.astype(np.float16).view(np.uint16), data.view(np.uint16))
+
+
+def _bc7_texture(width, height, mip_count):
+    """Uncompressed BC7 texture, mips are stored from the smallest one."""
+    payload = b''.join(FIXTURES[f'bc7_mip{mip}_encoded'].tobytes() for mip in reversed(range(mip_count)))
+    header = b'\x00' * 32
+    # DataBlock constructor imports resource types that need bpy
+    texture = TEXR.__new__(TEXR)
+    texture._valve_file = SimpleNamespace(reader=ByteIO(header + payload),
+                                          get_data_block=lambda block_name: [SimpleNamespace(blocks=[])])
+    texture.info_block = SimpleNamespace(absolute_offset=0, block_size=len(header))
+    texture.format = VTexFormat.BC7
+    texture.width, texture.height, texture.depth, texture.mipmap_count = width, height, 1, mip_count
+    texture.compressed, texture.compressed_mips = False, []
+    return texture
+
+
+def test_decode_non_square_mips():
+    texture = _bc7_texture(32, 8, 6)
+    mips = texture.decode_mips(workers=2)
+    assert [mip.shape for mip in mips] == [(8, 32, 4), (4, 16, 4), (2, 8, 4), (1, 4, 4), (1, 2, 4), (1, 1, 4)]
+    for mip_level, pixels in enumerate(mips):
+        np.testing.assert_array_equal(pixels, FIXTURES[f'bc7_mip{mip_level}_decoded'])
+    selected = texture.decode_mips([4, 1])
+    np.testing.assert_array_equal(selected[0], mips[4])
+    np.testing.assert_array_equal(selected[1], mips[1])
@@ -0,0 +1,28 @@
+from SourceIO.source_shared.vpk.vpk_index import VPKIndex
+
+
+def _rows(names):
+    return [(name, 100 + row_id, row_id, 0, 0x7FFF, row_id * 16, 16) for row_id, name in enumerate(names)]
+
+
+def test_non_latin_names(tmp_path):
+    names = ['materials/a?b.vmt', 'materials/aшb.vmt', 'materials/a日b.vmt', 'sound/ÿ.wav', 'models/plain.mdl']
+    vpk_path = tmp_path / 'pak01_dir.vpk'
+    vpk_path.write_bytes(b'vpk')
+    index_path = tmp_path / 'pak01.idx'
+    VPKIndex.from_rows(12, _rows(names)).save(index_path, vpk_path)
+    index = VPKIndex.load(index_path, vpk_path)
+
+    assert sorted(index.get_all_names()) == sorted(names)
+    for row_id, name in enumerate(names):
+        entry = index.create_entry(index.find_row(name), name)
+        assert (entry.offset, entry.crc32) == (row_id * 16, row_id)
+    assert index.find_row('materials/a?b?.vmt') == -1
+    assert index.find_row('materials/aжb.vmt') == -1
+
+
+def test_ascii_names():
+    names = [f'models/prop_{i}.mdl' for i in range(50)]
+    index = VPKIndex.from_rows(0, _rows(names))
+    assert sorted(index.get_all_names()) == sorted(names)
+    assert all(index.get_name(index.find_row(name)) == name for name in names)
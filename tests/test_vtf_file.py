@@ -0,0 +1,119 @@
+import struct
+
+import numpy as np
+import pytest
+
+from SourceIO.source1.vtf.vtf_file import (RESOURCE_HIGH_RES_IMAGE, RESOURCE_LOW_RES_IMAGE, RESOURCE_NO_DATA,
+                                           VTFFile, VTFFlags, VTFImageFormat, get_image_size)
+
+LOW_RES_FORMAT = VTFImageFormat.DXT1
+
+
+def build_vtf(version, image_format, width, height, mip_count, frame_count=1, face_count=1, depth=1,
+              first_frame=0, images=None):
+    """Build VTF file, returns its data and {(mip, frame, face, slice): image bytes}."""
+    rng = np.random.default_rng(7)
+    flags = VTFFlags.ENVMAP if face_count > 1 else VTFFlags(0)
+    header = struct.pack('<4s2II2HI2H4x3f4xfiBiBB', b'VTF\x00', 7, version, 0, width, height, flags,
+                         frame_count, first_frame, 0.5, 0.5, 0.5, 1.0, image_format, mip_count,
+                         LOW_RES_FORMAT, 16, 16)
+    if version >= 2:
+        header += struct.pack('<H', depth)
+    low_res_image = rng.integers(0, 256, get_image_size(LOW_RES_FORMAT, 16, 16), np.uint8).tobytes()
+
+    images = {}
+    image_data = b''
+    for mip in reversed(range(mip_count)):
+        mip_width, mip_height, mip_depth = max(1, width >> mip), max(1, height >> mip), max(1, depth >> mip)
+        for frame in range(frame_count):
+            for face in range(face_count):
+                for slice_id in range(mip_depth):
+                    size = get_image_size(image_format, mip_width, mip_height)
+                    image = images[(mip, frame, face, slice_id)] = rng.integers(0, 256, size, np.uint8).tobytes()
+                    image_data += image
+
+    if version >= 3:
+        resources = [(RESOURCE_LOW_RES_IMAGE, 0), (b'CRC', RESOURCE_NO_DATA), (RESOURCE_HIGH_RES_IMAGE, 0)]
+        header_size = 80 + 8 * len(resources)
+        offsets = {RESOURCE_LOW_RES_IMAGE: header_size, RESOURCE_HIGH_RES_IMAGE: header_size + len(low_res_image),
+                   b'CRC': 0x12345678}
+        header += struct.pack('<3xI8x', len(resources))
+        for tag, resource_flags in resources:
+            header += tag + struct.pack('<BI', resource_flags, offsets[tag])
+    else:
+        header_size = 64 if version == 1 else 80
+    header = header.ljust(header_size, b'\x00')
+    header = header[:12] + struct.pack('<I', header_size) + header[16:]
+    return header + low_res_image + image_data, images
+
+
+@pytest.mark.parametrize('image_format', [VTFImageFormat.BGRA8888, VTFImageFormat.DXT1, VTFImageFormat.DXT5])
+@pytest.mark.parametrize('version', [1, 2, 3, 5])
+def test_image_offsets(version, image_format):
+    data, images = build_vtf(version, image_format, 32, 8, 6, frame_count=3)
+    vtf = VTFFile(data).read()
+    assert (vtf.version, vtf.width, vtf.height, vtf.mip_count, vtf.frame_count) == ((7, version), 32, 8, 6, 3)
+    assert vtf.image_format == image_format and vtf.face_count == 1
+    for (mip, frame, face, slice_id), image in images.items():
+        assert vtf.get_image_data(mip, frame, face, slice_id) == image
+
+
+@pytest.mark.parametrize('version,first_frame,face_count', [(1, 0, 7), (2, 0xFFFF, 6), (3, 0, 7), (5, 0, 6)])
+def test_envmap_faces(version, first_frame, face_count):
+    data, images = build_vtf(version, VTFImageFormat.DXT1, 8, 8, 4, frame_count=2, face_count=face_count,
+                             first_frame=first_frame)
+    vtf = VTFFile(data).read()
+    assert vtf.face_count == face_count
+    for (mip, frame, face, slice_id), image in images.items():
+        assert vtf.get_image_data(mip, frame, face, slice_id) == image
+
+
+@pytest.mark.parametrize('version', [2, 5])
+def test_volume_slices(version):
+    data, images = build_vtf(version, VTFImageFormat.BGRA8888, 8, 4, 3, frame_count=2, depth=4)
+    vtf = VTFFile(data).read()
+    assert vtf.depth == 4
+    for (mip, frame, face, slice_id), image in images.items():
+        assert vtf.get_image_data(mip, frame, face, slice_id) == image
+
+
+def _single_image_vtf(image_format, width, height, image):
+    data, _ = build_vtf(5, image_format, width, height, 1)
+    # Generated image is the last one in file
+    return VTFFile(data[:-len(image)] + image).read()
+
+
+def test_decode_dxt3():
+    # Red and blue endpoints, four color mode is always used; alpha is 4 bits per texel
+    color_block = struct.pack('<2HI', 0xF800, 0x001F, int(''.join(f'{i % 4:02b}' for i in reversed(range(16))), 2))
+    alpha_block = struct.pack('<Q', int(''.join(f'{i:04b}' for i in reversed(range(16))), 2))
+    vtf = _single_image_vtf(VTFImageFormat.DXT3, 4, 4, alpha_block + color_block)
+    pixels = vtf.decode()
+    palette = np.array([[255, 0, 0], [0, 0, 255], [170, 0, 85], [85, 0, 170]])
+    np.testing.assert_array_equal(pixels[:, :, :3].reshape((16, 3)), palette[np.arange(16) % 4])
+    np.testing.assert_array_equal(pixels[:, :, 3].ravel(), np.arange(16) * 17)
+
+
+def test_decode_bgra8888():
+    image = np.arange(6 * 4 * 4, dtype=np.uint8).reshape((4, 6, 4))
+    vtf = _single_image_vtf(VTFImageFormat.BGRA8888, 6, 4, image.tobytes())
+    np.testing.assert_array_equal(vtf.decode(), image[:, :, [2, 1, 0, 3]])
+
+
+def test_decode_ia88():
+    image = np.arange(5 * 3 * 2, dtype=np.uint8).reshape((3, 5, 2)) * 7
+    pixels = _single_image_vtf(VTFImageFormat.IA88, 5, 3, image.tobytes()).decode()
+    for channel in range(3):
+        np.testing.assert_array_equal(pixels[:, :, channel], image[:, :, 0])
+    np.testing.assert_array_equal(pixels[:, :, 3], image[:, :, 1])
+
+
+def test_decode_rgba16161616f():
+    image = np.array([0, 0.25, 1, 4, -1, 0.5, 65504, 1e-3], np.float16)
+    image = np.resize(image, (2, 4, 4))
+    vtf = _single_image_vtf(VTFImageFormat.RGBA16161616F, 4, 2, image.tobytes())
+    pixels = vtf.decode()
+    assert pixels.dtype == np.float32
+    np.testing.assert_array_equal(pixels, image.astype(np.float32))
+    np.testing.assert_array_equal(vtf.decode_rgba8888(), (np.clip(image.astype(np.float32), 0, 1) * 255 + 0.5)
+                                  .astype(np.uint8))
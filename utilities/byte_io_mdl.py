@@ -1,12 +1,15 @@
 import binascii
 import contextlib
 import io
+import mmap
 import struct
 import typing
 from io import BytesIO
 from pathlib import Path
 from typing import Union, BinaryIO
 
+import numpy as np
+
 
 class OffsetOutOfBounds(Exception):
     pass
@@ -17,6 +20,23 @@ def split(array, n=3):
 
 
 class ByteIO:
+    def __new__(cls, path_or_file_or_data=None, open_to_read=True):
+        # In-memory data is served by MemoryByteIO, which reads directly from the buffer
+        if cls is ByteIO and isinstance(path_or_file_or_data, (bytes, bytearray, memoryview, mmap.mmap,
+                                                               BytesIO, MemoryByteIO)):
+            return super().__new__(MemoryByteIO)
+        return super().__new__(cls)
+
+    @staticmethod
+    def map_file(path: Union[str, Path]) -> 'ByteIO':
+        """Open file as read-only memory mapped ByteIO."""
+        with open(path, 'rb') as file:
+            try:
+                return ByteIO(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+            except ValueError:
+                # Empty files can't be mapped
+                return ByteIO(b'')
+
     @contextlib.contextmanager
     def save_current_pos(self):
         entry = self.tell()
@@ -39,6 +59,10 @@ class ByteIO:
             self.file = path_or_file_or_data.file
         else:
             self.file = BytesIO()
+        # Size of read-only files can't change, so it is measured once
+        mode = getattr(self.file, 'mode', 'wb')
+        self._read_only = isinstance(mode, str) and 'r' in mode and '+' not in mode
+        self._size = None
 
     def __del__(self):
         if isinstance(self.file, BytesIO):
@@ -80,10 +104,14 @@ class ByteIO:
         return self.size() - self.tell()
 
     def size(self):
+        if self._size is not None:
+            return self._size
         curr_offset = self.tell()
         self.seek(0, io.SEEK_END)
         ret = self.tell()
         self.seek(curr_offset, io.SEEK_SET)
+        if self._read_only:
+            self._size = ret
         return ret
 
     def fill(self, amount):
@@ -96,6 +124,8 @@ class ByteIO:
 
         del self.file
         self.file = BytesIO()
+        self._read_only = False
+        self._size = None
         self.file.write(to_insert)
         self.file.write(buffer)
         self.file.seek(0)
@@ -159,6 +189,12 @@ class ByteIO:
     def read_fmt(self, fmt):
         return struct.unpack(fmt, self.file.read(struct.calcsize(fmt)))
 
+    def read_array(self, dtype, count=-1) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        if count < 0:
+            count = self.remaining() // dtype.itemsize
+        return np.frombuffer(self.read(dtype.itemsize * count), dtype, count)
+
     def read_uint64(self):
         return self._read('Q')
 
@@ -191,7 +227,7 @@ class ByteIO:
 
     def read_ascii_string(self, length=None):
         if length is not None:
-            buffer = self.file.read(length).strip(b'\x00')
+            buffer = self.read(length).strip(b'\x00')
             if b'\x00' in buffer:
                 buffer = buffer[:buffer.index(b'\x00')]
             return buffer.decode('latin', errors='replace').strip()
@@ -220,6 +256,11 @@ class ByteIO:
             ret = reader(**reader_args)
         return ret
 
+    def subview(self, offset, size):
+        with self.save_current_pos():
+            self.seek(offset)
+            return ByteIO(self.read(size))
+
     def read_source1_string(self, entry):
         offset = self.read_int32()
         if offset:
@@ -337,6 +378,104 @@ class ByteIO:
         return object_list
 
 
+class MemoryByteIO(ByteIO):
+    """Read-only ByteIO over bytes, bytearray, memoryview or mmap.
+
+    Values are unpacked in place with struct.unpack_from and subview() slices without copying,
+    so lumps and file regions can share single underlying buffer.
+    """
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview, mmap.mmap, BytesIO, 'MemoryByteIO'],
+                 open_to_read=True):
+        self.file = None
+        if isinstance(data, MemoryByteIO):
+            view, self._pos = data._view, data._pos
+        elif isinstance(data, BytesIO):
+            # getvalue() shares initial bytes of BytesIO instead of copying them
+            view, self._pos = memoryview(data.getvalue()), data.tell()
+        else:
+            view, self._pos = memoryview(data), 0
+        if view.ndim != 1 or view.format != 'B':
+            view = view.cast('B')
+        self._view = view
+
+    def __del__(self):
+        pass
+
+    def close(self):
+        self._view = memoryview(b'')
+        self._pos = 0
+
+    def getbuffer(self) -> memoryview:
+        return self._view
+
+    def rewind(self, amount):
+        self.seek(-amount, io.SEEK_CUR)
+
+    def skip(self, amount):
+        self.seek(amount, io.SEEK_CUR)
+
+    def seek(self, off, pos=io.SEEK_SET):
+        if pos == io.SEEK_CUR:
+            off += self._pos
+        elif pos == io.SEEK_END:
+            off += len(self._view)
+        if off < 0:
+            raise ValueError(f'negative seek value {off}')
+        self._pos = off
+        return off
+
+    def tell(self):
+        return self._pos
+
+    def remaining(self):
+        return max(len(self._view) - self._pos, 0)
+
+    def size(self):
+        return len(self._view)
+
+    def __bool__(self):
+        return self._pos < len(self._view)
+
+    def subview(self, offset, size):
+        return MemoryByteIO(self._view[offset:offset + size])
+
+    def read(self, size=-1) -> bytes:
+        start = self._pos
+        end = len(self._view)
+        if 0 <= size < end - start:
+            end = start + size
+        if start >= end:
+            return b''
+        self._pos = end
+        return self._view[start:end].tobytes()
+
+    def _read(self, t):
+        value, = struct.unpack_from(t, self._view, self._pos)
+        self._pos += struct.calcsize(t)
+        return value
+
+    def read_fmt(self, fmt):
+        values = struct.unpack_from(fmt, self._view, self._pos)
+        self._pos += struct.calcsize(fmt)
+        return values
+
+    def read_array(self, dtype, count=-1) -> np.ndarray:
+        """Read array of count elements as read-only view over buffer."""
+        dtype = np.dtype(dtype)
+        if count < 0:
+            count = self.remaining() // dtype.itemsize
+        array = np.frombuffer(self._view, dtype, count, self._pos)
+        self._pos += dtype.itemsize * count
+        return array
+
+    def _write(self, data):
+        raise io.UnsupportedOperation('MemoryByteIO is read-only')
+
+    def insert_begin(self, to_insert):
+        raise io.UnsupportedOperation('MemoryByteIO is read-only')
+
+
 if __name__ == '__main__':
     a = ByteIO(r'./test.bin')
     a.write_fourcc("IDST")
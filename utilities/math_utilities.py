@@ -132,16 +132,81 @@ def euler_to_matrix(theta):
     return np.dot(r_z, np.dot(r_y, r_x))
 
 
+def eulers_to_matrices(eulers: np.ndarray) -> np.ndarray:
+    """Same as euler_to_matrix for (..., 3) array of XYZ euler angles."""
+    eulers = np.asarray(eulers, np.float64)
+    cos = np.cos(eulers)
+    sin = np.sin(eulers)
+    cx, cy, cz = cos[..., 0], cos[..., 1], cos[..., 2]
+    sx, sy, sz = sin[..., 0], sin[..., 1], sin[..., 2]
+    matrices = np.empty(eulers.shape[:-1] + (3, 3), np.float64)
+    matrices[..., 0, 0] = cy * cz
+    matrices[..., 0, 1] = sx * sy * cz - cx * sz
+    matrices[..., 0, 2] = cx * sy * cz + sx * sz
+    matrices[..., 1, 0] = cy * sz
+    matrices[..., 1, 1] = sx * sy * sz + cx * cz
+    matrices[..., 1, 2] = cx * sy * sz - sx * cz
+    matrices[..., 2, 0] = -sy
+    matrices[..., 2, 1] = sx * cy
+    matrices[..., 2, 2] = cx * cy
+    return matrices
+
+
+def matrices_to_eulers(matrices: np.ndarray) -> np.ndarray:
+    """Convert (..., 3, 3) rotation matrices to XYZ euler angles, picking same solution as Blender does."""
+    matrices = np.asarray(matrices, np.float64)
+    matrices = matrices / np.linalg.norm(matrices, axis=-2, keepdims=True)
+    m00, m10, m20 = matrices[..., 0, 0], matrices[..., 1, 0], matrices[..., 2, 0]
+    m11, m12 = matrices[..., 1, 1], matrices[..., 1, 2]
+    m21, m22 = matrices[..., 2, 1], matrices[..., 2, 2]
+    cy = np.hypot(m00, m10)
+
+    euler1 = np.stack([np.arctan2(m21, m22), np.arctan2(-m20, cy), np.arctan2(m10, m00)], axis=-1)
+    euler2 = np.stack([np.arctan2(-m21, -m22), np.arctan2(-m20, -cy), np.arctan2(-m10, -m00)], axis=-1)
+    # Gimbal lock, only X and Y can be recovered
+    locked = cy <= 16 * np.finfo(np.float32).eps
+    euler1[locked] = np.stack([np.arctan2(-m12, m11), np.arctan2(-m20, cy), np.zeros_like(cy)], axis=-1)[locked]
+    euler2[locked] = euler1[locked]
+
+    use_second = np.abs(euler1).sum(axis=-1) > np.abs(euler2).sum(axis=-1)
+    return np.where(use_second[..., None], euler2, euler1)
+
+
+def quats_to_eulers(quats: np.ndarray) -> np.ndarray:
+    """Convert (..., 4) array of XYZW quaternions to XYZ euler angles."""
+    quats = np.asarray(quats, np.float64)
+    quats = quats / np.linalg.norm(quats, axis=-1, keepdims=True)
+    x, y, z, w = quats[..., 0], quats[..., 1], quats[..., 2], quats[..., 3]
+    matrices = np.empty(quats.shape[:-1] + (3, 3), np.float64)
+    matrices[..., 0, 0] = 1 - 2 * (y * y + z * z)
+    matrices[..., 0, 1] = 2 * (x * y - z * w)
+    matrices[..., 0, 2] = 2 * (x * z + y * w)
+    matrices[..., 1, 0] = 2 * (x * y + z * w)
+    matrices[..., 1, 1] = 1 - 2 * (x * x + z * z)
+    matrices[..., 1, 2] = 2 * (y * z - x * w)
+    matrices[..., 2, 0] = 2 * (x * z - y * w)
+    matrices[..., 2, 1] = 2 * (y * z + x * w)
+    matrices[..., 2, 2] = 1 - 2 * (x * x + y * y)
+    return matrices_to_eulers(matrices)
+
+
 def convert_rotation_source2_to_blender(source2_rotation: Union[List[float], np.ndarray]) -> List[float]:
     # XYZ -> ZXY
     return [math.radians(source2_rotation[2]), math.radians(source2_rotation[0]),
             math.radians(source2_rotation[1])]
 
 
+# XYZ -> ZXY
+_SOURCE1_TO_BLENDER_ROTATION_AXES = [2, 0, 1]
+
+
 def convert_rotation_source1_to_blender(source2_rotation: Union[List[float], np.ndarray]) -> List[float]:
-    # XYZ -> ZXY
-    return [math.radians(source2_rotation[2]), math.radians(source2_rotation[0]),
-            math.radians(source2_rotation[1])]
+    return [math.radians(source2_rotation[axis]) for axis in _SOURCE1_TO_BLENDER_ROTATION_AXES]
+
+
+def convert_rotations_source1_to_blender(rotations: np.ndarray) -> np.ndarray:
+    """Same as convert_rotation_source1_to_blender for (n, 3) array of rotations."""
+    return np.deg2rad(np.asarray(rotations)[:, _SOURCE1_TO_BLENDER_ROTATION_AXES])
 
 
 def convert_to_radians(vector: Union[List[float], np.ndarray]):
@@ -208,3 +273,35 @@ def sizeof_fmt(num):
         return '0 bytes'
     if num == 1:
         return '1 byte'
+
+
+def group_vertex_weights(bone_ids: np.ndarray, weights: np.ndarray) -> List[Tuple[int, float, np.ndarray]]:
+    """Group vertices sharing same (bone, weight) pair, returns (bone id, weight, vertex indices) tuples.
+
+    bone_ids and weights are (vertex count, influences) arrays, zero weights are skipped and
+    repeated bone of one vertex keeps its last weight, same as sequential 'REPLACE' adds.
+    """
+    bone_ids = np.asarray(bone_ids, np.int64)
+    if bone_ids.ndim == 1:
+        bone_ids = bone_ids[:, None]
+    weights = np.asarray(weights, np.float32).reshape(bone_ids.shape)
+    vertex_ids = np.repeat(np.arange(bone_ids.shape[0], dtype=np.int64), bone_ids.shape[1])
+    bone_ids = bone_ids.ravel()
+    weights = weights.ravel()
+    mask = weights > 0
+    vertex_ids, bone_ids, weights = vertex_ids[mask], bone_ids[mask], weights[mask]
+    if not vertex_ids.shape[0]:
+        return []
+
+    pair_keys = vertex_ids * (int(bone_ids.max()) + 1) + bone_ids
+    _, last_ids = np.unique(pair_keys[::-1], return_index=True)
+    last_ids = pair_keys.shape[0] - 1 - last_ids
+    vertex_ids, bone_ids, weights = vertex_ids[last_ids], bone_ids[last_ids], weights[last_ids]
+
+    order = np.lexsort((vertex_ids, weights, bone_ids))
+    vertex_ids, bone_ids, weights = vertex_ids[order], bone_ids[order], weights[order]
+    group_starts = np.flatnonzero(np.concatenate(([True], (bone_ids[1:] != bone_ids[:-1]) |
+                                                  (weights[1:] != weights[:-1]))))
+    return [(bone_id, weight, group_vertices) for bone_id, weight, group_vertices in
+            zip(bone_ids[group_starts].tolist(), weights[group_starts].tolist(),
+                np.split(vertex_ids, group_starts[1:]))]
@@ -0,0 +1,432 @@
+import numpy as np
+
+
+def _get_block_counts(width: int, height: int):
+    return max(1, (width + 3) // 4), max(1, (height + 3) // 4)
+
+
+def _blocks_to_image(pixels: np.ndarray, width: int, height: int) -> np.ndarray:
+    """Rearrange (block count, 16, channels) texels into (height, width, channels) image."""
+    blocks_x, blocks_y = _get_block_counts(width, height)
+    channels = pixels.shape[-1]
+    image = pixels.reshape((blocks_y, blocks_x, 4, 4, channels)).transpose((0, 2, 1, 3, 4))
+    return image.reshape((blocks_y * 4, blocks_x * 4, channels))[:height, :width]
+
+
+def _unpack_565(colors: np.ndarray) -> np.ndarray:
+    colors = colors.astype(np.uint32)
+    red = (colors >> 11) & 31
+    green = (colors >> 5) & 63
+    blue = colors & 31
+    return np.stack([(red << 3) | (red >> 2), (green << 2) | (green >> 4), (blue << 3) | (blue >> 2)], axis=-1)
+
+
+def _unpack_indices(packed: np.ndarray, bits: int) -> np.ndarray:
+    packed = packed.astype(np.uint64)
+    shifts = np.arange(16, dtype=np.uint64) * np.uint64(bits)
+    return ((packed[:, None] >> shifts) & np.uint64((1 << bits) - 1)).astype(np.intp)
+
+
+def _decode_color_blocks(blocks: np.ndarray, four_color_only: bool) -> np.ndarray:
+    """Decode (n, 8) BC1 color blocks into (n, 16, 4) uint8 RGBA texels."""
+    endpoints = blocks[:, :4].copy().view('<u2')
+    color0 = endpoints[:, 0]
+    color1 = endpoints[:, 1]
+    rgb0 = _unpack_565(color0)
+    rgb1 = _unpack_565(color1)
+
+    palette = np.empty((blocks.shape[0], 4, 4), np.uint32)
+    palette[:, :, 3] = 255
+    palette[:, 0, :3] = rgb0
+    palette[:, 1, :3] = rgb1
+    four_color = np.ones(blocks.shape[0], bool) if four_color_only else color0 > color1
+    palette[:, 2, :3] = np.where(four_color[:, None], (2 * rgb0 + rgb1) // 3, (rgb0 + rgb1) // 2)
+    palette[:, 3, :3] = np.where(four_color[:, None], (rgb0 + 2 * rgb1) // 3, 0)
+    palette[:, 3, 3] = np.where(four_color, 255, 0)
+
+    indices = _unpack_indices(blocks[:, 4:8].copy().view('<u4')[:, 0], 2)
+    return np.take_along_axis(palette, indices[:, :, None], axis=1).astype(np.uint8)
+
+
+def decode_bc4_channel(blocks: np.ndarray) -> np.ndarray:
+    """Decode (n, 8) interpolated alpha blocks (DXT5 alpha, BC4, BC5) into (n, 16) uint8 values."""
+    value0 = blocks[:, 0].astype(np.uint32)
+    value1 = blocks[:, 1].astype(np.uint32)
+    steps = np.arange(1, 7, dtype=np.uint32)
+    palette = np.empty((blocks.shape[0], 8), np.uint32)
+    palette[:, 0] = value0
+    palette[:, 1] = value1
+    eight_values = (value0 > value1)[:, None]
+    palette[:, 2:8] = np.where(eight_values,
+                               ((7 - steps) * value0[:, None] + steps * value1[:, None]) // 7,
+                               np.concatenate([((5 - steps[:4]) * value0[:, None] + steps[:4] * value1[:, None]) // 5,
+                                               np.zeros((blocks.shape[0], 1), np.uint32),
+                                               np.full((blocks.shape[0], 1), 255, np.uint32)], axis=1))
+    packed = np.zeros((blocks.shape[0], 8), np.uint8)
+    packed[:, :6] = blocks[:, 2:8]
+    indices = _unpack_indices(packed.view('<u8')[:, 0], 3)
+    return np.take_along_axis(palette, indices, axis=1).astype(np.uint8)
+
+
+def decode_dxt1(data: bytes, width: int, height: int, four_color_only: bool = False) -> np.ndarray:
+    """Decode DXT1 (BC1) data into (height, width, 4) uint8 RGBA image, first row is the top one."""
+    blocks_x, blocks_y = _get_block_counts(width, height)
+    blocks = np.frombuffer(data, np.uint8, blocks_x * blocks_y * 8).reshape((-1, 8))
+    return _blocks_to_image(_decode_color_blocks(blocks, four_color_only), width, height)
+
+
+def decode_dxt3(data: bytes, width: int, height: int) -> np.ndarray:
+    """Decode DXT3 (BC2) data into (height, width, 4) uint8 RGBA image."""
+    blocks_x, blocks_y = _get_block_counts(width, height)
+    blocks = np.frombuffer(data, np.uint8, blocks_x * blocks_y * 16).reshape((-1, 16))
+    pixels = _decode_color_blocks(blocks[:, 8:], True)
+    pixels[:, :, 3] = _unpack_indices(blocks[:, :8].copy().view('<u8')[:, 0], 4) * 17
+    return _blocks_to_image(pixels, width, height)
+
+
+def decode_dxt5(data: bytes, width: int, height: int) -> np.ndarray:
+    """Decode DXT5 (BC3) data into (height, width, 4) uint8 RGBA image."""
+    blocks_x, blocks_y = _get_block_counts(width, height)
+    blocks = np.frombuffer(data, np.uint8, blocks_x * blocks_y * 16).reshape((-1, 16))
+    pixels = _decode_color_blocks(blocks[:, 8:], True)
+    pixels[:, :, 3] = decode_bc4_channel(blocks[:, :8])
+    return _blocks_to_image(pixels, width, height)
+
+
+def decode_bc4(data: bytes, width: int, height: int) -> np.ndarray:
+    """Decode BC4 (ATI1N) data into (height, width, 4) uint8 image, value is replicated into RGB."""
+    blocks_x, blocks_y = _get_block_counts(width, height)
+    blocks = np.frombuffer(data, np.uint8, blocks_x * blocks_y * 8).reshape((-1, 8))
+    pixels = np.full((blocks.shape[0], 16, 4), 255, np.uint8)
+    pixels[:, :, :3] = decode_bc4_channel(blocks)[:, :, None]
+    return _blocks_to_image(pixels, width, height)
+
+
+def decode_bc5(data: bytes, width: int, height: int) -> np.ndarray:
+    """Decode BC5 (ATI2N) data into (height, width, 4) uint8 image with two channels in RG."""
+    blocks_x, blocks_y = _get_block_counts(width, height)
+    blocks = np.frombuffer(data, np.uint8, blocks_x * blocks_y * 16).reshape((-1, 16))
+    pixels = np.zeros((blocks.shape[0], 16, 4), np.uint8)
+    pixels[:, :, 0] = decode_bc4_channel(blocks[:, :8])
+    pixels[:, :, 1] = decode_bc4_channel(blocks[:, 8:])
+    pixels[:, :, 3] = 255
+    return _blocks_to_image(pixels, width, height)
+
+
+# Partition tables shared by BC6H and BC7, 1 bit per texel for 2 subsets and 2 bits per texel for 3 subsets
+_PARTITIONS_2 = np.array([
+    0xcccc, 0x8888, 0xeeee, 0xecc8, 0xc880, 0xfeec, 0xfec8, 0xec80, 0xc800, 0xffec,
+    0xfe80, 0xe800, 0xffe8, 0xff00, 0xfff0, 0xf000, 0xf710, 0x008e, 0x7100, 0x08ce,
+    0x008c, 0x7310, 0x3100, 0x8cce, 0x088c, 0x3110, 0x6666, 0x366c, 0x17e8, 0x0ff0,
+    0x718e, 0x399c, 0xaaaa, 0xf0f0, 0x5a5a, 0x33cc, 0x3c3c, 0x55aa, 0x9696, 0xa55a,
+    0x73ce, 0x13c8, 0x324c, 0x3bdc, 0x6996, 0xc33c, 0x9966, 0x0660, 0x0272, 0x04e4,
+    0x4e40, 0x2720, 0xc936, 0x936c, 0x39c6, 0x639c, 0x9336, 0x9cc6, 0x817e, 0xe718,
+    0xccf0, 0x0fcc, 0x7744, 0xee22], np.int64)
+_PARTITIONS_3 = np.array([
+    0xaa685050, 0x6a5a5040, 0x5a5a4200, 0x5450a0a8, 0xa5a50000, 0xa0a05050, 0x5555a0a0,
+    0x5a5a5050, 0xaa550000, 0xaa555500, 0xaaaa5500, 0x90909090, 0x94949494, 0xa4a4a4a4,
+    0xa9a59450, 0x2a0a4250, 0xa5945040, 0x0a425054, 0xa5a5a500, 0x55a0a0a0, 0xa8a85454,
+    0x6a6a4040, 0xa4a45000, 0x1a1a0500, 0x0050a4a4, 0xaaa59090, 0x14696914, 0x69691400,
+    0xa08585a0, 0xaa821414, 0x50a4a450, 0x6a5a0200, 0xa9a58000, 0x5090a0a8, 0xa8a09050,
+    0x24242424, 0x00aa5500, 0x24924924, 0x24499224, 0x50a50a50, 0x500aa550, 0xaaaa4444,
+    0x66660000, 0xa5a0a5a0, 0x50a050a0, 0x69286928, 0x44aaaa44, 0x66666600, 0xaa444444,
+    0x54a854a8, 0x95809580, 0x96969600, 0xa85454a8, 0x80959580, 0xaa141414, 0x96960000,
+    0xaaaa1414, 0xa05050a0, 0xa0a5a5a0, 0x96000000, 0x40804080, 0xa9a8a9a8, 0xaaaaaa44,
+    0x2a4a5254], np.int64)
+# Texels whose index is stored with one bit less, besides the first one
+_ANCHORS_2 = np.array([
+    15, 15, 15, 15, 15, 15, 15, 15, 15, 15, 15, 15, 15, 15, 15, 15, 15, 2, 8, 2, 2, 8, 8, 15, 2, 8, 2, 2, 8, 8, 2, 2,
+    15, 15, 6, 8, 2, 8, 15, 15, 2, 8, 2, 2, 2, 15, 15, 6, 6, 2, 6, 8, 15, 15, 2, 2, 15, 15, 15, 15, 15, 2, 2, 15])
+_ANCHORS_3_SECOND = np.array([
+    3, 3, 15, 15, 8, 3, 15, 15, 8, 8, 6, 6, 6, 5, 3, 3, 3, 3, 8, 15, 3, 3, 6, 10, 5, 8, 8, 6, 8, 5, 15, 15,
+    8, 15, 3, 5, 6, 10, 8, 15, 15, 3, 15, 5, 15, 15, 15, 15, 3, 15, 5, 5, 5, 8, 5, 10, 5, 10, 8, 13, 15, 12, 3, 3])
+_ANCHORS_3_THIRD = np.array([
+    15, 8, 8, 3, 15, 15, 3, 8, 15, 15, 15, 15, 15, 15, 15, 8, 15, 8, 15, 3, 15, 8, 15, 8, 3, 15, 6, 10, 15, 15, 10, 8,
+    15, 3, 15, 10, 10, 8, 9, 10, 6, 15, 8, 15, 3, 6, 6, 8, 15, 3, 15, 15, 15, 15, 15, 15, 15, 15, 15, 15, 3, 15, 15, 8])
+_WEIGHTS = {
+    2: np.array([0, 21, 43, 64]),
+    3: np.array([0, 9, 18, 27, 37, 46, 55, 64]),
+    4: np.array([0, 4, 9, 13, 17, 21, 26, 30, 34, 38, 43, 47, 51, 55, 60, 64]),
+}
+
+# subsets, partition bits, rotation bits, index selection bits, color bits, alpha bits,
+# per endpoint p-bits, per subset p-bits, index bits, secondary index bits
+_BC7_MODES = (
+    (3, 4, 0, 0, 4, 0, 1, 0, 3, 0),
+    (2, 6, 0, 0, 6, 0, 0, 1, 3, 0),
+    (3, 6, 0, 0, 5, 0, 0, 0, 2, 0),
+    (2, 6, 0, 0, 7, 0, 1, 0, 2, 0),
+    (1, 0, 2, 1, 5, 6, 0, 0, 2, 3),
+    (1, 0, 2, 0, 7, 8, 0, 0, 2, 2),
+    (1, 0, 0, 0, 7, 7, 1, 0, 4, 0),
+    (2, 6, 0, 0, 5, 5, 1, 0, 2, 0),
+)
+
+
+def _read_bits(bits: np.ndarray, position, count: int) -> np.ndarray:
+    """Read count bit wide fields from (n, 128) bit arrays, position is int, (k,) or (n, k) array of bit offsets."""
+    block_count = bits.shape[0]
+    if count == 0:
+        return np.zeros((block_count,) + np.shape(position)[-1:], np.int64)
+    powers = np.int64(1) << np.arange(count, dtype=np.int64)
+    if np.ndim(position) == 0:
+        return bits[:, position:position + count].astype(np.int64) @ powers
+    position = np.broadcast_to(position, (block_count, np.shape(position)[-1]))
+    bit_ids = np.minimum(position[:, :, None] + np.arange(count), bits.shape[1] - 1)
+    fields = bits[np.arange(block_count)[:, None, None], bit_ids]
+    return fields.astype(np.int64) @ powers
+
+
+def _read_indices(bits: np.ndarray, position: int, index_bits: int, anchors: np.ndarray) -> np.ndarray:
+    """Read 16 texel indices, anchor texels are stored without their most significant bit."""
+    widths = index_bits - anchors.astype(np.int64)
+    offsets = position + np.cumsum(widths, axis=1) - widths
+    return _read_bits(bits, offsets, index_bits) & ((1 << widths) - 1)
+
+
+def _get_subsets(partitions: np.ndarray, subset_count: int) -> np.ndarray:
+    texels = np.arange(16)
+    if subset_count == 2:
+        return (_PARTITIONS_2[partitions][:, None] >> texels) & 1
+    if subset_count == 3:
+        return (_PARTITIONS_3[partitions][:, None] >> (2 * texels)) & 3
+    return np.zeros((partitions.shape[0], 16), np.int64)
+
+
+def _get_anchors(partitions: np.ndarray, subset_count: int) -> np.ndarray:
+    texels = np.arange(16)
+    anchors = np.broadcast_to(texels == 0, (partitions.shape[0], 16)).copy()
+    if subset_count == 2:
+        anchors |= texels == _ANCHORS_2[partitions][:, None]
+    elif subset_count == 3:
+        anchors |= texels == _ANCHORS_3_SECOND[partitions][:, None]
+        anchors |= texels == _ANCHORS_3_THIRD[partitions][:, None]
+    return anchors
+
+
+def _decode_bc7_mode(bits: np.ndarray, mode: int) -> np.ndarray:
+    (subset_count, partition_bits, rotation_bits, index_selection_bits, color_bits, alpha_bits,
+     endpoint_pbits, subset_pbits, index_bits, secondary_index_bits) = _BC7_MODES[mode]
+    block_count = bits.shape[0]
+    endpoint_count = subset_count * 2
+    position = mode + 1
+    partitions = _read_bits(bits, position, partition_bits)
+    position += partition_bits
+    rotations = _read_bits(bits, position, rotation_bits)
+    position += rotation_bits
+    index_selection = _read_bits(bits, position, index_selection_bits)
+    position += index_selection_bits
+
+    # Endpoints are stored channel by channel, (block, subset * 2 + endpoint, channel)
+    endpoints = np.full((block_count, endpoint_count, 4), 255, np.int32)
+    field_offsets = np.arange(endpoint_count)
+    for channel in range(3):
+        endpoints[:, :, channel] = _read_bits(bits, position + field_offsets * color_bits, color_bits)
+        position += endpoint_count * color_bits
+    if alpha_bits:
+        endpoints[:, :, 3] = _read_bits(bits, position + field_offsets * alpha_bits, alpha_bits)
+        position += endpoint_count * alpha_bits
+    channel_count = 4 if alpha_bits else 3
+
+    if endpoint_pbits or subset_pbits:
+        if endpoint_pbits:
+            pbits = _read_bits(bits, position + field_offsets, 1)
+            position += endpoint_count
+        else:
+            pbits = np.repeat(_read_bits(bits, position + np.arange(subset_count), 1), 2, axis=1)
+            position += subset_count
+        endpoints[:, :, :channel_count] = (endpoints[:, :, :channel_count] << 1) | pbits[:, :, None]
+        color_bits += 1
+        alpha_bits += 1 if alpha_bits else 0
+
+    precisions = np.array([color_bits, color_bits, color_bits, alpha_bits])[:channel_count]
+    expanded = endpoints[:, :, :channel_count] << (8 - precisions)
+    endpoints[:, :, :channel_count] = expanded | (expanded >> precisions)
+
+    anchors = _get_anchors(partitions, subset_count)
+    subsets = _get_subsets(partitions, subset_count)
+    color_weights = _WEIGHTS[index_bits][_read_indices(bits, position, index_bits, anchors)]
+    if secondary_index_bits:
+        secondary_position = position + 16 * index_bits - subset_count
+        alpha_weights = _WEIGHTS[secondary_index_bits][
+            _read_indices(bits, secondary_position, secondary_index_bits, anchors)]
+        swap = index_selection.astype(bool)
+        color_weights[swap], alpha_weights[swap] = alpha_weights[swap], color_weights[swap].copy()
+    else:
+        alpha_weights = color_weights
+    weights = np.empty((block_count, 16, 4), np.int32)
+    weights[:, :, :3] = color_weights[:, :, None]
+    weights[:, :, 3] = alpha_weights
+
+    block_ids = np.arange(block_count)[:, None]
+    endpoint0 = endpoints[block_ids, subsets * 2]
+    endpoint1 = endpoints[block_ids, subsets * 2 + 1]
+    pixels = ((64 - weights) * endpoint0 + weights * endpoint1 + 32) >> 6
+
+    for rotation in range(1, 4):
+        rotated = rotations == rotation
+        pixels[rotated, :, rotation - 1], pixels[rotated, :, 3] = pixels[rotated, :, 3], pixels[rotated, :, rotation - 1]
+    return pixels.astype(np.uint8)
+
+
+def decode_bc7(data: bytes, width: int, height: int) -> np.ndarray:
+    """Decode BC7 data into (height, width, 4) uint8 RGBA image, blocks are decoded in groups sharing the mode."""
+    blocks_x, blocks_y = _get_block_counts(width, height)
+    blocks = np.frombuffer(data, np.uint8, blocks_x * blocks_y * 16).reshape((-1, 16))
+    bits = np.unpackbits(blocks, axis=1, bitorder='little')
+    # Mode is the position of the lowest set bit, blocks without it are reserved and decode to zeros
+    modes = np.argmax(bits[:, :8], axis=1)
+    modes[blocks[:, 0] == 0] = 8
+    pixels = np.zeros((blocks.shape[0], 16, 4), np.uint8)
+    for mode in range(8):
+        selection = modes == mode
+        if selection.any():
+            pixels[selection] = _decode_bc7_mode(bits[selection], mode)
+    return _blocks_to_image(pixels, width, height)
+
+
+# subsets, transformed endpoints, partition bits, endpoint bits, red, green and blue delta bits
+_BC6H_MODES = (
+    (2, 1, 5, 10, 5, 5, 5),
+    (2, 1, 5, 7, 6, 6, 6),
+    (2, 1, 5, 11, 5, 4, 4),
+    (2, 1, 5, 11, 4, 5, 4),
+    (2, 1, 5, 11, 4, 4, 5),
+    (2, 1, 5, 9, 5, 5, 5),
+    (2, 1, 5, 8, 6, 5, 5),
+    (2, 1, 5, 8, 5, 6, 5),
+    (2, 1, 5, 8, 5, 5, 6),
+    (2, 0, 5, 6, 6, 6, 6),
+    (1, 0, 0, 10, 10, 10, 10),
+    (1, 1, 0, 11, 9, 9, 9),
+    (1, 1, 0, 12, 8, 8, 8),
+    (1, 1, 0, 16, 4, 4, 4),
+)
+
+# Destination of every endpoint bit stored after the mode bits, encoded as endpoint * 16 + bit.
+# Endpoints are r0, g0, b0, r1, g1, b1, r2, g2, b2, r3, g3, b3
+_BC6H_BIT_PACKINGS = (
+    (116, 132, 180, 0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 32, 33, 34, 35, 36, 37, 38,
+     39, 40, 41, 48, 49, 50, 51, 52, 164, 112, 113, 114, 115, 64, 65, 66, 67, 68, 176, 160, 161, 162, 163, 80, 81,
+     82, 83, 84, 177, 128, 129, 130, 131, 96, 97, 98, 99, 100, 178, 144, 145, 146, 147, 148, 179),
+    (117, 164, 165, 0, 1, 2, 3, 4, 5, 6, 176, 177, 132, 16, 17, 18, 19, 20, 21, 22, 133, 178, 116, 32, 33, 34, 35,
+     36, 37, 38, 179, 181, 180, 48, 49, 50, 51, 52, 53, 112, 113, 114, 115, 64, 65, 66, 67, 68, 69, 160, 161, 162,
+     163, 80, 81, 82, 83, 84, 85, 128, 129, 130, 131, 96, 97, 98, 99, 100, 101, 144, 145, 146, 147, 148, 149),
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41,
+     48, 49, 50, 51, 52, 10, 112, 113, 114, 115, 64, 65, 66, 67, 26, 176, 160, 161, 162, 163, 80, 81, 82, 83, 42,
+     177, 128, 129, 130, 131, 96, 97, 98, 99, 100, 178, 144, 145, 146, 147, 148, 179),
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41,
+     48, 49, 50, 51, 10, 164, 112, 113, 114, 115, 64, 65, 66, 67, 68, 26, 160, 161, 162, 163, 80, 81, 82, 83, 42,
+     177, 128, 129, 130, 131, 96, 97, 98, 99, 176, 178, 144, 145, 146, 147, 116, 179),
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41,
+     48, 49, 50, 51, 10, 132, 112, 113, 114, 115, 64, 65, 66, 67, 26, 176, 160, 161, 162, 163, 80, 81, 82, 83, 84,
+     42, 128, 129, 130, 131, 96, 97, 98, 99, 177, 178, 144, 145, 146, 147, 180, 179),
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 132, 16, 17, 18, 19, 20, 21, 22, 23, 24, 116, 32, 33, 34, 35, 36, 37, 38, 39, 40,
+     180, 48, 49, 50, 51, 52, 164, 112, 113, 114, 115, 64, 65, 66, 67, 68, 176, 160, 161, 162, 163, 80, 81, 82, 83,
+     84, 177, 128, 129, 130, 131, 96, 97, 98, 99, 100, 178, 144, 145, 146, 147, 148, 179),
+    (0, 1, 2, 3, 4, 5, 6, 7, 164, 132, 16, 17, 18, 19, 20, 21, 22, 23, 178, 116, 32, 33, 34, 35, 36, 37, 38, 39,
+     179, 180, 48, 49, 50, 51, 52, 53, 112, 113, 114, 115, 64, 65, 66, 67, 68, 176, 160, 161, 162, 163, 80, 81, 82,
+     83, 84, 177, 128, 129, 130, 131, 96, 97, 98, 99, 100, 101, 144, 145, 146, 147, 148, 149),
+    (0, 1, 2, 3, 4, 5, 6, 7, 176, 132, 16, 17, 18, 19, 20, 21, 22, 23, 117, 116, 32, 33, 34, 35, 36, 37, 38, 39,
+     165, 180, 48, 49, 50, 51, 52, 164, 112, 113, 114, 115, 64, 65, 66, 67, 68, 69, 160, 161, 162, 163, 80, 81, 82,
+     83, 84, 177, 128, 129, 130, 131, 96, 97, 98, 99, 100, 178, 144, 145, 146, 147, 148, 179),
+    (0, 1, 2, 3, 4, 5, 6, 7, 177, 132, 16, 17, 18, 19, 20, 21, 22, 23, 133, 116, 32, 33, 34, 35, 36, 37, 38, 39,
+     181, 180, 48, 49, 50, 51, 52, 164, 112, 113, 114, 115, 64, 65, 66, 67, 68, 176, 160, 161, 162, 163, 80, 81, 82,
+     83, 84, 85, 128, 129, 130, 131, 96, 97, 98, 99, 100, 178, 144, 145, 146, 147, 148, 179),
+    (0, 1, 2, 3, 4, 5, 164, 176, 177, 132, 16, 17, 18, 19, 20, 21, 117, 133, 178, 116, 32, 33, 34, 35, 36, 37, 165,
+     179, 181, 180, 48, 49, 50, 51, 52, 53, 112, 113, 114, 115, 64, 65, 66, 67, 68, 69, 160, 161, 162, 163, 80, 81,
+     82, 83, 84, 85, 128, 129, 130, 131, 96, 97, 98, 99, 100, 101, 144, 145, 146, 147, 148, 149),
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41,
+     48, 49, 50, 51, 52, 53, 54, 55, 56, 57, 64, 65, 66, 67, 68, 69, 70, 71, 72, 73, 80, 81, 82, 83, 84, 85, 86, 87,
+     88, 89),
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41,
+     48, 49, 50, 51, 52, 53, 54, 55, 56, 10, 64, 65, 66, 67, 68, 69, 70, 71, 72, 26, 80, 81, 82, 83, 84, 85, 86, 87,
+     88, 42),
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41,
+     48, 49, 50, 51, 52, 53, 54, 55, 11, 10, 64, 65, 66, 67, 68, 69, 70, 71, 27, 26, 80, 81, 82, 83, 84, 85, 86, 87,
+     43, 42),
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41,
+     48, 49, 50, 51, 15, 14, 13, 12, 11, 10, 64, 65, 66, 67, 31, 30, 29, 28, 27, 26, 80, 81, 82, 83, 47, 46, 45, 44,
+     43, 42),
+)
+
+
+def _sign_extend(values: np.ndarray, bits) -> np.ndarray:
+    sign = np.int64(1) << (np.asarray(bits, np.int64) - 1)
+    return (values & ((sign << 1) - 1) ^ sign) - sign
+
+
+def _bc6h_unquantize(values: np.ndarray, precision: int, signed: bool) -> np.ndarray:
+    if not signed:
+        if precision >= 15:
+            return values
+        unquantized = ((values << 15) + 0x4000) >> (precision - 1)
+        unquantized[values == 0] = 0
+        unquantized[values == (1 << precision) - 1] = 0xFFFF
+        return unquantized
+    if precision >= 16:
+        return values
+    magnitudes = np.abs(values)
+    unquantized = ((magnitudes << 15) + 0x4000) >> (precision - 1)
+    unquantized[magnitudes >= (1 << (precision - 1)) - 1] = 0x7FFF
+    unquantized[magnitudes == 0] = 0
+    return np.where(values < 0, -unquantized, unquantized)
+
+
+def _decode_bc6h_mode(bits: np.ndarray, mode: int, signed: bool) -> np.ndarray:
+    subset_count, transformed, partition_bits, endpoint_bits, *delta_bits = _BC6H_MODES[mode]
+    block_count = bits.shape[0]
+    position = 2 if mode < 2 else 5
+    packing = np.array(_BC6H_BIT_PACKINGS[mode])
+    # Scatter every stored bit into its endpoint component with one matrix product
+    targets = np.zeros((packing.size, 12), np.int64)
+    targets[np.arange(packing.size), packing >> 4] = np.int64(1) << (packing & 15)
+    endpoints = bits[:, position:position + packing.size].astype(np.int64) @ targets
+    endpoints = endpoints.reshape((block_count, 4, 3))[:, :subset_count * 2]
+    position += packing.size
+    partitions = _read_bits(bits, position, partition_bits)
+    position += partition_bits
+
+    delta_bits = np.array(delta_bits)
+    if signed:
+        endpoints[:, 0] = _sign_extend(endpoints[:, 0], endpoint_bits)
+    if signed or transformed:
+        endpoints[:, 1:] = _sign_extend(endpoints[:, 1:], delta_bits)
+    if transformed:
+        endpoints[:, 1:] = (endpoints[:, 1:] + endpoints[:, :1]) & ((1 << endpoint_bits) - 1)
+        if signed:
+            endpoints[:, 1:] = _sign_extend(endpoints[:, 1:], endpoint_bits)
+    endpoints = _bc6h_unquantize(endpoints, endpoint_bits, signed)
+
+    index_bits = 3 if subset_count == 2 else 4
+    subsets = _get_subsets(partitions, subset_count)
+    weights = _WEIGHTS[index_bits][_read_indices(bits, position, index_bits, _get_anchors(partitions, subset_count))]
+    block_ids = np.arange(block_count)[:, None]
+    endpoint0 = endpoints[block_ids, subsets * 2]
+    endpoint1 = endpoints[block_ids, subsets * 2 + 1]
+    values = ((64 - weights[:, :, None]) * endpoint0 + weights[:, :, None] * endpoint1 + 32) >> 6
+
+    # Scale into half float range
+    if signed:
+        halves = np.where(values < 0, 0x8000 | ((-values * 31) >> 5), (values * 31) >> 5)
+    else:
+        halves = (values * 31) >> 6
+    return halves.astype(np.uint16)
+
+
+def decode_bc6h(data: bytes, width: int, height: int, signed: bool = False) -> np.ndarray:
+    """Decode BC6H data into (height, width, 4) float32 RGBA image, alpha is always 1."""
+    blocks_x, blocks_y = _get_block_counts(width, height)
+    blocks = np.frombuffer(data, np.uint8, blocks_x * blocks_y * 16).reshape((-1, 16))
+    bits = np.unpackbits(blocks, axis=1, bitorder='little')
+    mode_bits = blocks[:, 0].astype(np.int64) & 0x1F
+    modes = np.where(mode_bits & 2, np.where(mode_bits & 1, 10, 2) + (mode_bits >> 2), mode_bits & 3)
+    halves = np.zeros((blocks.shape[0], 16, 3), np.uint16)
+    # Reserved modes decode to zeros
+    for mode in range(len(_BC6H_MODES)):
+        selection = modes == mode
+        if selection.any():
+            halves[selection] = _decode_bc6h_mode(bits[selection], mode, signed)
+    pixels = np.ones((blocks.shape[0], 16, 4), np.float32)
+    pixels[:, :, :3] = halves.view(np.float16)
+    return _blocks_to_image(pixels, width, height)